@@ -1,52 +1,300 @@
 #!/usr/bin/env python3
 """
 Analizador Simple de Ticker - Análisis completo de trading con VIX_Fix
-Uso: python analizar_ticker.py TICKER FECHA_INICIO FECHA_FIN
+Uso: python analizar_ticker.py TICKER [TICKER ...] FECHA_INICIO FECHA_FIN
+
+Con varios tickers (o 'all' / --archivo) el análisis corre en un pool de procesos: cada
+lote de tickers se carga de la BD local en una sola consulta y cada worker reutiliza su
+TradeAnalyzer. Los trades se escriben a medida que llegan (CSV, JSON Lines, Arrow o Parquet)
+con los sinks de output_sinks.py.
 """
 
+import io
+import math
+import os
 import sys
 import argparse
-from trade_analyzer import TradeAnalyzer
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+
+from market_db import buscar_db_path, leer_panel_ohlcv_eod, leer_universo
+from output_sinks import SINKS, crear_sink, resolver_formato
+
+# =====================================================
+# TICKERS A ANALIZAR
+# =====================================================
+
+def leer_archivo_tickers(path):
+    """Tickers de un archivo: uno por línea o separados por comas ('#' comenta el resto de la línea)"""
+    tickers = []
+    with open(path, encoding='utf-8') as f:
+        for linea in f:
+            linea = linea.split('#', 1)[0]
+            tickers.extend(t.strip() for t in linea.split(',') if t.strip())
+    return tickers
+
+def resolver_tickers(tickers, archivo=None, db_path=None):
+    """
+    Lista final de tickers (sin duplicados, en orden de aparición).
+    'all' se expande al universo activo de la BD local.
+    """
+    candidatos = list(tickers)
+    if archivo:
+        candidatos.extend(leer_archivo_tickers(archivo))
+
+    resultado = []
+    for ticker in candidatos:
+        if ticker.lower() == 'all':
+            if db_path is None:
+                raise ValueError("'all' requiere la BD local (trading_dashboard.db)")
+            resultado.extend(leer_universo(db_path))
+        else:
+            resultado.append(ticker.upper())
+    return list(dict.fromkeys(resultado))
+
+# =====================================================
+# ANÁLISIS POR LOTES (un TradeAnalyzer por worker)
+# =====================================================
+
+_analyzer = None
+
+def iniciar_worker(profit_target, max_hold_days, db_path):
+    """Initializer del pool: el TradeAnalyzer se crea una vez por proceso y se reutiliza"""
+    global _analyzer
+    from trade_analyzer import TradeAnalyzer
+    _analyzer = TradeAnalyzer(profit_target=profit_target, max_hold_days=max_hold_days, db_path=db_path)
+
+def rango_extendido(analyzer, fecha_inicio, fecha_fin):
+    """Rango que necesita analizar_trades: warm-up del indicador y ventana de salidas"""
+    estrategia = analyzer.vix_strategy
+    warm_up_days = max(estrategia.pd_period, estrategia.bbl, estrategia.lb) + 50
+    inicio = datetime.strptime(fecha_inicio, '%Y-%m-%d') - timedelta(days=warm_up_days)
+    fin = datetime.strptime(fecha_fin, '%Y-%m-%d') + timedelta(days=analyzer.max_hold_days + 10)
+    return inicio.strftime('%Y-%m-%d'), fin.strftime('%Y-%m-%d')
+
+def analizar_lote(tickers, fecha_inicio, fecha_fin):
+    """
+    Analiza un lote con el TradeAnalyzer del worker: OHLCV de todo el lote en una consulta
+    (los tickers sin datos locales siguen el camino normal: BD / yfinance).
+    Devuelve [(ticker, DataFrame de trades o None, error o None)]
+    """
+    analyzer = _analyzer
+    db_path = analyzer.db_path or buscar_db_path()
+    paneles = {}
+    if db_path is not None:
+        paneles = leer_panel_ohlcv_eod(db_path, tickers, *rango_extendido(analyzer, fecha_inicio, fecha_fin))
+
+    resultados = []
+    for ticker in tickers:
+        analyzer.precargar_datos(paneles.get(ticker))
+        try:
+            # La salida por ticker de los analizadores no se intercala entre workers
+            with redirect_stdout(io.StringIO()):
+                trades = analyzer.analizar_trades(ticker, fecha_inicio, fecha_fin)
+            if trades is not None:
+                trades.insert(0, 'ticker', ticker)
+            resultados.append((ticker, trades, None))
+        except Exception as e:
+            resultados.append((ticker, None, str(e)))
+    return resultados
+
+def analizar_tickers(tickers, fecha_inicio, fecha_fin, profit_target, max_hold_days, workers, db_path=None):
+    """
+    Generador de (ticker, trades, error) a medida que terminan los lotes.
+    Lotes de ~4 por worker para repartir la carga sin perder la consulta por lote.
+    """
+    workers = max(1, min(workers, len(tickers)))
+    tamano = max(1, math.ceil(len(tickers) / (workers * 4)))
+    lotes = [tickers[i:i + tamano] for i in range(0, len(tickers), tamano)]
+
+    if workers == 1:
+        iniciar_worker(profit_target, max_hold_days, db_path)
+        for lote in lotes:
+            yield from analizar_lote(lote, fecha_inicio, fecha_fin)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=iniciar_worker,
+        initargs=(profit_target, max_hold_days, db_path)
+    ) as pool:
+        futuros = [pool.submit(analizar_lote, lote, fecha_inicio, fecha_fin) for lote in lotes]
+        for futuro in as_completed(futuros):
+            yield from futuro.result()
+
+# =====================================================
+# RESUMEN Y SALIDA CONSOLIDADA
+# =====================================================
+
+def resumen_ticker(ticker, trades, error=None):
+    """Fila de resumen de un ticker (mismas métricas que mostrar_resultados_trades)"""
+    if error is not None or trades is None or trades.empty:
+        return {
+            'ticker': ticker,
+            'estado': 'ERROR' if error is not None else 'SIN_TRADES',
+            'total_trades': 0,
+            'error': error
+        }
+
+    exitosos = trades['resultado'] == 'TARGET_ALCANZADO'
+    return {
+        'ticker': ticker,
+        'estado': 'OK',
+        'total_trades': len(trades),
+        'trades_exitosos': int(exitosos.sum()),
+        'trades_max_dias': int((trades['resultado'] == 'MAX_DIAS').sum()),
+        'trades_fin_datos': int((trades['resultado'] == 'FIN_DATOS').sum()),
+        'tasa_exito': float(exitosos.mean()),
+        'dias_promedio': float(trades['dias_trade'].mean()),
+        'dias_max': int(trades['dias_trade'].max()),
+        'dias_promedio_exito': float(trades.loc[exitosos, 'dias_trade'].mean()) if exitosos.any() else None,
+        'profit_promedio': float(trades['profit_pct'].mean()),
+        'profit_min': float(trades['profit_pct'].min()),
+        'profit_max': float(trades['profit_pct'].max()),
+        'primera_compra': trades['fecha_compra'].min().strftime('%Y-%m-%d'),
+        'ultima_compra': trades['fecha_compra'].max().strftime('%Y-%m-%d'),
+        'error': None
+    }
+
+def ruta_resumen(path):
+    """resultados.csv -> resultados_resumen.csv"""
+    base, extension = os.path.splitext(path)
+    return f"{base}_resumen{extension}"
+
+# =====================================================
+# CLI
+# =====================================================
+
+def analizar_uno(args):
+    """Un solo ticker sin --salida: salida humana completa (comportamiento original)"""
+    from trade_analyzer import TradeAnalyzer
+
+    analyzer = TradeAnalyzer(
+        profit_target=args.target,
+        max_hold_days=args.max_dias
+    )
+
+    ticker = args.tickers[0]
+    print(f"Analizando {ticker} desde {args.fecha_inicio} hasta {args.fecha_fin}")
+    print(f"Target: {args.target:.1%} | Máximo días: {args.max_dias}")
+
+    # Analizar trades
+    resultados = analyzer.analizar_trades(ticker, args.fecha_inicio, args.fecha_fin)
+    analyzer.mostrar_resultados_trades(resultados, ticker)
+    return resultados
+
+def analizar_varios(args, tickers):
+    """
+    Varios tickers en paralelo. Con --salida los trades se escriben a medida que llegan
+    (en el orden de entrada) con un sink de output_sinks; el resumen por ticker va al final.
+    """
+    import pandas as pd
+
+    formato = resolver_formato(args.salida, args.formato) if args.salida else None
+
+    # Import en el proceso principal: los workers (fork) heredan pandas/numpy ya cargados
+    import trade_analyzer  # noqa: F401
+
+    workers = args.workers or os.cpu_count() or 1
+    print(f"🔄 Analizando {len(tickers)} tickers desde {args.fecha_inicio} hasta {args.fecha_fin} "
+          f"(workers: {min(workers, len(tickers))})")
+    print(f"Target: {args.target:.1%} | Máximo días: {args.max_dias}")
+
+    inicio = datetime.now()
+    orden = {ticker: i for i, ticker in enumerate(tickers)}
+    resumen = []
+    pendientes = {}
+    siguiente = 0
+    sink = crear_sink(formato, args.salida) if args.salida else None
+    try:
+        for ticker, trades, error in analizar_tickers(
+            tickers, args.fecha_inicio, args.fecha_fin, args.target, args.max_dias, workers
+        ):
+            fila = resumen_ticker(ticker, trades, error)
+            resumen.append(fila)
+            if fila['estado'] == 'OK':
+                print(f"✅ {ticker}: {fila['total_trades']} trades ({fila['tasa_exito']:.1%} exitosos)")
+            elif error is not None:
+                print(f"❌ {ticker}: {error}")
+            else:
+                print(f"⚪ {ticker}: sin trades")
+
+            # Los lotes terminan en cualquier orden: se escribe en el orden de entrada
+            # (solo quedan en memoria los trades que esperan a un ticker anterior)
+            pendientes[orden[ticker]] = trades if fila['estado'] == 'OK' else None
+            while siguiente in pendientes:
+                listos = pendientes.pop(siguiente)
+                siguiente += 1
+                if sink is not None and listos is not None:
+                    sink.escribir(listos)
+    finally:
+        if sink is not None:
+            sink.cerrar()
+
+    df_resumen = pd.DataFrame(resumen).sort_values('ticker', key=lambda s: s.map(orden)).reset_index(drop=True)
+    total_trades = int(df_resumen['total_trades'].sum())
+    con_trades = int((df_resumen['estado'] == 'OK').sum())
+
+    segundos = (datetime.now() - inicio).total_seconds()
+    print(f"\n📊 {total_trades} trades de {con_trades}/{len(tickers)} tickers en {segundos:.1f}s")
+
+    if args.salida:
+        with crear_sink(formato, ruta_resumen(args.salida)) as sink_resumen:
+            sink_resumen.escribir(df_resumen)
+        print(f"💾 Trades: {args.salida}")
+        print(f"💾 Resumen por ticker: {ruta_resumen(args.salida)}")
+    else:
+        columnas = ['ticker', 'estado', 'total_trades', 'tasa_exito', 'dias_promedio', 'profit_promedio']
+        print(df_resumen.reindex(columns=columnas).to_string(index=False))
+
+    return df_resumen
 
 def main():
     """Función principal simplificada"""
     parser = argparse.ArgumentParser(
-        description='Análisis completo de trading para un ticker',
+        description='Análisis completo de trading para uno o varios tickers',
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Ejemplos de uso:
   python analizar_ticker.py GGAL.BA 2025-01-01 2025-08-04
-  python analizar_ticker.py CARC.BA 2025-01-01 2025-08-04  
+  python analizar_ticker.py CARC.BA 2025-01-01 2025-08-04
   python analizar_ticker.py BTC-USD 2025-01-01 2025-08-04
+  python analizar_ticker.py GGAL.BA YPF BTC-USD 2025-01-01 2025-08-04 --salida trades.csv
+  python analizar_ticker.py all 2025-01-01 2025-08-04 --salida trades.parquet --workers 8
+  python analizar_ticker.py 2025-01-01 2025-08-04 --archivo tickers.txt --salida trades.jsonl
         """
     )
-    
-    parser.add_argument('ticker', help='Símbolo del ticker (ej: GGAL.BA, CARC.BA, BTC-USD)')
+
+    parser.add_argument('tickers', nargs='*', help="Símbolos (ej: GGAL.BA BTC-USD) o 'all' para todo el universo")
     parser.add_argument('fecha_inicio', help='Fecha de inicio (YYYY-MM-DD)')
     parser.add_argument('fecha_fin', help='Fecha de fin (YYYY-MM-DD)')
-    parser.add_argument('--target', type=float, default=0.04, help='Target de profit (default: 0.04 = 4%)')
+    parser.add_argument('--target', type=float, default=0.04, help='Target de profit (default: 0.04 = 4%%)')
     parser.add_argument('--max-dias', type=int, default=30, help='Máximo días por trade (default: 30)')
-    
+    parser.add_argument('--archivo', '-a', help='Archivo con tickers (uno por línea o separados por comas)')
+    parser.add_argument('--salida', '-o', help='Archivo de trades consolidado (.csv, .jsonl, .arrow, .parquet); el resumen va a <nombre>_resumen')
+    parser.add_argument('--formato', choices=list(SINKS), help='Formato de --salida (default: por extensión)')
+    parser.add_argument('--workers', '-w', type=int, help='Procesos del pool (default: núcleos disponibles)')
+
     args = parser.parse_args()
-    
+
     try:
-        # Crear analizador
-        analyzer = TradeAnalyzer(
-            profit_target=args.target,
-            max_hold_days=args.max_dias
-        )
-        
-        print(f"Analizando {args.ticker} desde {args.fecha_inicio} hasta {args.fecha_fin}")
-        print(f"Target: {args.target:.1%} | Máximo días: {args.max_dias}")
-        
-        # Analizar trades
-        resultados = analyzer.analizar_trades(args.ticker, args.fecha_inicio, args.fecha_fin)
-        analyzer.mostrar_resultados_trades(resultados, args.ticker)
-        
-        return resultados
-        
+        datetime.strptime(args.fecha_inicio, '%Y-%m-%d')
+        datetime.strptime(args.fecha_fin, '%Y-%m-%d')
+
+        tickers = resolver_tickers(args.tickers, args.archivo, buscar_db_path())
+        if not tickers:
+            parser.error('indicar al menos un ticker, --archivo o all')
+
+        # Un ticker sin archivo de salida: reporte humano completo
+        if len(tickers) == 1 and not args.salida:
+            args.tickers = tickers
+            return analizar_uno(args)
+
+        return analizar_varios(args, tickers)
+
     except ValueError as e:
-        print(f"Error en las fechas: {e}")
+        print(f"Error en los parámetros: {e}")
         sys.exit(1)
     except KeyboardInterrupt:
         print("\nOperación cancelada")
@@ -56,4 +304,4 @@ Ejemplos de uso:
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
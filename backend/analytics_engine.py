@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Motor analítico opcional sobre market_data_eod con DuckDB (ejecución vectorizada).
+
+Las escrituras transaccionales siguen en SQLite; DuckDB solo lee:
+- modo 'attach': adjunta el archivo SQLite en solo lectura (extensión sqlite de DuckDB)
+- modo 'mirror': si la extensión no está disponible (sin red), copia market_data_eod
+  a una tabla DuckDB en memoria y la re-sincroniza cuando cambian los datos EOD
+
+ANALYTICS_ENGINE=auto (DuckDB si está instalado) | duckdb | sqlite
+Sin DuckDB instalado (pip install duckdb) los llamadores usan sus consultas SQLite.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# Columnas OHLCV con los nombres de yfinance (formato que esperan los analizadores)
+COLUMNAS_OHLCV = {
+    'open_price': 'Open',
+    'high_price': 'High',
+    'low_price': 'Low',
+    'close_price': 'Close',
+    'volume': 'Volume'
+}
+
+
+class AnalyticsEngine:
+    """Consultas analíticas pesadas sobre market_data_eod (paneles multi-símbolo)"""
+
+    def __init__(self, db_path: str = 'trading_dashboard.db', engine: Optional[str] = None):
+        self.db_path = db_path
+        self.requested = (engine or os.environ.get('ANALYTICS_ENGINE', 'auto')).lower()
+        self.mode = None            # 'attach', 'mirror' o 'sqlite' (se resuelve en la primera consulta)
+        self.error = None
+        self._conn = None
+        self._lock = threading.Lock()
+        self._mirror_signature = None
+
+        if self.requested == 'sqlite' or duckdb is None:
+            self.mode = 'sqlite'
+            if self.requested == 'duckdb':
+                self.error = 'duckdb no está instalado (pip install duckdb)'
+
+    @property
+    def enabled(self) -> bool:
+        """True si las consultas analíticas corren en DuckDB"""
+        return self.mode != 'sqlite'
+
+    def status(self) -> Dict:
+        return {
+            'requested': self.requested,
+            'engine': 'sqlite' if self.mode == 'sqlite' else 'duckdb',
+            'mode': self.mode or 'pending',
+            'duckdb_version': duckdb.__version__ if duckdb is not None else None,
+            'error': self.error
+        }
+
+    # =====================================================
+    # CONEXIÓN Y SINCRONIZACIÓN
+    # =====================================================
+
+    def _conectar(self):
+        conn = duckdb.connect()
+        try:
+            try:
+                conn.execute('LOAD sqlite')
+            except Exception:
+                conn.execute('INSTALL sqlite')
+                conn.execute('LOAD sqlite')
+
+            # Todo como texto y casteo explícito: los tipos declarados en SQLite no son confiables
+            conn.execute('SET sqlite_all_varchar = true')
+            conn.execute(f"ATTACH '{self.db_path}' AS src (TYPE sqlite, READ_ONLY)")
+            conn.execute('''
+                CREATE VIEW eod AS
+                SELECT s.symbol,
+                       DATE '1970-01-01' + CAST(e.day AS INTEGER) AS business_date,
+                       CAST(e.open_price AS DOUBLE) AS open_price,
+                       CAST(e.high_price AS DOUBLE) AS high_price,
+                       CAST(e.low_price AS DOUBLE) AS low_price,
+                       CAST(e.close_price AS DOUBLE) AS close_price,
+                       CAST(e.volume AS BIGINT) AS volume,
+                       CAST(e.data_quality_score AS INTEGER) AS data_quality_score,
+                       e.anomaly_flags
+                FROM src.market_data_eod_v2 e
+                JOIN src.symbols s ON s.symbol_id = e.symbol_id
+            ''')
+            self.mode = 'attach'
+        except Exception as e:
+            self.error = f"extensión sqlite no disponible ({str(e).splitlines()[0]}); usando copia en memoria"
+            self.mode = 'mirror'
+
+        self._conn = conn
+        print(f"🦆 Motor analítico DuckDB {duckdb.__version__} (modo {self.mode})")
+
+    def _firma_sqlite(self, cursor) -> tuple:
+        """Firma barata de market_data_eod: versión EOD + filas + última fecha"""
+        cursor.execute("SELECT version FROM data_versions WHERE name = 'eod'")
+        version = cursor.fetchone()
+        cursor.execute('SELECT COUNT(*), MAX(day) FROM market_data_eod_v2')
+        return (version[0] if version else 0, *cursor.fetchone())
+
+    def _sincronizar_mirror(self):
+        """Re-copiar market_data_eod a DuckDB si cambió desde la última copia"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            firma = self._firma_sqlite(cursor)
+            if firma == self._mirror_signature:
+                return
+
+            df = pd.read_sql_query('''
+                SELECT symbol, business_date, open_price, high_price, low_price, close_price,
+                       volume, data_quality_score, anomaly_flags
+                FROM market_data_eod
+            ''', conn)
+        finally:
+            conn.close()
+
+        self._conn.register('eod_sqlite', df)
+        self._conn.execute('''
+            CREATE OR REPLACE TABLE eod AS
+            SELECT symbol,
+                   CAST(business_date AS DATE) AS business_date,
+                   CAST(open_price AS DOUBLE) AS open_price,
+                   CAST(high_price AS DOUBLE) AS high_price,
+                   CAST(low_price AS DOUBLE) AS low_price,
+                   CAST(close_price AS DOUBLE) AS close_price,
+                   CAST(volume AS BIGINT) AS volume,
+                   CAST(data_quality_score AS INTEGER) AS data_quality_score,
+                   anomaly_flags
+            FROM eod_sqlite
+            ORDER BY symbol, business_date
+        ''')
+        self._conn.unregister('eod_sqlite')
+        self._mirror_signature = firma
+
+    def usar_origen(self, db_path: str):
+        """
+        Leer de otra BD SQLite (o de una versión nueva del mismo archivo, ej: el snapshot de
+        lectura recién publicado). En modo attach se vuelve a adjuntar en la próxima consulta
+        (las consultas en curso terminan con la conexión anterior); en modo mirror la firma
+        detecta el cambio y re-copia.
+        """
+        with self._lock:
+            self.db_path = db_path
+            if self.mode == 'attach':
+                self._conn = None
+                self.mode = None
+
+    def _cursor(self):
+        """Cursor DuckDB (uno por consulta: las consultas pueden venir de varios threads)"""
+        with self._lock:
+            if self._conn is None:
+                self._conectar()
+            if self.mode == 'mirror':
+                self._sincronizar_mirror()
+            return self._conn.cursor()
+
+    def query_df(self, sql: str, params: Optional[list] = None) -> pd.DataFrame:
+        """Ejecutar una consulta sobre la vista/tabla `eod` y devolver un DataFrame"""
+        cursor = self._cursor()
+        try:
+            return cursor.execute(sql, params or []).df()
+        finally:
+            cursor.close()
+
+    # =====================================================
+    # PANELES MULTI-SÍMBOLO
+    # =====================================================
+
+    def ohlcv_panel(self, symbols: List[str], fecha_inicio: str, fecha_fin: str) -> Dict[str, pd.DataFrame]:
+        """
+        OHLCV de varios símbolos en una sola consulta: {symbol: DataFrame estilo yfinance}
+        """
+        if not symbols:
+            return {}
+        df = self.query_df(f'''
+            SELECT symbol, business_date, open_price, high_price, low_price, close_price, volume
+            FROM eod
+            WHERE symbol IN ({','.join('?' * len(symbols))})
+              AND business_date BETWEEN CAST(? AS DATE) AND CAST(? AS DATE)
+            ORDER BY symbol, business_date
+        ''', [*symbols, fecha_inicio, fecha_fin])
+
+        df['business_date'] = pd.to_datetime(df['business_date'])
+        df = df.rename(columns=COLUMNAS_OHLCV)
+        return {
+            symbol: grupo.set_index('business_date')[list(COLUMNAS_OHLCV.values())]
+            for symbol, grupo in df.groupby('symbol', sort=False)
+        }
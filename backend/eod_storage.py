@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Almacenamiento compacto de market_data_eod (esquema v2)
+
+- symbols: el universo del backend; su symbol_id (entero) es la clave de símbolo de los datos EOD.
+  Un símbolo con datos que no está en el universo se registra inactivo (ver crear_esquema_eod).
+- market_data_eod_v2: WITHOUT ROWID, clusterizada por (symbol_id, day) con day = días desde 1970-01-01
+  y timestamps de auditoría en epoch (enteros). Un rango symbol/fecha es un solo scan del B-tree.
+- market_data_eod: vista de compatibilidad con las columnas de siempre (symbol, business_date TEXT, ...)
+  y triggers INSTEAD OF: INSERT [OR REPLACE/IGNORE], UPDATE y DELETE existentes siguen funcionando.
+  Salvedad: SQLite no cuenta los cambios hechos dentro de triggers INSTEAD OF, así que toda escritura
+  por la vista devuelve cursor.rowcount == 0 (INSERT, UPDATE y DELETE). Quien necesite contar filas
+  escribe o cuenta contra market_data_eod_v2 (o cuenta sus propias filas, como guardar_barras_eod).
+
+Las lecturas por rango de fecha en caminos calientes deben ir contra market_data_eod_v2 (day entero):
+sobre la vista business_date es una expresión y no usa la clave.
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from datetime import date, datetime
+from typing import Dict, Optional
+
+EOD_TABLE = 'market_data_eod_v2'
+EPOCH = date(1970, 1, 1)
+
+def sql_dia(expr: str) -> str:
+    """Expresión SQL: fecha/timestamp TEXT -> day (entero)"""
+    return f"CAST(julianday({expr}) - 2440587.5 AS INTEGER)"
+
+def sql_fecha(expr: str) -> str:
+    """Expresión SQL: day (entero) -> 'YYYY-MM-DD'"""
+    return f"date({expr} * 86400, 'unixepoch')"
+
+def sql_epoch(expr: str) -> str:
+    """Expresión SQL: timestamp TEXT (o NULL = ahora) -> epoch entero"""
+    return f"CAST(strftime('%s', COALESCE({expr}, 'now')) AS INTEGER)"
+
+# WHERE por clave primaria de market_data_eod_v2 a partir de los parámetros (symbol, 'YYYY-MM-DD')
+WHERE_CLAVE_EOD = f"symbol_id = (SELECT symbol_id FROM symbols WHERE symbol = ?) AND day = {sql_dia('?')}"
+
+def sql_clasificacion(expr: str) -> str:
+    """
+    Expresiones SQL asset_class, exchange, currency de un símbolo inferidas del sufijo (el mismo
+    criterio de main.clasificar_symbol sin las listas de ETFs/ADRs): para las altas que hace la BD
+    sola (triggers de la vista, migraciones). Se reclasifica con PATCH /symbols/{symbol}.
+    """
+    return (f"CASE WHEN {expr} LIKE '%-USD' THEN 'crypto' ELSE 'equity' END, "
+            f"CASE WHEN {expr} LIKE '%-USD' THEN 'CRYPTO' WHEN {expr} LIKE '%.BA' THEN 'BCBA' ELSE 'NYSE' END, "
+            f"CASE WHEN {expr} LIKE '%.BA' THEN 'ARS' ELSE 'USD' END")
+
+def dia_eod(fecha) -> int:
+    """'YYYY-MM-DD' (o date/datetime) -> day"""
+    if isinstance(fecha, datetime):
+        fecha = fecha.date()
+    elif not isinstance(fecha, date):
+        fecha = datetime.strptime(str(fecha)[:10], '%Y-%m-%d').date()
+    return (fecha - EPOCH).days
+
+def fecha_eod(dia: int) -> str:
+    """day -> 'YYYY-MM-DD'"""
+    return date.fromordinal(EPOCH.toordinal() + int(dia)).isoformat()
+
+def layout_eod(cursor) -> Optional[str]:
+    """
+    'v2' si market_data_eod es la vista de compatibilidad, 'v2-eod_symbols' si además la tabla v2
+    todavía usa el diccionario eod_symbols (versión anterior del esquema), 'legacy' si es la tabla
+    original, None si no existe
+    """
+    cursor.execute("SELECT type FROM sqlite_master WHERE name = 'market_data_eod'")
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    if row[0] != 'view':
+        return 'legacy'
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'eod_symbols'")
+    return 'v2-eod_symbols' if cursor.fetchone() else 'v2'
+
+def crear_tabla_symbols(cursor):
+    """Tabla symbols (universo del backend): la crea init_db y también la migración fuera de línea"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS symbols (
+            symbol_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            symbol TEXT NOT NULL UNIQUE,
+            name TEXT,
+            asset_class TEXT NOT NULL,   -- 'equity', 'adr', 'etf', 'crypto', 'index'
+            exchange TEXT NOT NULL,      -- Calendario de MARKET_SCHEDULES: 'NYSE', 'BCBA', 'CRYPTO'
+            currency TEXT,
+            active INTEGER NOT NULL DEFAULT 1,
+            metadata TEXT,               -- JSON libre (sector, notas, ...)
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def registrar_symbols_eod(cursor, origen: str):
+    """Alta inactiva en symbols de los símbolos de `origen` (SELECT de una columna symbol) que no están"""
+    cursor.execute(f'''
+        INSERT INTO symbols (symbol, asset_class, exchange, currency, active)
+        SELECT symbol, {sql_clasificacion('symbol')}, 0
+        FROM (SELECT DISTINCT symbol FROM ({origen}))
+        WHERE symbol NOT IN (SELECT symbol FROM symbols)
+        ORDER BY symbol
+    ''')
+
+def crear_esquema_eod(cursor):
+    """
+    Tabla v2 (clave symbols.symbol_id + day), vista de compatibilidad y sus triggers INSTEAD OF
+    """
+    crear_tabla_symbols(cursor)
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {EOD_TABLE} (
+            symbol_id INTEGER NOT NULL REFERENCES symbols(symbol_id),
+            day INTEGER NOT NULL,                -- Días desde 1970-01-01
+
+            -- OHLCV Data
+            open_price REAL NOT NULL,
+            high_price REAL NOT NULL,
+            low_price REAL NOT NULL,
+            close_price REAL NOT NULL,
+            volume INTEGER DEFAULT 0,
+            adj_close REAL,
+
+            -- Quality Control
+            data_quality_score INTEGER DEFAULT 100,
+            anomaly_flags TEXT,
+            data_source TEXT DEFAULT 'yfinance',
+
+            -- Audit Trail (epoch)
+            created_at INTEGER,
+            updated_at INTEGER,
+
+            PRIMARY KEY (symbol_id, day)
+        ) WITHOUT ROWID
+    ''')
+    # Consultas de un día para todos los símbolos (y MAX(day)) sin recorrer la tabla
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_eod_v2_day ON {EOD_TABLE}(day)')
+
+    cursor.execute(f'''
+        CREATE VIEW IF NOT EXISTS market_data_eod AS
+        SELECT s.symbol AS symbol,
+               {sql_fecha('e.day')} AS business_date,
+               e.open_price, e.high_price, e.low_price, e.close_price, e.volume, e.adj_close,
+               e.data_quality_score, e.anomaly_flags, e.data_source,
+               datetime(e.created_at, 'unixepoch') AS created_at,
+               datetime(e.updated_at, 'unixepoch') AS updated_at
+        FROM {EOD_TABLE} e
+        JOIN symbols s ON s.symbol_id = e.symbol_id
+    ''')
+
+    # Un símbolo que no está en el universo se registra inactivo. El alta no puede usar
+    # OR IGNORE/REPLACE: dentro del trigger se hereda la política del statement externo
+    # (INSERT OR REPLACE borraría la fila de symbols y reasignaría el symbol_id)
+    registrar = f'''
+            INSERT INTO symbols (symbol, asset_class, exchange, currency, active)
+            SELECT NEW.symbol, {sql_clasificacion('NEW.symbol')}, 0
+            WHERE NOT EXISTS (SELECT 1 FROM symbols WHERE symbol = NEW.symbol);
+    '''
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_market_data_eod_insert INSTEAD OF INSERT ON market_data_eod
+        BEGIN
+            {registrar}
+            INSERT INTO {EOD_TABLE}
+            (symbol_id, day, open_price, high_price, low_price, close_price, volume, adj_close,
+             data_quality_score, anomaly_flags, data_source, created_at, updated_at)
+            VALUES (
+                (SELECT symbol_id FROM symbols WHERE symbol = NEW.symbol),
+                {sql_dia('NEW.business_date')},
+                NEW.open_price, NEW.high_price, NEW.low_price, NEW.close_price,
+                COALESCE(NEW.volume, 0), NEW.adj_close,
+                COALESCE(NEW.data_quality_score, 100), NEW.anomaly_flags,
+                COALESCE(NEW.data_source, 'yfinance'),
+                {sql_epoch('NEW.created_at')}, {sql_epoch('NEW.updated_at')}
+            );
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_market_data_eod_update INSTEAD OF UPDATE ON market_data_eod
+        BEGIN
+            {registrar}
+            UPDATE {EOD_TABLE} SET
+                symbol_id = (SELECT symbol_id FROM symbols WHERE symbol = NEW.symbol),
+                day = {sql_dia('NEW.business_date')},
+                open_price = NEW.open_price, high_price = NEW.high_price,
+                low_price = NEW.low_price, close_price = NEW.close_price,
+                volume = NEW.volume, adj_close = NEW.adj_close,
+                data_quality_score = NEW.data_quality_score, anomaly_flags = NEW.anomaly_flags,
+                data_source = NEW.data_source,
+                created_at = {sql_epoch('NEW.created_at')}, updated_at = {sql_epoch('NEW.updated_at')}
+            WHERE symbol_id = (SELECT symbol_id FROM symbols WHERE symbol = OLD.symbol)
+              AND day = {sql_dia('OLD.business_date')};
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_market_data_eod_delete INSTEAD OF DELETE ON market_data_eod
+        BEGIN
+            DELETE FROM {EOD_TABLE}
+            WHERE symbol_id = (SELECT symbol_id FROM symbols WHERE symbol = OLD.symbol)
+              AND day = {sql_dia('OLD.business_date')};
+        END
+    ''')
+
+def migrar_eod(cursor) -> Dict:
+    """
+    Migrar la tabla market_data_eod original al esquema v2 (dentro de la transacción del llamador).
+    Las filas que colapsan en el mismo (símbolo, día) conservan la actualizada más recientemente.
+    """
+    cursor.execute('SELECT COUNT(*) FROM market_data_eod')
+    filas_origen = cursor.fetchone()[0]
+
+    # Renombrar arrastra (y luego borra) índices y triggers de la tabla original
+    cursor.execute('ALTER TABLE market_data_eod RENAME TO market_data_eod_legacy')
+    crear_esquema_eod(cursor)
+
+    registrar_symbols_eod(cursor, 'SELECT symbol FROM market_data_eod_legacy')
+    cursor.execute(f'''
+        INSERT OR REPLACE INTO {EOD_TABLE}
+        (symbol_id, day, open_price, high_price, low_price, close_price, volume, adj_close,
+         data_quality_score, anomaly_flags, data_source, created_at, updated_at)
+        SELECT s.symbol_id, {sql_dia('l.business_date')},
+               l.open_price, l.high_price, l.low_price, l.close_price, COALESCE(l.volume, 0), l.adj_close,
+               COALESCE(l.data_quality_score, 100), l.anomaly_flags, COALESCE(l.data_source, 'yfinance'),
+               {sql_epoch('l.created_at')}, {sql_epoch('l.updated_at')}
+        FROM market_data_eod_legacy l
+        JOIN symbols s ON s.symbol = l.symbol
+        ORDER BY s.symbol_id, {sql_dia('l.business_date')}, l.updated_at
+    ''')
+
+    cursor.execute(f'SELECT COUNT(*) FROM {EOD_TABLE}')
+    filas_destino = cursor.fetchone()[0]
+    cursor.execute(f'SELECT COUNT(*) FROM (SELECT DISTINCT symbol, {sql_dia("business_date")} FROM market_data_eod_legacy)')
+    esperadas = cursor.fetchone()[0]
+    if filas_destino != esperadas:
+        raise RuntimeError(f"Migración inconsistente: {filas_destino} filas v2, {esperadas} esperadas")
+
+    cursor.execute('DROP TABLE market_data_eod_legacy')
+
+    return {'rows_source': filas_origen, 'rows_migrated': filas_destino, 'collapsed': filas_origen - filas_destino}
+
+def migrar_ids_eod(cursor) -> Dict:
+    """
+    Pasar una tabla v2 keyeada por eod_symbols.symbol_id a symbols.symbol_id (dentro de la
+    transacción del llamador) y borrar el diccionario eod_symbols
+    """
+    # La vista y sus triggers se recrean; el índice por día se libera para la tabla nueva
+    # (renombrar arrastra índices y triggers, que se borran con la tabla vieja)
+    cursor.execute('DROP VIEW market_data_eod')
+    cursor.execute('DROP INDEX IF EXISTS idx_eod_v2_day')
+    cursor.execute(f'ALTER TABLE {EOD_TABLE} RENAME TO market_data_eod_v2_old')
+    crear_esquema_eod(cursor)
+
+    registrar_symbols_eod(cursor, 'SELECT symbol FROM eod_symbols')
+    cursor.execute(f'''
+        INSERT INTO {EOD_TABLE}
+        SELECT s.symbol_id, o.day, o.open_price, o.high_price, o.low_price, o.close_price, o.volume,
+               o.adj_close, o.data_quality_score, o.anomaly_flags, o.data_source, o.created_at, o.updated_at
+        FROM market_data_eod_v2_old o
+        JOIN eod_symbols d ON d.symbol_id = o.symbol_id
+        JOIN symbols s ON s.symbol = d.symbol
+        ORDER BY s.symbol_id, o.day
+    ''')
+
+    cursor.execute(f'SELECT COUNT(*) FROM {EOD_TABLE}')
+    filas_destino = cursor.fetchone()[0]
+    cursor.execute('SELECT COUNT(*) FROM market_data_eod_v2_old')
+    filas_origen = cursor.fetchone()[0]
+    if filas_destino != filas_origen:
+        raise RuntimeError(f"Migración inconsistente: {filas_destino} filas v2, {filas_origen} esperadas")
+
+    cursor.execute('DROP TABLE market_data_eod_v2_old')
+    cursor.execute('DROP TABLE eod_symbols')
+
+    return {'rows_source': filas_origen, 'rows_migrated': filas_destino, 'collapsed': 0}
+
+def asegurar_esquema_eod(cursor) -> Optional[Dict]:
+    """
+    Esquema v2 listo: crearlo en una BD nueva o migrar en el lugar la tabla original (o una tabla
+    v2 que todavía usa eod_symbols). Devuelve el resultado de la migración si la hubo.
+    """
+    layout = layout_eod(cursor)
+    if layout == 'legacy':
+        print("🔄 Migrando market_data_eod al esquema compacto (WITHOUT ROWID)...")
+        resultado = migrar_eod(cursor)
+        print(f"✅ market_data_eod migrada: {resultado['rows_migrated']} filas")
+        return resultado
+    if layout == 'v2-eod_symbols':
+        print("🔄 Migrando market_data_eod_v2 a los symbol_id de la tabla symbols...")
+        resultado = migrar_ids_eod(cursor)
+        print(f"✅ market_data_eod_v2 migrada: {resultado['rows_migrated']} filas")
+        return resultado
+
+    crear_esquema_eod(cursor)
+    return None
+
+def tamano_bd(db_path: str) -> int:
+    """Bytes de la BD (incluye el WAL si existe)"""
+    return sum(os.path.getsize(p) for p in (db_path, db_path + '-wal') if os.path.exists(p))
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(
+        description='Migrar market_data_eod al esquema compacto WITHOUT ROWID (symbol_id, day)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Ejemplos de uso:
+  python backend/eod_storage.py --db backend/trading_dashboard.db
+  python backend/eod_storage.py --db backend/trading_dashboard.db --vacuum
+  python backend/eod_storage.py --db /tmp/copia.db --status
+
+El backend migra automáticamente al iniciar (init_db); esta herramienta permite hacerlo antes,
+fuera de línea, y compactar el archivo con VACUUM para recuperar el espacio.
+        """
+    )
+    parser.add_argument('--db', default='backend/trading_dashboard.db', help='Path de la base de datos')
+    parser.add_argument('--vacuum', action='store_true', help='Compactar el archivo después de migrar')
+    parser.add_argument('--status', action='store_true', help='Solo mostrar el esquema actual')
+
+    args = parser.parse_args()
+
+    try:
+        if not os.path.exists(args.db):
+            print(f"❌ No se encontró la base de datos: {args.db}")
+            sys.exit(1)
+
+        conn = sqlite3.connect(args.db, isolation_level=None, timeout=30)
+        cursor = conn.cursor()
+        layout = layout_eod(cursor)
+        tamano_inicial = tamano_bd(args.db)
+        print(f"📊 {args.db}: esquema {layout or 'inexistente'}, {tamano_inicial / 1024 / 1024:.2f} MB")
+
+        if args.status:
+            conn.close()
+            return
+
+        if layout in ('legacy', 'v2-eod_symbols'):
+            inicio = time.time()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                resultado = asegurar_esquema_eod(cursor)
+                cursor.execute('COMMIT')
+            except Exception:
+                cursor.execute('ROLLBACK')
+                raise
+            print(f"⏱️  {resultado['rows_migrated']} filas en {time.time() - inicio:.1f}s "
+                  f"({resultado['collapsed']} duplicadas por fecha)")
+        else:
+            print("✅ Nada que migrar")
+
+        if args.vacuum:
+            cursor.execute('VACUUM')
+            if cursor.execute('PRAGMA journal_mode').fetchone()[0] == 'wal':
+                cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            tamano_final = tamano_bd(args.db)
+            print(f"🗜️  {tamano_inicial / 1024 / 1024:.2f} MB -> {tamano_final / 1024 / 1024:.2f} MB "
+                  f"({(1 - tamano_final / tamano_inicial) * 100:.0f}% menos)")
+
+        conn.close()
+
+    except KeyboardInterrupt:
+        print("\nOperación cancelada")
+        sys.exit(0)
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,12 @@ Trading Dashboard API - Backend FastAPI
 Sistema profesional de trading con análisis VIX_Fix
 """
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Header, Depends
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse, FileResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable, Tuple
 from datetime import datetime, date
 from contextlib import asynccontextmanager
 import yfinance as yf
@@ -22,37 +23,50 @@ import threading
 import time
 import hashlib
 import json
+import socket
+import cProfile
+import pstats
+import io
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 
 # Agregar el directorio padre al PATH para importar nuestros módulos
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from trade_analyzer import TradeAnalyzer
-from vix_fix_strategy import VixFixStrategy
+from market_simulator import SyntheticMarket, generar_universo
+from analytics_engine import AnalyticsEngine
+from eod_storage import (
+    EOD_TABLE, WHERE_CLAVE_EOD, asegurar_esquema_eod, crear_tabla_symbols, dia_eod, sql_dia, sql_fecha
+)
+from vix_fix_strategy import VixFixStrategy, StageTimings, TIMEFRAMES_INTRADAY
+from screener import escanear
+from metrics import (
+    Counter, Gauge, Histogram, PrometheusMiddleware, connect_db,
+    registrar_collector, registrar_latido, render_metrics
+)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Eventos de inicio y cierre de la aplicación"""
     # Startup
+    event_hub['loop'] = asyncio.get_running_loop()
     init_db()
-    print("Trading Dashboard API iniciada")
-    print(f"Tickers principales: {len(MAIN_TICKERS)} configurados")
+    print(f"Tabla de precios en memoria: {cargar_price_table()} tickers")
+    print(f"Trading Dashboard API iniciada (proveedor de datos: {MARKET_DATA_PROVIDER})")
+    print(f"Universo de símbolos: {len(get_universe())} activos")
     
-    # Iniciar job de actualización de precios en background
-    price_thread = threading.Thread(target=actualizar_precios_background, daemon=True)
-    price_thread.start()
-    print("Job de actualización de precios iniciado (cada 5 minutos)")
-    
-    # Iniciar scheduler automático de EOD
-    start_scheduler()
-    if scheduler_running:
-        scheduler_thread = threading.Thread(target=run_pending_jobs, daemon=True)
-        scheduler_thread.start()
-        print(f"📅 Scheduler EOD iniciado automáticamente - Próxima ejecución: {eod_schedule_config['time']} {eod_schedule_config['timezone']}")
-    else:
-        print("⚠️  Scheduler EOD no se pudo iniciar")
+    # Servicios en background (precios + scheduler EOD) solo en el worker líder
+    leader_state['running'] = True
+    actualizar_liderazgo()
+    election_thread = threading.Thread(target=run_leader_election, name='leader-election', daemon=True)
+    election_thread.start()
+    print(f"👑 Elección de líder iniciada (worker {WORKER_ID}, líder: {leader_state['is_leader']})")
     
     yield
     # Shutdown
+    leader_state['running'] = False
+    release_leader_lease()
     print("Trading Dashboard API cerrándose...")
 
 app = FastAPI(
@@ -75,8 +89,9 @@ app.add_middleware(
 DEFAULT_PROFIT_TARGET = 0.04  # 4%
 DEFAULT_MAX_DAYS = 30
 
-# Tickers principales diversificados (mercado argentino y internacional)
-MAIN_TICKERS = [
+# Universo inicial (mercado argentino e internacional): semilla de la tabla symbols.
+# El universo vigente vive en la BD (CRUD en /symbols, filtros con get_universe).
+DEFAULT_TICKERS = [
     # Acciones Argentinas (Buenos Aires)
     "GGAL.BA", "PAMP.BA", "YPFD.BA", "ALUA.BA", "TECO2.BA",
     "MIRG.BA", "CEPU.BA", "BMA.BA", "SUPV.BA", "LOMA.BA",
@@ -97,6 +112,19 @@ MAIN_TICKERS = [
     "RUNE-USD", "SAND-USD", "SOL-USD"
 ]
 
+# Proveedor de datos de mercado: yfinance (default) o mercado sintético offline
+#   MARKET_DATA_PROVIDER=synthetic   SYNTHETIC_SEED=42   SYNTHETIC_UNIVERSE_SIZE=2000
+MARKET_DATA_PROVIDER = os.environ.get('MARKET_DATA_PROVIDER', 'yfinance').lower()
+synthetic_market = None
+
+if MARKET_DATA_PROVIDER == 'synthetic':
+    synthetic_market = SyntheticMarket(seed=int(os.environ.get('SYNTHETIC_SEED', '42')))
+    if os.environ.get('SYNTHETIC_UNIVERSE_SIZE'):
+        DEFAULT_TICKERS = generar_universo(int(os.environ['SYNTHETIC_UNIVERSE_SIZE']), DEFAULT_TICKERS)
+
+# Motor analítico para consultas pesadas de solo lectura (ANALYTICS_ENGINE=auto|duckdb|sqlite)
+analytics = AnalyticsEngine('trading_dashboard.db')
+
 # Models para requests/responses
 class TradeAnalysisRequest(BaseModel):
     ticker: str
@@ -126,13 +154,247 @@ class DashboardData(BaseModel):
     trades_exitosos: int
     profit_total: float
     dias_promedio: float
+    data_version: Optional[int] = None
+    price_version: Optional[int] = None
+    snapshot_built_at: Optional[str] = None
+
+class SymbolCreate(BaseModel):
+    symbol: str
+    name: Optional[str] = None
+    asset_class: Optional[str] = None   # Default: inferido del símbolo (clasificar_symbol)
+    exchange: Optional[str] = None      # Calendario de MARKET_SCHEDULES: NYSE, BCBA, CRYPTO
+    currency: Optional[str] = None
+    active: bool = True
+    metadata: Optional[Dict[str, Any]] = None
+
+class SymbolUpdate(BaseModel):
+    name: Optional[str] = None
+    asset_class: Optional[str] = None
+    exchange: Optional[str] = None
+    currency: Optional[str] = None
+    active: Optional[bool] = None
+    metadata: Optional[Dict[str, Any]] = None
+
+# =====================================================
+# MÉTRICAS (PROMETHEUS /metrics)
+# =====================================================
+
+PROVIDER_FETCH_SECONDS = Histogram(
+    'provider_fetch_duration_seconds', 'Latencia de descargas del proveedor de datos (yfinance)',
+    ('symbol_class', 'operation')
+)
+PROVIDER_FETCH_ERRORS = Counter(
+    'provider_fetch_errors_total', 'Errores del proveedor de datos',
+    ('symbol_class', 'operation')
+)
+ANALYSIS_CACHE_REQUESTS = Counter(
+    'analysis_cache_requests_total', 'Consultas a analisis_cache por resultado (hit/miss)',
+    ('result',)
+)
+PRICE_CYCLE_SECONDS = Histogram(
+    'price_update_cycle_duration_seconds', 'Duración de cada ciclo de actualización de precios'
+)
+PRICE_CYCLE_TICKERS = Counter(
+    'price_update_tickers_total', 'Tickers procesados por el actualizador de precios',
+    ('outcome',)
+)
+PRICE_UPDATE_LAG = Gauge(
+    'price_update_lag_seconds', 'Segundos desde el último ciclo de precios completado'
+)
+EOD_JOB_SECONDS = Histogram(
+    'eod_job_duration_seconds', 'Duración de los EOD jobs', ('job',),
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1200, 3600)
+)
+EOD_JOB_SYMBOLS_PER_SECOND = Gauge(
+    'eod_job_symbols_per_second', 'Símbolos por segundo del último EOD job', ('job',)
+)
+EOD_JOB_SYMBOLS = Counter(
+    'eod_job_symbols_total', 'Símbolos procesados por los EOD jobs', ('job', 'outcome')
+)
+
+WORKER_IS_LEADER = Gauge(
+    'worker_is_leader', 'Este worker corre los servicios en background (1) o no (0)', ('worker',)
+)
+
+metrics_state = {'last_price_cycle': None}
+
+app.add_middleware(PrometheusMiddleware)
+
+def descargar_historial(symbol: str, operation: str, **kwargs) -> pd.DataFrame:
+    """
+    stock.history del proveedor configurado (yfinance o sintético),
+    instrumentado: latencia y errores por clase de símbolo
+    """
+    symbol_class = get_symbol_exchange(symbol)
+    inicio = time.perf_counter()
+    try:
+        if synthetic_market is not None:
+            return synthetic_market.history(symbol, **kwargs)
+        return yf.Ticker(symbol).history(**kwargs)
+    except Exception:
+        PROVIDER_FETCH_ERRORS.inc(symbol_class=symbol_class, operation=operation)
+        raise
+    finally:
+        PROVIDER_FETCH_SECONDS.observe(time.perf_counter() - inicio,
+                                       symbol_class=symbol_class, operation=operation)
+
+@registrar_collector
+def actualizar_metricas_estado():
+    if metrics_state['last_price_cycle'] is not None:
+        PRICE_UPDATE_LAG.set(time.time() - metrics_state['last_price_cycle'])
+    WORKER_IS_LEADER.set(1 if leader_state['is_leader'] else 0, worker=WORKER_ID)
+
+# =====================================================
+# SINGLE-FLIGHT: DEDUPLICACIÓN DE REQUESTS EN CURSO
+# =====================================================
+
+# Cálculos en curso por clave normalizada de request
+_inflight_requests: Dict[str, asyncio.Future] = {}
+
+single_flight_stats = {
+    'computed': 0,   # Requests que dispararon un cálculo
+    'coalesced': 0   # Requests que esperaron un cálculo ya en curso
+}
+
+def normalizar_clave_request(endpoint: str, **params) -> str:
+    """
+    Generar clave estable para un request (mismos parámetros = misma clave)
+    """
+    normalizados = {}
+    for nombre, valor in params.items():
+        if isinstance(valor, str):
+            valor = valor.strip().upper()
+        elif isinstance(valor, float):
+            valor = round(valor, 6)
+        normalizados[nombre] = valor
+    return f"{endpoint}:{json.dumps(normalizados, sort_keys=True)}"
+
+async def single_flight(key: str, func: Callable, *args):
+    """
+    Ejecutar func(*args) en un thread una sola vez por clave.
+    Los requests idénticos que llegan mientras el cálculo está en curso
+    esperan el mismo future en lugar de recalcular.
+    """
+    future = _inflight_requests.get(key)
+    
+    if future is None:
+        single_flight_stats['computed'] += 1
+        future = asyncio.ensure_future(asyncio.to_thread(func, *args))
+        _inflight_requests[key] = future
+        future.add_done_callback(lambda _: _inflight_requests.pop(key, None))
+    else:
+        single_flight_stats['coalesced'] += 1
+    
+    # shield: si un cliente se desconecta no se cancela el cálculo de los demás
+    return await asyncio.shield(future)
+
+# =====================================================
+# PROFILING ON-DEMAND (?profile=true o header X-Profile: 1)
+# =====================================================
+
+profiling_config = {
+    'enabled': os.environ.get('ENABLE_PROFILING', '').lower() in ('1', 'true', 'yes'),
+    'directory': os.environ.get('PROFILES_DIR', 'profiles'),
+    'top_functions': 40  # Funciones en el reporte de texto
+}
+
+def perfil_solicitado(profile: bool, x_profile: Optional[str]) -> bool:
+    """
+    ¿El request pide profiling? Solo se permite si está habilitado en la configuración
+    """
+    if not profile and (x_profile or '').lower() not in ('1', 'true', 'yes'):
+        return False
+    if not profiling_config['enabled']:
+        raise HTTPException(status_code=403, detail="Profiling deshabilitado (arrancar con ENABLE_PROFILING=1)")
+    return True
+
+def ejecutar_con_perfil(endpoint: str, func: Callable, *args) -> Dict:
+    """
+    Ejecutar func(*args) + encoding JSON bajo cProfile (en el mismo thread).
+    Guarda <id>.pstats (snakeviz, flameprof, gprof2dot) y <id>.txt (top por tiempo acumulado)
+    y agrega el link al resultado.
+    """
+    profiler = cProfile.Profile()
+    inicio = time.perf_counter()
+    profiler.enable()
+    try:
+        result = jsonable_encoder(func(*args))
+        json.dumps(result)  # El encoding de la respuesta también cuenta
+    finally:
+        profiler.disable()
+    duracion = time.perf_counter() - inicio
+    
+    os.makedirs(profiling_config['directory'], exist_ok=True)
+    profile_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{endpoint}_{os.urandom(3).hex()}"
+    base_path = os.path.join(profiling_config['directory'], profile_id)
+    
+    profiler.dump_stats(f"{base_path}.pstats")
+    reporte = io.StringIO()
+    pstats.Stats(profiler, stream=reporte).sort_stats('cumulative').print_stats(profiling_config['top_functions'])
+    with open(f"{base_path}.txt", 'w', encoding='utf-8') as f:
+        f.write(reporte.getvalue())
+    
+    print(f"🔬 Perfil {profile_id} guardado ({duracion:.2f}s)")
+    
+    if isinstance(result, dict):
+        result['profile'] = {
+            'id': profile_id,
+            'duration_seconds': round(duracion, 3),
+            'pstats_url': f"/profiles/{profile_id}.pstats",
+            'report_url': f"/profiles/{profile_id}.txt"
+        }
+    return result
+
+async def ejecutar_request(key: str, endpoint: str, profile: bool, func: Callable, *args):
+    """
+    single_flight normal, o ejecución aislada con profiler si se pidió
+    (un request perfilado no se coalesce con otros)
+    """
+    if profile:
+        return await asyncio.to_thread(ejecutar_con_perfil, endpoint, func, *args)
+    return await single_flight(key, func, *args)
+
+# =====================================================
+# PUSH DE EVENTOS (SERVER-SENT EVENTS)
+# =====================================================
+
+# Colas de los clientes conectados a /events (una por conexión)
+event_hub = {
+    'loop': None,          # Event loop de la API (se asigna en el startup)
+    'subscribers': set()
+}
+EVENT_QUEUE_SIZE = 100
+EVENT_KEEPALIVE_SECONDS = 15
+
+def _distribuir_evento(mensaje: str):
+    """Encolar un evento en cada suscriptor (corre en el event loop)"""
+    for queue in list(event_hub['subscribers']):
+        try:
+            queue.put_nowait(mensaje)
+        except asyncio.QueueFull:
+            # Cliente lento: se descarta el evento, el próximo 'eod' lo resincroniza
+            pass
+
+def publicar_evento(tipo: str, data: Dict):
+    """
+    Publicar un evento a todos los clientes SSE (seguro desde cualquier thread)
+    """
+    loop = event_hub['loop']
+    if loop is None or not event_hub['subscribers']:
+        return
+    
+    mensaje = f"event: {tipo}\ndata: {json.dumps(data, default=str)}\n\n"
+    loop.call_soon_threadsafe(_distribuir_evento, mensaje)
 
 # Inicializar base de datos
 def init_db():
     """Inicializar base de datos SQLite"""
-    conn = sqlite3.connect('trading_dashboard.db')
+    conn = connect_db('trading_dashboard.db')
     cursor = conn.cursor()
     
+    # WAL: las lecturas de la BD principal no esperan a los commits de los jobs (persistente)
+    cursor.execute('PRAGMA journal_mode=WAL')
+    
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS trades (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -171,6 +433,11 @@ def init_db():
         )
     ''')
     
+    # Migración: timestamp de la última barra 1m procesada (refresco incremental)
+    cursor.execute('PRAGMA table_info(precios_cache)')
+    if 'ultimo_bar' not in [col[1] for col in cursor.fetchall()]:
+        cursor.execute('ALTER TABLE precios_cache ADD COLUMN ultimo_bar TEXT')
+    
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS analisis_cache (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -185,36 +452,53 @@ def init_db():
     ''')
     
     # =====================================================
-    # NUEVA TABLA: EOD Data (End of Day) - OPTIMIZADA
+    # TABLA: Symbols (universo de símbolos seguidos; su symbol_id es la clave de los datos EOD)
+    # =====================================================
+    crear_tabla_symbols(cursor)
+    
+    # Universo inicial solo si nunca se definió uno: sin símbolos activos y sin altas/bajas por la
+    # API (versión 'symbols'). No resucita símbolos borrados; los que la migración EOD registró
+    # inactivos (datos sin universo) se activan si son del universo inicial
+    cursor.execute('SELECT COUNT(*) FROM symbols WHERE active = 1')
+    sin_activos = cursor.fetchone()[0] == 0
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'data_versions'")
+    if cursor.fetchone():
+        cursor.execute("SELECT 1 FROM data_versions WHERE name = 'symbols'")
+        universo_definido = cursor.fetchone() is not None
+    else:
+        universo_definido = False
+    if sin_activos and not universo_definido:
+        cursor.executemany('''
+            INSERT INTO symbols (symbol, asset_class, exchange, currency)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(symbol) DO UPDATE SET active = 1
+        ''', [
+            (symbol, *[clasificar_symbol(symbol)[k] for k in ('asset_class', 'exchange', 'currency')])
+            for symbol in DEFAULT_TICKERS
+        ])
+    
+    # =====================================================
+    # NUEVA TABLA: EOD Data (End of Day) - esquema compacto
+    # =====================================================
+    # market_data_eod_v2 (WITHOUT ROWID, clave symbols.symbol_id + day) y la vista market_data_eod
+    # con las columnas de siempre; una BD con la tabla original se migra en el lugar
+    asegurar_esquema_eod(cursor)
+    
+    # =====================================================
+    # TABLA: Intraday Data (barras 1m del actualizador de precios + rollups)
     # =====================================================
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS market_data_eod (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            
-            -- Identificación
+        CREATE TABLE IF NOT EXISTS market_data_intraday (
             symbol TEXT NOT NULL,
-            business_date DATE NOT NULL,
-            
-            -- OHLCV Data
-            open_price DECIMAL(12,4) NOT NULL,
-            high_price DECIMAL(12,4) NOT NULL,
-            low_price DECIMAL(12,4) NOT NULL,
-            close_price DECIMAL(12,4) NOT NULL,
-            volume BIGINT DEFAULT 0,
-            adj_close DECIMAL(12,4),  -- Para splits/dividendos
-            
-            -- Quality Control
-            data_quality_score INTEGER DEFAULT 100,  -- 0-100
-            anomaly_flags TEXT,  -- JSON string con flags
-            data_source TEXT DEFAULT 'yfinance',
-            
-            -- Audit Trail
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            
-            -- Constraints
-            UNIQUE(symbol, business_date)
-        )
+            timeframe TEXT NOT NULL,     -- '1m' (descargado), '5m', '15m', '1h' (rollups)
+            bar_time TEXT NOT NULL,      -- Inicio de la barra, UTC 'YYYY-MM-DD HH:MM:SS'
+            open_price REAL NOT NULL,
+            high_price REAL NOT NULL,
+            low_price REAL NOT NULL,
+            close_price REAL NOT NULL,
+            volume INTEGER DEFAULT 0,
+            PRIMARY KEY (symbol, timeframe, bar_time)
+        ) WITHOUT ROWID
     ''')
     
     # =====================================================
@@ -260,63 +544,968 @@ def init_db():
         )
     ''')
     
+    # =====================================================
+    # TABLA: Integrity Pending (filas EOD a re-chequear; la llenan triggers)
+    # =====================================================
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS integrity_pending (
+            symbol TEXT NOT NULL,
+            business_date DATE NOT NULL,
+            queued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (symbol, business_date)
+        ) WITHOUT ROWID
+    ''')
+    
+    # =====================================================
+    # TABLA: Symbol Coverage (resumen por símbolo de market_data_eod)
+    # =====================================================
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS symbol_coverage (
+            symbol TEXT PRIMARY KEY,
+            record_count INTEGER NOT NULL DEFAULT 0,
+            first_date DATE,
+            last_date DATE,
+            last_quality_score INTEGER,    -- Score de la fila de last_date
+            min_quality_score INTEGER,
+            avg_quality_score REAL,
+            low_quality_count INTEGER NOT NULL DEFAULT 0,
+            last_update TIMESTAMP,         -- MAX(updated_at) de sus filas EOD
+            stale INTEGER NOT NULL DEFAULT 1  -- 1 = cambió market_data_eod, recalcular
+        )
+    ''')
+    
+    # =====================================================
+    # TABLA: EOD No Data Days (días de mercado sin barra confirmados por el proveedor:
+    # feriados y suspensiones; smart_populate no los vuelve a planificar)
+    # =====================================================
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS eod_no_data_days (
+            symbol TEXT NOT NULL,
+            day INTEGER NOT NULL,          -- Días desde 1970-01-01 (misma clave que market_data_eod_v2)
+            checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (symbol, day)
+        ) WITHOUT ROWID
+    ''')
+    
+    # =====================================================
+    # TABLA: Data Versions (cambia cuando cambian datos EOD o precios)
+    # =====================================================
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,     -- 'eod', 'prices'
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # =====================================================
+    # TABLA: Service Leases (worker líder de servicios en background)
+    # =====================================================
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS service_leases (
+            name TEXT PRIMARY KEY,     -- 'background_services'
+            holder TEXT NOT NULL,      -- hostname:pid del worker
+            acquired_at TIMESTAMP,
+            heartbeat_at TIMESTAMP,
+            expires_at REAL NOT NULL   -- epoch (segundos)
+        )
+    ''')
+    
     # Índices para performance
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_eod_symbol_date ON market_data_eod(symbol, business_date)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_eod_date ON market_data_eod(business_date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_symbols_active_class ON symbols(active, asset_class)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_symbols_active_exchange ON symbols(active, exchange)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_job_status_date ON job_status(business_date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_intraday_retention ON market_data_intraday(timeframe, bar_time)')
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_integrity_log_key
+        ON data_integrity_log(symbol, check_type, business_date)
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_integrity_log_check ON data_integrity_log(check_type, status)')
+    
+    crear_triggers_integridad(cursor)
+    crear_triggers_cobertura(cursor)
     
     conn.commit()
     conn.close()
 
-# Job de actualización de precios en background
-def actualizar_precios_background():
-    """Job que actualiza precios con intervalo configurable"""
-    price_update_config['running'] = True
+def crear_triggers_integridad(cursor):
+    """
+    Triggers que encolan en integrity_pending cada fila EOD insertada, modificada o borrada
+    (cualquier escritor: EOD job, carga inicial, scripts). Al crearlos por primera vez se encola
+    toda la historia existente para que el primer chequeo la cubra.
+    """
+    cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_eod_integrity_%'")
+    primera_vez = cursor.fetchone()[0] == 0
+    
+    # ON CONFLICT DO NOTHING y no INSERT OR IGNORE: un UPSERT externo sobre la tabla EOD
+    # impone su política de conflicto a los triggers y el OR IGNORE dejaría de aplicar
+    def encolar(fila: str) -> str:
+        return (f"INSERT INTO integrity_pending (symbol, business_date) VALUES ("
+                f"(SELECT symbol FROM symbols WHERE symbol_id = {fila}.symbol_id), {sql_fecha(fila + '.day')}) "
+                f"ON CONFLICT DO NOTHING;")
+    
+    # Se recrean siempre para que las bases existentes tomen el cuerpo actual
+    for accion in ('insert', 'update', 'delete'):
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_eod_integrity_{accion}")
+    
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_eod_integrity_insert AFTER INSERT ON {EOD_TABLE}
+        BEGIN
+            {encolar('NEW')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_eod_integrity_update
+        AFTER UPDATE OF symbol_id, day, data_quality_score ON {EOD_TABLE}
+        BEGIN
+            {encolar('OLD')}
+            {encolar('NEW')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_eod_integrity_delete AFTER DELETE ON {EOD_TABLE}
+        BEGIN
+            {encolar('OLD')}
+        END
+    ''')
+    
+    if primera_vez:
+        cursor.execute('''
+            INSERT OR IGNORE INTO integrity_pending (symbol, business_date)
+            SELECT symbol, business_date FROM market_data_eod
+        ''')
+
+def crear_triggers_cobertura(cursor):
+    """
+    Triggers que marcan como stale la cobertura del símbolo en cada escritura de market_data_eod.
+    El recálculo es por símbolo y en lote (refrescar_cobertura): un contador incremental no
+    sobrevive a INSERT OR REPLACE, que borra la fila previa sin disparar triggers de DELETE.
+    """
+    cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_eod_coverage_%'")
+    primera_vez = cursor.fetchone()[0] == 0
+    
+    for evento, fila in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_eod_coverage_{evento.lower()} AFTER {evento} ON {EOD_TABLE}
+            BEGIN
+                INSERT INTO symbol_coverage (symbol)
+                VALUES ((SELECT symbol FROM symbols WHERE symbol_id = {fila}.symbol_id))
+                ON CONFLICT(symbol) DO UPDATE SET stale = 1 WHERE stale = 0;
+            END
+        ''')
+    
+    if primera_vez:
+        cursor.execute('''
+            INSERT OR IGNORE INTO symbol_coverage (symbol)
+            SELECT DISTINCT symbol FROM market_data_eod
+        ''')
+
+def bump_data_version(name: str) -> int:
+    """
+    Incrementar la versión de un conjunto de datos ('eod', 'prices')
+    """
+    conn = connect_db('trading_dashboard.db')
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+        INSERT INTO data_versions (name, version, updated_at) VALUES (?, 1, ?)
+        ON CONFLICT(name) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at
+    ''', (name, datetime.now()))
+    cursor.execute('SELECT version FROM data_versions WHERE name = ?', (name,))
+    version = cursor.fetchone()[0]
     
-    while price_update_config['enabled'] and price_update_config['running']:
+    conn.commit()
+    conn.close()
+    return version
+
+def fijar_data_version(conn: sqlite3.Connection, name: str, version: int):
+    """Fijar la versión de un conjunto de datos (nunca hacia atrás); el commit queda del llamador"""
+    conn.execute('''
+        INSERT INTO data_versions (name, version, updated_at) VALUES (?, ?, ?)
+        ON CONFLICT(name) DO UPDATE SET
+            version = MAX(version, excluded.version), updated_at = excluded.updated_at
+    ''', (name, version, datetime.now()))
+
+def cerrar_ingest_eod() -> int:
+    """
+    Cierre común de un ingest EOD (EOD job, carga inicial, reparación, scripts de carga):
+    snapshot de lectura (con integridad y cobertura al día) y recién entonces la versión
+    'eod' nueva. Devuelve esa versión.
+    """
+    return publicar_snapshot_lectura(nueva_version_eod=True)['eod_version']
+
+def get_data_versions() -> Dict[str, int]:
+    """
+    Versiones actuales de los datos (0 si nunca cambiaron)
+    """
+    conn = connect_db('trading_dashboard.db')
+    cursor = conn.cursor()
+    cursor.execute('SELECT name, version FROM data_versions')
+    versions = dict(cursor.fetchall())
+    conn.close()
+    return versions
+
+# =====================================================
+# SNAPSHOT DE LECTURA (COPIA INMUTABLE DEL ÚLTIMO INGEST)
+# =====================================================
+# Las lecturas EOD de la API (análisis, dashboard, histórico, cobertura, integridad) van contra una
+# copia de la BD publicada al terminar cada ingest. La copia nunca se modifica: se reemplaza entera
+# (os.replace, atómico) y se abre con immutable=1, así que no espera locks de una carga larga y
+# siempre ve un ingest completo. Los lectores que ya la tenían abierta siguen con la anterior.
+# READ_SNAPSHOT=0 lee todo de la BD principal.
+
+READ_SNAPSHOT_ENABLED = os.environ.get('READ_SNAPSHOT', '1') != '0'
+READ_SNAPSHOT_PATH = os.environ.get('READ_SNAPSHOT_PATH', 'trading_dashboard.snapshot.db')
+
+_lectura_lock = threading.Lock()
+_lectura_snapshot_id = None          # (inode, mtime) del snapshot al que apunta este worker
+_publicacion_lectura_lock = threading.Lock()
+
+def publicar_snapshot_lectura(nueva_version_eod: bool = False) -> Dict:
+    """
+    Copiar la BD principal (VACUUM INTO: consistente aunque haya escrituras en curso) y
+    publicarla como snapshot de lectura.
+    nueva_version_eod (fin de un ingest): la versión 'eod' nueva se escribe primero en la copia
+    y recién después del os.replace en la BD principal. Quien ve la versión nueva (dashboard,
+    followers, eventos SSE) ya puede leer sus datos en el snapshot.
+    Antes de copiar se corren integridad y cobertura sobre la BD principal: el snapshot no se
+    escribe, así que lo que quede pendiente ahí no se refresca nunca.
+    """
+    integridad = run_integrity_check()
+    if integridad['status'] == 'FAILED':
+        print(f"⚠️ Integridad no actualizada antes de publicar: {integridad['error']}")
+    refrescar_cobertura()
+    
+    if not READ_SNAPSHOT_ENABLED:
+        if nueva_version_eod:
+            return {'status': 'DISABLED', 'eod_version': bump_data_version('eod')}
+        return {'status': 'DISABLED'}
+    
+    inicio = time.time()
+    tmp = f"{READ_SNAPSHOT_PATH}.{os.getpid()}.tmp"
+    
+    with _publicacion_lectura_lock:
         try:
-            print(f"Actualizando precios... (intervalo: {price_update_config['interval_minutes']} min)")
-            conn = sqlite3.connect('trading_dashboard.db')
-            cursor = conn.cursor()
+            if os.path.exists(tmp):
+                os.remove(tmp)
             
-            updated_count = 0
-            for ticker in MAIN_TICKERS:
-                try:
-                    stock = yf.Ticker(ticker)
-                    info = stock.history(period="1d", interval="1m")
-                    
-                    if not info.empty:
-                        current_price = info['Close'].iloc[-1]
-                        previous_close = info['Close'].iloc[0] if len(info) > 1 else current_price
-                        change_pct = ((current_price - previous_close) / previous_close) * 100
-                        volume = info['Volume'].iloc[-1] if 'Volume' in info.columns else 0
-                        
-                        cursor.execute('''
-                            INSERT OR REPLACE INTO precios_cache 
-                            (ticker, precio_actual, precio_anterior, cambio_pct, volumen, timestamp)
-                            VALUES (?, ?, ?, ?, ?, ?)
-                        ''', (ticker, current_price, previous_close, change_pct, volume, datetime.now()))
-                        
-                        updated_count += 1
-                        
-                except Exception as e:
-                    print(f"{ticker}: {e}")
-                    continue
+            conn = connect_db('trading_dashboard.db')
+            conn.execute('VACUUM INTO ?', (tmp,))
+            conn.close()
             
+            # Sin WAL: un archivo inmutable no tiene -wal/-shm que consultar
+            conn = sqlite3.connect(tmp)
+            conn.execute('PRAGMA journal_mode=DELETE')
+            version = conn.execute("SELECT version FROM data_versions WHERE name = 'eod'").fetchone()
+            eod_version = version[0] if version else 0
+            if nueva_version_eod:
+                eod_version += 1
+                fijar_data_version(conn, 'eod', eod_version)
             conn.commit()
             conn.close()
-            print(f"✅ Precios actualizados: {updated_count}/{len(MAIN_TICKERS)} tickers")
+            
+            os.replace(tmp, READ_SNAPSHOT_PATH)
+        except Exception as e:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            print(f"❌ Error publicando snapshot de lectura: {e}")
+            resultado = {'status': 'FAILED', 'error': str(e)}
+            if nueva_version_eod:
+                # Sin snapshot nuevo la versión igual cambia: queda stale y se re-publica al arrancar
+                resultado['eod_version'] = bump_data_version('eod')
+            return resultado
+        
+        if nueva_version_eod:
+            conn = connect_db('trading_dashboard.db')
+            fijar_data_version(conn, 'eod', eod_version)
+            conn.commit()
+            conn.close()
+    
+    ruta_lectura_eod()
+    duracion = time.time() - inicio
+    print(f"📦 Snapshot de lectura publicado (eod v{eod_version}) en {duracion:.2f}s")
+    
+    return {
+        'status': 'SUCCESS',
+        'eod_version': eod_version,
+        'size_bytes': os.path.getsize(READ_SNAPSHOT_PATH),
+        'duration_seconds': duracion
+    }
+
+def ruta_lectura_eod() -> Optional[str]:
+    """
+    Path del snapshot de lectura vigente (None: no hay, leer la BD principal). Si cambió desde
+    la última consulta (publicado por este u otro worker) re-apunta el motor analítico.
+    """
+    global _lectura_snapshot_id
+    
+    if not READ_SNAPSHOT_ENABLED:
+        return None
+    try:
+        stat = os.stat(READ_SNAPSHOT_PATH)
+    except FileNotFoundError:
+        return None
+    
+    ident = (stat.st_ino, stat.st_mtime_ns)
+    if ident != _lectura_snapshot_id:
+        with _lectura_lock:
+            if ident != _lectura_snapshot_id:
+                analytics.usar_origen(READ_SNAPSHOT_PATH)
+                _lectura_snapshot_id = ident
+    return READ_SNAPSHOT_PATH
+
+def uri_lectura_eod() -> str:
+    """BD para lecturas EOD (abrir con uri=True): el snapshot inmutable o la BD principal"""
+    ruta = ruta_lectura_eod()
+    if ruta is None:
+        return 'trading_dashboard.db'
+    return f"file:{urllib.parse.quote(os.path.abspath(ruta))}?immutable=1"
+
+def connect_lectura() -> sqlite3.Connection:
+    """Conexión de solo lectura al snapshot (o a la BD principal si todavía no hay snapshot)"""
+    return connect_db(uri_lectura_eod(), site=sys._getframe(1).f_code.co_name, uri=True)
+
+def estado_snapshot_lectura() -> Dict:
+    """Versión EOD del snapshot frente a la de la BD principal"""
+    ruta = ruta_lectura_eod()
+    principal = get_data_versions().get('eod', 0)
+    estado = {
+        'enabled': READ_SNAPSHOT_ENABLED,
+        'path': READ_SNAPSHOT_PATH,
+        'exists': ruta is not None,
+        'eod_version': None,
+        'main_eod_version': principal,
+        'stale': True
+    }
+    if ruta is None:
+        return estado
+    
+    conn = connect_lectura()
+    version = conn.execute("SELECT version FROM data_versions WHERE name = 'eod'").fetchone()
+    conn.close()
+    estado.update({
+        'eod_version': version[0] if version else 0,
+        'stale': (version[0] if version else 0) != principal,
+        'size_bytes': os.path.getsize(ruta),
+        'published_at': datetime.fromtimestamp(os.path.getmtime(ruta)).isoformat()
+    })
+    return estado
+
+# =====================================================
+# UNIVERSO DE SÍMBOLOS (TABLA symbols)
+# =====================================================
+
+ASSET_CLASSES = ('equity', 'adr', 'etf', 'crypto', 'index')
+ETF_TICKERS = {'SPY', 'QQQ', 'IWM', 'EEM', 'GLD', 'SLV'}
+ADR_ARGENTINOS = {'GGAL', 'PAM', 'YPF', 'BMA', 'SUPV', 'TEO', 'CRESY', 'IRS', 'TGS'}
+
+def clasificar_symbol(symbol: str) -> Dict[str, str]:
+    """
+    Asset class, exchange y moneda inferidos del símbolo (defaults al registrarlo)
+    """
+    if symbol.endswith('-USD'):
+        return {'asset_class': 'crypto', 'exchange': 'CRYPTO', 'currency': 'USD'}
+    if symbol.endswith('.BA'):
+        return {'asset_class': 'equity', 'exchange': 'BCBA', 'currency': 'ARS'}
+    
+    if symbol.startswith('^') or symbol == 'VIX':
+        asset_class = 'index'
+    elif symbol in ETF_TICKERS:
+        asset_class = 'etf'
+    elif symbol in ADR_ARGENTINOS:
+        asset_class = 'adr'
+    else:
+        asset_class = 'equity'
+    return {'asset_class': asset_class, 'exchange': 'NYSE', 'currency': 'USD'}
+
+def _valores_filtro(valor) -> List[str]:
+    """'crypto,etf' o ['crypto', 'etf'] -> ['crypto', 'etf'] (vacío = sin filtro)"""
+    if not valor:
+        return []
+    if isinstance(valor, str):
+        valor = valor.split(',')
+    return [v.strip() for v in valor if v and v.strip()]
+
+def _where_symbols(asset_class=None, exchange=None, suffix=None, search: Optional[str] = None,
+                   active: Optional[bool] = True) -> Tuple[str, List]:
+    """
+    Cláusula WHERE para los filtros de universo (todo en SQL: nunca se recorre la tabla en Python)
+    """
+    condiciones, params = [], []
+    
+    if active is not None:
+        condiciones.append('active = ?')
+        params.append(1 if active else 0)
+    
+    # Mismo case que guardan ASSET_CLASSES / clasificar_symbol (asset_class) y MARKET_SCHEDULES (exchange)
+    for columna, valores in (('asset_class', [a.lower() for a in _valores_filtro(asset_class)]),
+                             ('exchange', [e.upper() for e in _valores_filtro(exchange)])):
+        if valores:
+            condiciones.append(f"{columna} IN ({','.join('?' * len(valores))})")
+            params.extend(valores)
+    
+    sufijos = [x.upper() for x in _valores_filtro(suffix)]
+    if sufijos:
+        condiciones.append('(' + ' OR '.join('substr(symbol, -?) = ?' for _ in sufijos) + ')')
+        for sufijo in sufijos:
+            params.extend([len(sufijo), sufijo])
+    
+    if search:
+        condiciones.append('(symbol LIKE ? OR name LIKE ?)')
+        params.extend([f'%{search}%', f'%{search}%'])
+    
+    return ('WHERE ' + ' AND '.join(condiciones)) if condiciones else '', params
+
+def _fila_symbol(row: tuple) -> Dict:
+    return {
+        'symbol_id': row[0],
+        'symbol': row[1],
+        'name': row[2],
+        'asset_class': row[3],
+        'exchange': row[4],
+        'currency': row[5],
+        'active': bool(row[6]),
+        'metadata': json.loads(row[7]) if row[7] else {},
+        'created_at': row[8],
+        'updated_at': row[9]
+    }
+
+def select_symbols(limit: Optional[int] = None, offset: int = 0, **filtros) -> Tuple[List[Dict], int]:
+    """
+    Filas de symbols que cumplen los filtros (orden de alta) y el total sin paginar
+    """
+    where, params = _where_symbols(**filtros)
+    conn = connect_db('trading_dashboard.db')
+    cursor = conn.cursor()
+    
+    cursor.execute(f'SELECT COUNT(*) FROM symbols {where}', params)
+    total = cursor.fetchone()[0]
+    
+    cursor.execute(f'''
+        SELECT symbol_id, symbol, name, asset_class, exchange, currency, active, metadata, created_at, updated_at
+        FROM symbols {where}
+        ORDER BY symbol_id
+        LIMIT ? OFFSET ?
+    ''', params + [limit if limit is not None else -1, offset])
+    rows = [_fila_symbol(row) for row in cursor.fetchall()]
+    
+    conn.close()
+    return rows, total
+
+def get_symbol(symbol: str) -> Optional[Dict]:
+    """Registro de un símbolo (activo o no)"""
+    conn = connect_db('trading_dashboard.db')
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT symbol_id, symbol, name, asset_class, exchange, currency, active, metadata, created_at, updated_at
+        FROM symbols WHERE symbol = ?
+    ''', (symbol,))
+    row = cursor.fetchone()
+    conn.close()
+    return _fila_symbol(row) if row else None
+
+def get_universe(**filtros) -> List[str]:
+    """
+    Símbolos activos que cumplen los filtros (asset_class, exchange, suffix, search).
+    Sin filtros: todo el universo activo. Es la fuente de símbolos de jobs y agregaciones.
+    """
+    return [symbol for symbol, _ in get_universe_exchanges(**filtros)]
+
+def get_universe_exchanges(**filtros) -> List[Tuple[str, str]]:
+    """(symbol, exchange) de los símbolos activos que cumplen los filtros"""
+    where, params = _where_symbols(**filtros)
+    conn = connect_db('trading_dashboard.db')
+    cursor = conn.cursor()
+    cursor.execute(f'SELECT symbol, exchange FROM symbols {where} ORDER BY symbol_id', params)
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
+
+def registrar_symbols(symbols: List[str], active: bool = True) -> int:
+    """
+    Alta en bloque de símbolos con clasificación inferida (los existentes no se tocan)
+    """
+    conn = connect_db('trading_dashboard.db')
+    cursor = conn.cursor()
+    cursor.executemany('''
+        INSERT OR IGNORE INTO symbols (symbol, asset_class, exchange, currency, active)
+        VALUES (?, ?, ?, ?, ?)
+    ''', [
+        (symbol, *[clasificar_symbol(symbol)[k] for k in ('asset_class', 'exchange', 'currency')], int(active))
+        for symbol in symbols
+    ])
+    agregados = cursor.rowcount
+    conn.commit()
+    conn.close()
+    
+    if agregados:
+        universo_modificado()
+    return agregados
+
+def universo_modificado():
+    """
+    El universo cambió: nueva versión 'symbols' (invalida snapshots del dashboard)
+    y re-planificar los grupos EOD del scheduler
+    """
+    bump_data_version('symbols')
+    _scheduler_wakeup.set()
+
+def filtro_universo(
+    asset_class: Optional[str] = Query(None, description="Clases separadas por coma (equity, adr, etf, crypto, index)"),
+    exchange: Optional[str] = Query(None, description="Exchanges separados por coma (NYSE, BCBA, CRYPTO)"),
+    suffix: Optional[str] = Query(None, description="Sufijos separados por coma (ej: .BA, -USD)")
+) -> Dict[str, Optional[str]]:
+    """Filtros de universo comunes a los endpoints que recorren símbolos"""
+    return {'asset_class': asset_class, 'exchange': exchange, 'suffix': suffix}
+
+def validar_campos_symbol(campos: Dict):
+    """Asset class y exchange válidos (el exchange define el calendario de EOD y precios)"""
+    if campos.get('asset_class') is not None and campos['asset_class'] not in ASSET_CLASSES:
+        raise HTTPException(status_code=400, detail=f"asset_class inválida: {campos['asset_class']} (válidas: {', '.join(ASSET_CLASSES)})")
+    if campos.get('exchange') is not None and campos['exchange'] not in MARKET_SCHEDULES:
+        raise HTTPException(status_code=400, detail=f"exchange inválido: {campos['exchange']} (válidos: {', '.join(MARKET_SCHEDULES)})")
+
+# =====================================================
+# TABLA DE PRECIOS EN MEMORIA (espejo de precios_cache)
+# =====================================================
+
+price_table: Dict[str, Dict] = {}
+_price_table_lock = threading.Lock()
+price_table_state = {'loaded': False, 'version': 0}
+
+def cargar_price_table():
+    """
+    Cargar (o recargar) la tabla de precios en memoria desde precios_cache
+    """
+    conn = connect_db('trading_dashboard.db')
+    cursor = conn.cursor()
+    cursor.execute("SELECT version FROM data_versions WHERE name = 'prices'")
+    version = cursor.fetchone()
+    cursor.execute('''
+        SELECT ticker, precio_actual, precio_anterior, cambio_pct, volumen, timestamp, ultimo_bar
+        FROM precios_cache
+    ''')
+    rows = cursor.fetchall()
+    conn.close()
+    
+    with _price_table_lock:
+        price_table.clear()
+        for row in rows:
+            price_table[row[0]] = {
+                'ticker': row[0],
+                'precio_actual': row[1],
+                'precio_anterior': row[2],
+                'cambio_pct': row[3],
+                'volumen': row[4],
+                'timestamp': row[5],
+                'ultimo_bar': row[6]
+            }
+        price_table_state['loaded'] = True
+        price_table_state['version'] = version[0] if version else 0
+    
+    return len(rows)
+
+def actualizar_price_table(rows: List[tuple]) -> List[Dict]:
+    """
+    Aplicar a la tabla en memoria las filas recién escritas en precios_cache
+    (ticker, precio_actual, precio_anterior, cambio_pct, volumen, timestamp, ultimo_bar).
+    Devuelve los precios que cambiaron respecto de la tabla anterior.
+    """
+    cambios = []
+    with _price_table_lock:
+        for ticker, current_price, previous_close, change_pct, volume, timestamp, ultimo_bar in rows:
+            anterior = price_table.get(ticker)
+            if anterior is None or anterior['precio_actual'] != float(current_price):
+                cambios.append(ticker)
+            
+            price_table[ticker] = {
+                'ticker': ticker,
+                'precio_actual': float(current_price),
+                'precio_anterior': float(previous_close),
+                'cambio_pct': float(change_pct),
+                'volumen': float(volume) if volume is not None else None,
+                'timestamp': str(timestamp),
+                'ultimo_bar': ultimo_bar
+            }
+        
+        return [formatear_precio(price_table[ticker]) for ticker in cambios]
+
+def publicar_cambios_precios(cambios: List[Dict]):
+    """
+    Nueva versión de precios: publicar deltas y re-valuar snapshots del dashboard
+    """
+    version = bump_data_version('prices')
+    price_table_state['version'] = version
+    if cambios:
+        publicar_evento('prices', {'price_version': version, 'prices': cambios})
+    refresh_dashboard_snapshots(solo_precios=True)
+
+def get_prices_bulk(tickers: Optional[List[str]] = None) -> Dict[str, Optional[Dict]]:
+    """
+    Acceso en bloque a precios cacheados: O(1) por ticker, sin red ni SQLite.
+    Con tickers=None devuelve todos los precios disponibles.
+    """
+    if not price_table_state['loaded']:
+        cargar_price_table()
+    
+    with _price_table_lock:
+        if tickers is None:
+            return {ticker: dict(data) for ticker, data in price_table.items()}
+        return {
+            ticker: dict(price_table[ticker]) if ticker in price_table else None
+            for ticker in tickers
+        }
+
+def formatear_precio(data: Dict) -> Dict:
+    """Formato de respuesta de un precio cacheado"""
+    return {
+        "ticker": data['ticker'],
+        "precio_actual": round(data['precio_actual'], 2),
+        "precio_anterior": round(data['precio_anterior'], 2),
+        "cambio_pct": round(data['cambio_pct'], 2),
+        "timestamp": data['timestamp']
+    }
+
+# =====================================================
+# BARRAS INTRADAY (TABLA market_data_intraday)
+# =====================================================
+
+intraday_config = {
+    'enabled': True,
+    # Retención por timeframe (días): el 1m es el más voluminoso, los rollups viven más
+    'retention_days': {'1m': 7, '5m': 60, '15m': 120, '1h': 730},
+    'prune_interval_seconds': 3600,
+    'last_prune': 0.0
+}
+
+def filas_intraday(ticker: str, info: pd.DataFrame) -> List[tuple]:
+    """
+    Filas 1m (symbol, timeframe, bar_time UTC, open, high, low, close, volume) de las barras descargadas
+    """
+    index = info.index.tz_convert('UTC') if info.index.tz is not None else info.index
+    volumen = info['Volume'] if 'Volume' in info.columns else pd.Series(0, index=info.index)
+    return [
+        (ticker, '1m', bar_time, float(o), float(h), float(l), float(c), int(v) if pd.notna(v) else 0)
+        for bar_time, o, h, l, c, v in zip(
+            index.strftime('%Y-%m-%d %H:%M:%S'), info['Open'], info['High'], info['Low'], info['Close'], volumen
+        )
+    ]
+
+def offset_sesion_segundos(exchange: str) -> int:
+    """
+    Desfase de los buckets intraday respecto de la hora en punto: las barras de 15m/1h arrancan
+    en la apertura de la sesión (NYSE 9:30) como en TradingView
+    """
+    config = MARKET_SCHEDULES.get(exchange)
+    return int(config['open_time'][3:5]) * 60 if config else 0
+
+def guardar_barras_intraday(filas: List[tuple]) -> int:
+    """
+    Guardar las barras 1m del ciclo de precios y recalcular los rollups (5m/15m/1h) de los buckets
+    tocados, en una transacción y con un statement por timeframe para todos los símbolos
+    """
+    if not filas:
+        return 0
+    
+    desde = {}
+    for fila in filas:
+        desde[fila[0]] = min(desde.get(fila[0], fila[2]), fila[2])
+    exchanges = dict(get_universe_exchanges())
+    
+    conn = connect_db('trading_dashboard.db')
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.executemany('''
+            INSERT OR REPLACE INTO market_data_intraday
+            (symbol, timeframe, bar_time, open_price, high_price, low_price, close_price, volume)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', filas)
+        
+        cursor.execute('DROP TABLE IF EXISTS temp.intraday_lote')
+        cursor.execute('CREATE TEMP TABLE intraday_lote (symbol TEXT PRIMARY KEY, desde TEXT, offset_s INTEGER)')
+        cursor.executemany('INSERT INTO intraday_lote VALUES (?, ?, ?)', [
+            (symbol, bar_time, offset_sesion_segundos(exchanges.get(symbol) or get_symbol_exchange(symbol)))
+            for symbol, bar_time in desde.items()
+        ])
+        
+        for timeframe, segundos in TIMEFRAMES_INTRADAY.items():
+            if timeframe == '1m':
+                continue
+            # Bucket = inicio de la barra del timeframe (alineado a la apertura de la sesión)
+            cursor.execute('''
+                INSERT OR REPLACE INTO market_data_intraday
+                (symbol, timeframe, bar_time, open_price, high_price, low_price, close_price, volume)
+                SELECT symbol, :timeframe, bucket,
+                       MAX(CASE WHEN orden_asc = 1 THEN open_price END),
+                       MAX(high_price), MIN(low_price),
+                       MAX(CASE WHEN orden_desc = 1 THEN close_price END),
+                       SUM(volume)
+                FROM (
+                    SELECT *,
+                           ROW_NUMBER() OVER (PARTITION BY symbol, bucket ORDER BY bar_time) AS orden_asc,
+                           ROW_NUMBER() OVER (PARTITION BY symbol, bucket ORDER BY bar_time DESC) AS orden_desc
+                    FROM (
+                        SELECT b.symbol, b.bar_time, b.open_price, b.high_price, b.low_price, b.close_price, b.volume,
+                               datetime(((CAST(strftime('%s', b.bar_time) AS INTEGER) - l.offset_s) / :segundos)
+                                        * :segundos + l.offset_s, 'unixepoch') AS bucket
+                        FROM intraday_lote l
+                        JOIN market_data_intraday b
+                          ON b.symbol = l.symbol AND b.timeframe = '1m'
+                         AND b.bar_time >= datetime(((CAST(strftime('%s', l.desde) AS INTEGER) - l.offset_s) / :segundos)
+                                                    * :segundos + l.offset_s, 'unixepoch')
+                    )
+                )
+                GROUP BY symbol, bucket
+            ''', {'timeframe': timeframe, 'segundos': segundos})
+        
+        cursor.execute('DROP TABLE IF EXISTS temp.intraday_lote')
+        conn.commit()
+        
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    
+    if time.time() - intraday_config['last_prune'] >= intraday_config['prune_interval_seconds']:
+        purgar_barras_intraday()
+    
+    return len(filas)
+
+def purgar_barras_intraday() -> int:
+    """
+    Borrar las barras más viejas que la retención de su timeframe
+    """
+    conn = connect_db('trading_dashboard.db')
+    cursor = conn.cursor()
+    borradas = 0
+    
+    for timeframe, dias in intraday_config['retention_days'].items():
+        limite = (datetime.now(pytz.utc) - timedelta(days=dias)).strftime('%Y-%m-%d %H:%M:%S')
+        cursor.execute('DELETE FROM market_data_intraday WHERE timeframe = ? AND bar_time < ?', (timeframe, limite))
+        borradas += cursor.rowcount
+    
+    conn.commit()
+    conn.close()
+    intraday_config['last_prune'] = time.time()
+    
+    if borradas:
+        print(f"🧹 Barras intraday purgadas: {borradas}")
+    return borradas
+
+def obtener_barras_nuevas(ticker: str, ultimo_bar: Optional[str]):
+    """
+    Barras de 1 minuto posteriores a ultimo_bar.
+    Sin barra previa (o de otra sesión) se descarga el día completo para conocer el primer cierre.
+    """
+    if ultimo_bar:
+        desde = pd.Timestamp(ultimo_bar)
+        info = descargar_historial(ticker, 'intraday', start=desde.to_pydatetime(), interval="1m")
+        info = info[info.index > desde] if not info.empty else info
+        
+        if info.empty or info.index[0].date() == desde.date():
+            return info, False
+    
+    return descargar_historial(ticker, 'intraday', period="1d", interval="1m"), True
+
+def refrescar_precio_ticker(ticker: str, cached: Optional[Dict]) -> Optional[Tuple[tuple, List[tuple]]]:
+    """
+    Refrescar un ticker de forma incremental. Devuelve la fila para precios_cache
+    (ticker, precio_actual, precio_anterior, cambio_pct, volumen, timestamp, ultimo_bar)
+    y las barras 1m nuevas para market_data_intraday, o None si no hay barras nuevas.
+    """
+    info, sesion_nueva = obtener_barras_nuevas(ticker, cached.get('ultimo_bar') if cached else None)
+    
+    if info.empty:
+        return None
+    
+    current_price = float(info['Close'].iloc[-1])
+    if sesion_nueva or not cached:
+        previous_close = float(info['Close'].iloc[0]) if len(info) > 1 else current_price
+    else:
+        # Misma sesión: el primer cierre del día ya está guardado
+        previous_close = cached['precio_anterior']
+    
+    change_pct = ((current_price - previous_close) / previous_close) * 100
+    volume = info['Volume'].iloc[-1] if 'Volume' in info.columns else 0
+    
+    row = (ticker, current_price, previous_close, change_pct, float(volume),
+           datetime.now(), info.index[-1].isoformat())
+    return row, filas_intraday(ticker, info)
+
+# Cierre de sesión (UTC) ya buscado por símbolo: una sola descarga extra después del cierre
+_cierres_buscados: Dict[str, datetime] = {}
+
+def ultimo_cierre_sesion(exchange: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Cierre (UTC) de la última sesión terminada del exchange (None: sin calendario o 24/7)
+    """
+    config = MARKET_SCHEDULES.get(exchange)
+    if config is None or config['close_time'] >= '24:00':
+        return None
+    
+    zona = pytz.timezone(config['timezone'])
+    local_now = (now or datetime.now(pytz.utc)).astimezone(zona)
+    hora, minuto = (int(parte) for parte in config['close_time'].split(':'))
+    dia = local_now.date()
+    
+    for _ in range(7):
+        if dia.weekday() in config['market_days']:
+            cierre = zona.localize(datetime(dia.year, dia.month, dia.day, hora, minuto))
+            if cierre <= local_now:
+                return cierre.astimezone(pytz.utc)
+        dia -= timedelta(days=1)
+    return None
+
+def falta_cierre_sesion(ticker: str, cached: Dict, cierre: Optional[datetime]) -> bool:
+    """
+    Mercado cerrado pero la última barra guardada es anterior a la última barra 1m de la sesión
+    (el último ciclo con el mercado abierto fue hasta interval_minutes antes del cierre):
+    precio de cierre y barras finales (con su bucket de rollup) pendientes. Una vez por sesión:
+    el ciclo registra el cierre en _cierres_buscados recién cuando la descarga y el guardado salen bien.
+    """
+    if cierre is None or _cierres_buscados.get(ticker) == cierre:
+        return False
+    
+    ultimo_bar = cached.get('ultimo_bar')
+    if ultimo_bar:
+        ultimo = pd.Timestamp(ultimo_bar)
+        ultimo = ultimo.tz_localize('UTC') if ultimo.tzinfo is None else ultimo
+        if ultimo >= cierre - timedelta(minutes=1):
+            return False
+    
+    return True
+
+def run_price_refresh_cycle(force: bool = False, **filtros) -> Dict:
+    """
+    Un ciclo de actualización de precios:
+    - solo símbolos activos del universo (filtrable por asset_class/exchange/suffix)
+    - solo símbolos con su mercado abierto (cripto 24/7), salvo force, sin precio previo
+      o sin las barras finales de la última sesión (una descarga más después del cierre)
+    - solo barras nuevas desde la última guardada
+    - descargas en paralelo con un pool acotado
+    - una sola escritura (executemany) para todo el ciclo
+    - las barras 1m descargadas se guardan en market_data_intraday (con rollups)
+    """
+    cycle_start = time.time()
+    universo = get_universe_exchanges(**filtros)
+    cached = get_prices_bulk([symbol for symbol, _ in universo])
+    abiertos = {exchange: is_exchange_open(exchange) for exchange in {e for _, e in universo}}
+    cierres = {exchange: ultimo_cierre_sesion(exchange) for exchange, abierto in abiertos.items() if not abierto}
+    
+    tickers = []
+    cierres_pendientes = {}  # ticker -> cierre que se busca en este ciclo
+    for t, exchange in universo:
+        if force or cached[t] is None or abiertos[exchange]:
+            tickers.append(t)
+        elif falta_cierre_sesion(t, cached[t], cierres.get(exchange)):
+            tickers.append(t)
+            cierres_pendientes[t] = cierres[exchange]
+    skipped_closed = len(universo) - len(tickers)
+    
+    updated_rows = []
+    barras = []
+    failed = 0
+    cierres_obtenidos = {}
+    
+    def refrescar(ticker):
+        try:
+            return refrescar_precio_ticker(ticker, cached[ticker])
+        except Exception as e:
+            print(f"{ticker}: {e}")
+            return False
+    
+    with ThreadPoolExecutor(max_workers=price_update_config['max_workers']) as executor:
+        for ticker, resultado in zip(tickers, executor.map(refrescar, tickers)):
+            if resultado is False:
+                failed += 1
+                continue
+            if ticker in cierres_pendientes:
+                cierres_obtenidos[ticker] = cierres_pendientes[ticker]
+            if resultado is not None:
+                updated_rows.append(resultado[0])
+                barras.extend(resultado[1])
+    
+    if updated_rows:
+        conn = connect_db('trading_dashboard.db')
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT OR REPLACE INTO precios_cache 
+            (ticker, precio_actual, precio_anterior, cambio_pct, volumen, timestamp, ultimo_bar)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', updated_rows)
+        conn.commit()
+        conn.close()
+        
+        cambios = actualizar_price_table(updated_rows)
+        publicar_cambios_precios(cambios)
+    
+    intraday_bars = 0
+    if intraday_config['enabled'] and barras:
+        try:
+            intraday_bars = guardar_barras_intraday(barras)
+        except Exception as e:
+            print(f"⚠️  Error guardando barras intraday: {e}")
+            cierres_obtenidos = {}  # Barras finales sin guardar: se reintentan en el próximo ciclo
+    
+    # Cierres descargados y guardados: no se vuelven a buscar en esta sesión
+    _cierres_buscados.update(cierres_obtenidos)
+    
+    result = {
+        'updated': len(updated_rows),
+        'intraday_bars': intraday_bars,
+        'unchanged': len(tickers) - len(updated_rows) - failed,
+        'failed': failed,
+        'skipped_closed': skipped_closed,
+        'duration_seconds': round(time.time() - cycle_start, 2)
+    }
+    
+    PRICE_CYCLE_SECONDS.observe(time.time() - cycle_start)
+    for outcome in ('updated', 'unchanged', 'failed', 'skipped_closed'):
+        PRICE_CYCLE_TICKERS.inc(result[outcome], outcome=outcome)
+    metrics_state['last_price_cycle'] = time.time()
+    print(f"✅ Precios actualizados: {result['updated']}/{len(universo)} tickers "
+          f"({skipped_closed} con mercado cerrado, {failed} fallidos, {result['duration_seconds']}s)")
+    return result
+
+# Job de actualización de precios en background
+def actualizar_precios_background(generation: int):
+    """Job que actualiza precios con intervalo configurable (termina si cambia la generación)"""
+    while price_update_config['enabled'] and price_updater_state['generation'] == generation:
+        registrar_latido('price-updater')
+        try:
+            print(f"Actualizando precios... (intervalo: {price_update_config['interval_minutes']} min)")
+            run_price_refresh_cycle()
             
         except Exception as e:
             print(f"❌ Error en job de actualización: {e}")
         
-        # Esperar según configuración
+        # Esperar según configuración (stop/restart despiertan el thread para que termine)
         interval_seconds = price_update_config['interval_minutes'] * 60
-        time.sleep(interval_seconds)
+        _price_updater_wakeup.wait(timeout=interval_seconds)
     
-    price_update_config['running'] = False
+    if price_updater_state['generation'] == generation:
+        price_update_config['running'] = False
     print("Job de actualización de precios detenido")
 
+def iniciar_actualizador_precios():
+    """Thread nuevo del job de precios (una generación nueva: el anterior, si hay, termina solo)"""
+    price_updater_state['generation'] += 1
+    _price_updater_wakeup.clear()
+    price_update_config['running'] = True
+    threading.Thread(
+        target=actualizar_precios_background, args=(price_updater_state['generation'],),
+        name='price-updater', daemon=True
+    ).start()
+
+def detener_actualizador_precios():
+    """Detener el job de precios sin esperar a que termine su intervalo"""
+    price_updater_state['generation'] += 1
+    price_update_config['running'] = False
+    _price_updater_wakeup.set()
+
 
 @app.get("/")
 async def root():
@@ -328,9 +1517,14 @@ async def root():
         "endpoints": {
             "health": "/health",
             "tickers": "/tickers",
+            "symbols": "/symbols",
             "analyze": "/analyze",
             "dashboard": "/dashboard",
-            "price": "/price/{ticker}"
+            "screener": "/screener?fecha=YYYY-MM-DD&dias=1",
+            "price": "/price/{ticker}",
+            "prices": "/prices?tickers=A,B,C",
+            "events": "/events",
+            "metrics": "/metrics"
         }
     }
 
@@ -339,49 +1533,183 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Métricas en formato Prometheus (scrapeable por Prometheus local o curl)"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/profiles")
+async def list_profiles():
+    """Perfiles guardados (más recientes primero)"""
+    directory = profiling_config['directory']
+    archivos = sorted(os.listdir(directory), reverse=True) if os.path.isdir(directory) else []
+    return {
+        "enabled": profiling_config['enabled'],
+        "profiles": [f"/profiles/{nombre}" for nombre in archivos]
+    }
+
+@app.get("/profiles/{filename}")
+async def get_profile(filename: str):
+    """Descargar un perfil (.pstats) o su reporte (.txt)"""
+    path = os.path.join(profiling_config['directory'], os.path.basename(filename))
+    if not filename.endswith(('.pstats', '.txt')) or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"Perfil no encontrado: {filename}")
+    if filename.endswith('.txt'):
+        return FileResponse(path, media_type="text/plain; charset=utf-8")
+    return FileResponse(path, media_type="application/octet-stream", filename=os.path.basename(path))
+
 @app.get("/tickers")
-async def get_tickers():
-    """Obtener lista de tickers principales"""
+async def get_tickers(universo: Dict = Depends(filtro_universo)):
+    """Obtener lista de tickers activos (opcionalmente filtrados)"""
+    rows, _ = await asyncio.to_thread(select_symbols, **universo)
+    tickers = [row['symbol'] for row in rows]
     return {
-        "tickers": MAIN_TICKERS,
-        "count": len(MAIN_TICKERS),
+        "tickers": tickers,
+        "count": len(tickers),
         "categories": {
-            "argentinas": [t for t in MAIN_TICKERS if t.endswith(".BA")],
-            "etfs": ["SPY", "QQQ", "IWM", "EEM", "GLD"],
-            "crypto": [t for t in MAIN_TICKERS if t.endswith("-USD")]
+            "argentinas": [row['symbol'] for row in rows if row['exchange'] == 'BCBA'],
+            "etfs": [row['symbol'] for row in rows if row['asset_class'] == 'etf'],
+            "crypto": [row['symbol'] for row in rows if row['asset_class'] == 'crypto']
         }
     }
 
+@app.get("/symbols")
+async def list_symbols(
+    universo: Dict = Depends(filtro_universo),
+    active: Optional[bool] = Query(None, description="Solo activos (true) / inactivos (false); default: todos"),
+    q: Optional[str] = Query(None, description="Buscar por símbolo o nombre"),
+    limit: int = Query(500, ge=1, le=5000),
+    offset: int = Query(0, ge=0)
+):
+    """Listar el universo de símbolos con filtros y paginación"""
+    rows, total = await asyncio.to_thread(
+        select_symbols, limit=limit, offset=offset, active=active, search=q, **universo
+    )
+    return {"symbols": rows, "count": len(rows), "total": total, "offset": offset}
+
+@app.get("/symbols/{symbol}")
+async def get_symbol_endpoint(symbol: str):
+    """Detalle de un símbolo"""
+    row = await asyncio.to_thread(get_symbol, symbol.strip().upper())
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Símbolo no encontrado: {symbol}")
+    return row
+
+@app.post("/symbols", status_code=201)
+async def create_symbol(data: SymbolCreate):
+    """Agregar un símbolo al universo (clase/exchange/moneda inferidos si no se indican)"""
+    symbol = data.symbol.strip().upper()
+    campos = {**clasificar_symbol(symbol), **data.model_dump(exclude={'symbol'}, exclude_none=True)}
+    campos['exchange'] = campos['exchange'].upper()
+    validar_campos_symbol(campos)
+    
+    def insertar():
+        conn = connect_db('trading_dashboard.db')
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                INSERT INTO symbols (symbol, name, asset_class, exchange, currency, active, metadata)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (symbol, campos.get('name'), campos['asset_class'], campos['exchange'], campos.get('currency'),
+                  int(campos['active']), json.dumps(campos['metadata']) if campos.get('metadata') else None))
+            conn.commit()
+        except sqlite3.IntegrityError:
+            raise HTTPException(status_code=409, detail=f"El símbolo {symbol} ya existe")
+        finally:
+            conn.close()
+        universo_modificado()
+        return get_symbol(symbol)
+    
+    return await asyncio.to_thread(insertar)
+
+@app.patch("/symbols/{symbol}")
+async def update_symbol(symbol: str, data: SymbolUpdate):
+    """Modificar un símbolo (activar/desactivar, reclasificar, metadata)"""
+    symbol = symbol.strip().upper()
+    cambios = data.model_dump(exclude_unset=True)
+    if cambios.get('exchange'):
+        cambios['exchange'] = cambios['exchange'].upper()
+    validar_campos_symbol(cambios)
+    
+    def actualizar():
+        sets, params = [], []
+        for campo, valor in cambios.items():
+            if campo == 'metadata':
+                valor = json.dumps(valor) if valor else None
+            elif campo == 'active':
+                valor = int(bool(valor))
+            sets.append(f'{campo} = ?')
+            params.append(valor)
+        
+        conn = connect_db('trading_dashboard.db')
+        cursor = conn.cursor()
+        if sets:
+            cursor.execute(
+                f"UPDATE symbols SET {', '.join(sets)}, updated_at = ? WHERE symbol = ?",
+                params + [datetime.now(), symbol]
+            )
+        else:
+            cursor.execute('SELECT 1 FROM symbols WHERE symbol = ?', (symbol,))
+        encontrado = cursor.rowcount > 0 if sets else cursor.fetchone() is not None
+        conn.commit()
+        conn.close()
+        
+        if not encontrado:
+            raise HTTPException(status_code=404, detail=f"Símbolo no encontrado: {symbol}")
+        if sets:
+            universo_modificado()
+        return get_symbol(symbol)
+    
+    return await asyncio.to_thread(actualizar)
+
+@app.delete("/symbols/{symbol}")
+async def delete_symbol(
+    symbol: str,
+    hard: bool = Query(False, description="Borrar el registro (default: solo desactivar; los datos EOD se conservan)")
+):
+    """Quitar un símbolo del universo activo"""
+    symbol = symbol.strip().upper()
+    
+    def borrar():
+        conn = connect_db('trading_dashboard.db')
+        cursor = conn.cursor()
+        if hard:
+            # symbol_id es la clave de sus datos EOD: con filas en market_data_eod_v2 no se borra
+            cursor.execute('PRAGMA foreign_keys = ON')
+            try:
+                cursor.execute('DELETE FROM symbols WHERE symbol = ?', (symbol,))
+            except sqlite3.IntegrityError:
+                conn.rollback()
+                conn.close()
+                raise HTTPException(status_code=409, detail=f"{symbol} tiene datos EOD: desactivarlo (sin hard=true)")
+        else:
+            cursor.execute('UPDATE symbols SET active = 0, updated_at = ? WHERE symbol = ?', (datetime.now(), symbol))
+        encontrado = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        
+        if not encontrado:
+            raise HTTPException(status_code=404, detail=f"Símbolo no encontrado: {symbol}")
+        universo_modificado()
+        return {"symbol": symbol, "deleted": hard, "active": False}
+    
+    return await asyncio.to_thread(borrar)
+
 @app.get("/price/{ticker}")
 async def get_current_price(ticker: str):
     """Obtener precio actual de un ticker desde cache"""
+    return await asyncio.to_thread(obtener_precio_actual, ticker)
+
+def obtener_precio_actual(ticker: str) -> Dict:
+    """Obtener precio actual desde la tabla en memoria (o en tiempo real si no está cacheado)"""
     try:
-        conn = sqlite3.connect('trading_dashboard.db')
-        cursor = conn.cursor()
+        cached = get_prices_bulk([ticker])[ticker]
         
-        # Intentar obtener desde cache
-        cursor.execute('''
-            SELECT precio_actual, precio_anterior, cambio_pct, timestamp 
-            FROM precios_cache 
-            WHERE ticker = ?
-        ''', (ticker,))
-        
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result:
-            return {
-                "ticker": ticker,
-                "precio_actual": round(result[0], 2),
-                "precio_anterior": round(result[1], 2),
-                "cambio_pct": round(result[2], 2),
-                "timestamp": result[3],
-                "source": "cache"
-            }
+        if cached:
+            return {**formatear_precio(cached), "source": "cache"}
         else:
             # Si no está en cache, obtener en tiempo real
-            stock = yf.Ticker(ticker)
-            info = stock.history(period="1d", interval="1m")
+            info = descargar_historial(ticker, 'live_price', period="1d", interval="1m")
             
             if info.empty:
                 raise HTTPException(status_code=404, detail=f"No se pudo obtener precio para {ticker}")
@@ -398,46 +1726,40 @@ async def get_current_price(ticker: str):
                 "timestamp": datetime.now().isoformat(),
                 "source": "live"
             }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error obteniendo precio: {str(e)}")
 
+@app.get("/prices")
+async def get_prices(tickers: str = Query(..., description="Tickers separados por coma (ej: GGAL.BA,AAPL,BTC-USD)")):
+    """Obtener precios de varios tickers en una sola llamada (solo cache, sin red)"""
+    solicitados = [t.strip().upper() for t in tickers.split(',') if t.strip()]
+    
+    if not solicitados:
+        raise HTTPException(status_code=400, detail="Debe indicar al menos un ticker")
+    
+    precios = await asyncio.to_thread(get_prices_bulk, solicitados)
+    
+    return {
+        "prices": {
+            ticker: formatear_precio(data) for ticker, data in precios.items() if data
+        },
+        "missing": [ticker for ticker, data in precios.items() if not data],
+        "count": len([data for data in precios.values() if data])
+    }
+
 @app.post("/refresh-prices")
-async def refresh_prices():
-    """Forzar actualización manual de todos los precios"""
+async def refresh_prices(universo: Dict = Depends(filtro_universo)):
+    """Forzar actualización manual de los precios del universo (o de un subconjunto)"""
     try:
-        conn = sqlite3.connect('trading_dashboard.db')
-        cursor = conn.cursor()
-        updated_count = 0
-        
-        for ticker in MAIN_TICKERS:
-            try:
-                stock = yf.Ticker(ticker)
-                info = stock.history(period="1d", interval="1m")
-                
-                if not info.empty:
-                    current_price = info['Close'].iloc[-1]
-                    previous_close = info['Close'].iloc[0] if len(info) > 1 else current_price
-                    change_pct = ((current_price - previous_close) / previous_close) * 100
-                    volume = info['Volume'].iloc[-1] if 'Volume' in info.columns else 0
-                    
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO precios_cache 
-                        (ticker, precio_actual, precio_anterior, cambio_pct, volumen, timestamp)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (ticker, current_price, previous_close, change_pct, volume, datetime.now()))
-                    updated_count += 1
-                    
-            except Exception as e:
-                print(f"Error actualizando {ticker}: {e}")
-                continue
-        
-        conn.commit()
-        conn.close()
+        result = await asyncio.to_thread(run_price_refresh_cycle, True, **universo)
         
         return {
             "message": "Precios actualizados manualmente",
-            "updated_tickers": updated_count,
-            "total_tickers": len(MAIN_TICKERS),
+            "updated_tickers": result['updated'],
+            "total_tickers": result['updated'] + result['unchanged'] + result['failed'],
+            "failed_tickers": result['failed'],
             "timestamp": datetime.now().isoformat()
         }
         
@@ -448,7 +1770,7 @@ async def refresh_prices():
 async def clear_analysis_cache():
     """Limpiar cache de análisis (forzar recálculo)"""
     try:
-        conn = sqlite3.connect('trading_dashboard.db')
+        conn = connect_db('trading_dashboard.db')
         cursor = conn.cursor()
         
         cursor.execute('DELETE FROM analisis_cache')
@@ -469,28 +1791,9 @@ async def clear_analysis_cache():
 @app.get("/prices/all")
 async def get_all_prices():
     """Obtener todos los precios desde cache"""
-    try:
-        conn = sqlite3.connect('trading_dashboard.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT ticker, precio_actual, precio_anterior, cambio_pct, timestamp
-            FROM precios_cache
-            ORDER BY ticker
-        ''')
-        
-        results = cursor.fetchall()
-        conn.close()
-        
-        prices = []
-        for result in results:
-            prices.append({
-                "ticker": result[0],
-                "precio_actual": round(result[1], 2),
-                "precio_anterior": round(result[2], 2),
-                "cambio_pct": round(result[3], 2),
-                "timestamp": result[4]
-            })
+    try:
+        precios = await asyncio.to_thread(get_prices_bulk)
+        prices = [formatear_precio(data) for _, data in sorted(precios.items())]
         
         return {
             "prices": prices,
@@ -501,38 +1804,242 @@ async def get_all_prices():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error obteniendo precios: {str(e)}")
 
+def validar_timeframe_intraday(timeframe: str):
+    if timeframe not in TIMEFRAMES_INTRADAY:
+        raise HTTPException(status_code=400, detail=f"timeframe inválido: {timeframe} (válidos: {', '.join(TIMEFRAMES_INTRADAY)})")
+
+def get_intraday_bars(symbol: str, timeframe: str, limit: int) -> List[Dict]:
+    """
+    Últimas `limit` barras intraday de un símbolo (orden cronológico)
+    """
+    conn = connect_db('trading_dashboard.db')
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT bar_time, open_price, high_price, low_price, close_price, volume FROM (
+            SELECT * FROM market_data_intraday
+            WHERE symbol = ? AND timeframe = ?
+            ORDER BY bar_time DESC LIMIT ?
+        ) ORDER BY bar_time ASC
+    ''', (symbol, timeframe, limit))
+    rows = cursor.fetchall()
+    conn.close()
+    
+    return [
+        {'time': row[0], 'open': row[1], 'high': row[2], 'low': row[3], 'close': row[4], 'volume': row[5]}
+        for row in rows
+    ]
+
+def detectar_senales_intraday(symbols: List[str], timeframe: str, fecha_inicio: str, fecha_fin: str) -> List[Dict]:
+    """
+    Barras verdes de VIX_Fix en el timeframe intraday pedido (mismo cálculo que el diario).
+    Los símbolos con menos de pd_period + max(bbl, lb) barras guardadas se omiten (sin warm-up).
+    """
+    strategy = VixFixStrategy(timeframe=timeframe)
+    senales = []
+    
+    for symbol in symbols:
+        try:
+            fechas_compra = strategy.obtener_fechas_compra(symbol, fecha_inicio, fecha_fin)
+        except Exception as e:
+            print(f"Error detectando señales intraday de {symbol}: {e}")
+            continue
+        
+        if fechas_compra is None or fechas_compra.empty:
+            continue
+        
+        for bar_time, row in fechas_compra.iterrows():
+            senales.append({
+                'ticker': symbol,
+                'time': bar_time.strftime('%Y-%m-%d %H:%M:%S'),
+                'close': round(float(row['Close']), 2),
+                'wvf': round(float(row['wvf']), 2),
+                'upper_band': round(float(row['upperBand']), 2) if pd.notna(row['upperBand']) else None,
+                'range_high': round(float(row['rangeHigh']), 2) if pd.notna(row['rangeHigh']) else None
+            })
+    
+    senales.sort(key=lambda s: s['time'], reverse=True)
+    return senales
+
+@app.get("/intraday/{symbol}")
+async def get_intraday(
+    symbol: str,
+    timeframe: str = Query('5m', description="Timeframe: 1m, 5m, 15m, 1h"),
+    limit: int = Query(390, ge=1, le=10000, description="Cantidad de barras (las más recientes)")
+):
+    """
+    Barras intraday guardadas por el actualizador de precios (horario UTC)
+    """
+    validar_timeframe_intraday(timeframe)
+    symbol = symbol.upper()
+    try:
+        bars = await asyncio.to_thread(get_intraday_bars, symbol, timeframe, limit)
+        return {'symbol': symbol, 'timeframe': timeframe, 'count': len(bars), 'bars': bars}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error obteniendo barras intraday: {str(e)}")
+
+@app.get("/intraday-signals")
+async def get_intraday_signals(
+    timeframe: str = Query('15m', description="Timeframe: 1m, 5m, 15m, 1h"),
+    fecha_inicio: Optional[str] = Query(None, description="Desde (YYYY-MM-DD o YYYY-MM-DD HH:MM UTC, default: hoy)"),
+    fecha_fin: Optional[str] = Query(None, description="Hasta (default: fecha_inicio)"),
+    universo: Dict = Depends(filtro_universo)
+):
+    """
+    Señales verdes de VIX_Fix intraday sobre las barras guardadas (sin descargas adicionales)
+    """
+    validar_timeframe_intraday(timeframe)
+    fecha_inicio = fecha_inicio or datetime.now(pytz.utc).strftime('%Y-%m-%d')
+    fecha_fin = fecha_fin or fecha_inicio[:10]
+    def detectar():
+        return detectar_senales_intraday(get_universe(**universo), timeframe, fecha_inicio, fecha_fin)
+    
+    try:
+        senales = await asyncio.to_thread(detectar)
+        return {
+            'timeframe': timeframe,
+            'fecha_inicio': fecha_inicio,
+            'fecha_fin': fecha_fin,
+            'total_signals': len(senales),
+            'signals': senales
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error detectando señales intraday: {str(e)}")
+
+@app.get("/screener")
+async def get_screener(
+    fecha: Optional[str] = Query(None, description="Fecha a evaluar (YYYY-MM-DD, default: hoy)"),
+    dias: int = Query(1, ge=1, le=60, description="Últimas K sesiones de cada símbolo"),
+    limit: Optional[int] = Query(None, ge=1, description="Solo las N señales más fuertes"),
+    universo: Dict = Depends(filtro_universo)
+):
+    """
+    Screener VIX_Fix: símbolos en verde en `fecha` (o en sus últimas `dias` sesiones) ordenados
+    por cuánto supera wvf a upperBand / rangeHigh. Una consulta al snapshot de lectura con solo
+    las barras que necesitan las ventanas del indicador y un pase vectorizado para todo el universo.
+    """
+    if fecha:
+        try:
+            datetime.strptime(fecha, '%Y-%m-%d')
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"fecha inválida: {fecha} (formato YYYY-MM-DD)")
+    
+    strategy = VixFixStrategy()
+    
+    def escanear_universo():
+        return escanear(
+            uri_lectura_eod(), get_universe(**universo), fecha, dias,
+            pd_period=strategy.pd_period, bbl=strategy.bbl, mult=strategy.mult,
+            lb=strategy.lb, ph=strategy.ph, limit=limit
+        )
+    
+    try:
+        return await asyncio.to_thread(escanear_universo)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error ejecutando screener: {str(e)}")
+
+@app.get("/events")
+async def stream_events(request: Request):
+    """
+    Canal push (Server-Sent Events): deltas de precios, nuevos datos EOD y señales.
+    Eventos: 'hello' (versiones actuales), 'prices', 'eod', 'signals'.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+    event_hub['subscribers'].add(queue)
+    versions = await asyncio.to_thread(get_data_versions)
+    
+    async def event_generator():
+        try:
+            yield f"event: hello\ndata: {json.dumps(versions)}\n\n"
+            
+            while not await request.is_disconnected():
+                try:
+                    mensaje = await asyncio.wait_for(queue.get(), timeout=EVENT_KEEPALIVE_SECONDS)
+                    yield mensaje
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+        finally:
+            event_hub['subscribers'].discard(queue)
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 def generar_config_hash(profit_target: float, max_days: int) -> str:
     """Generar hash único para configuración de análisis"""
     config_str = f"{profit_target}_{max_days}"
     return hashlib.md5(config_str.encode()).hexdigest()
 
 @app.post("/analyze")
-async def analyze_ticker(request: TradeAnalysisRequest):
+async def analyze_ticker(
+    request: TradeAnalysisRequest,
+    profile: bool = Query(False, description="Ejecutar bajo profiler (requiere profiling habilitado)"),
+    x_profile: Optional[str] = Header(None),
+    timings: bool = Query(False, description="Incluir tiempos por etapa (bloque timings)")
+):
     """Analizar trades de un ticker específico con cache"""
+    result = await analizar_ticker_endpoint(request, perfilar=perfil_solicitado(profile, x_profile))
+    return result if timings else sin_timings(result)
+
+async def analizar_ticker_endpoint(request: TradeAnalysisRequest, perfilar: bool = False) -> Dict:
+    """
+    Cuerpo de /analyze (single-flight o profiler) con el bloque timings incluido.
+    Los llamadores internos usan esta función: los defaults Query/Header del endpoint
+    solo los resuelve FastAPI (llamado directo, Query(False) es un objeto truthy).
+    """
+    request.ticker = request.ticker.strip().upper()
+    key = normalizar_clave_request(
+        'analyze',
+        ticker=request.ticker,
+        fecha_inicio=request.fecha_inicio,
+        fecha_fin=request.fecha_fin,
+        profit_target=request.profit_target,
+        max_days=request.max_days
+    )
+    return await ejecutar_request(key, 'analyze', perfilar, analizar_ticker_con_cache, request)
+
+def sin_timings(result):
+    """Quitar el bloque timings (sin mutar el resultado compartido por single-flight)"""
+    if isinstance(result, dict) and 'timings' in result:
+        return {k: v for k, v in result.items() if k != 'timings'}
+    return result
+
+def analizar_ticker_con_cache(request: TradeAnalysisRequest) -> Dict:
+    """
+    Análisis de un ticker (bloqueante): cache de análisis o cálculo completo.
+    Incluye siempre el bloque timings {ticker: {etapa: segundos}}; el endpoint lo quita si no se pidió.
+    """
+    etapas = StageTimings()
     try:
         # Generar hash de configuración
         config_hash = generar_config_hash(request.profit_target, request.max_days)
         
         # Intentar obtener desde cache
-        conn = sqlite3.connect('trading_dashboard.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT resultado_json FROM analisis_cache 
-            WHERE ticker = ? AND fecha_inicio = ? AND fecha_fin = ? AND config_hash = ?
-            AND datetime(timestamp) > datetime('now', '-1 hour')
-        ''', (request.ticker, request.fecha_inicio, request.fecha_fin, config_hash))
-        
-        cached_result = cursor.fetchone()
+        with etapas.medir('cache_lookup'):
+            conn = connect_db('trading_dashboard.db')
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT resultado_json FROM analisis_cache 
+                WHERE ticker = ? AND fecha_inicio = ? AND fecha_fin = ? AND config_hash = ?
+                AND datetime(timestamp) > datetime('now', '-1 hour')
+            ''', (request.ticker, request.fecha_inicio, request.fecha_fin, config_hash))
+            
+            cached_result = cursor.fetchone()
         
         if cached_result:
+            ANALYSIS_CACHE_REQUESTS.inc(result='hit')
             conn.close()
-            return json.loads(cached_result[0])
+            return {**json.loads(cached_result[0]), "timings": {request.ticker: etapas.as_dict()}}
+        
+        ANALYSIS_CACHE_REQUESTS.inc(result='miss')
         
         # Si no está en cache, hacer análisis completo
         analyzer = TradeAnalyzer(
             profit_target=request.profit_target,
-            max_hold_days=request.max_days
+            max_hold_days=request.max_days,
+            db_path=uri_lectura_eod()
         )
         
         resultados = analyzer.analizar_trades(
@@ -540,9 +2047,16 @@ async def analyze_ticker(request: TradeAnalysisRequest):
             request.fecha_inicio, 
             request.fecha_fin
         )
+        etapas.merge(analyzer.timings)
         
         if resultados is None or resultados.empty:
-            return {"message": f"No se encontraron trades para {request.ticker}", "trades": []}
+            return {
+                "message": f"No se encontraron trades para {request.ticker}",
+                "trades": [],
+                "timings": {request.ticker: etapas.as_dict()}
+            }
+        
+        formatting_start = time.perf_counter()
         
         # Convertir resultados a formato API
         trades_formateados = []
@@ -586,6 +2100,7 @@ async def analyze_ticker(request: TradeAnalysisRequest):
             "trades": trades_formateados,
             "source": "calculated"
         }
+        etapas.agregar('formatting', time.perf_counter() - formatting_start)
         
         # Guardar en cache
         try:
@@ -601,100 +2116,270 @@ async def analyze_ticker(request: TradeAnalysisRequest):
         finally:
             conn.close()
         
-        return resultado_final
+        return {**resultado_final, "timings": {request.ticker: etapas.as_dict()}}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error en análisis: {str(e)}")
 
 @app.get("/dashboard")
-async def get_dashboard_data(fecha: str = Query(..., description="Fecha para análisis (YYYY-MM-DD)")):
-    """Obtener datos del dashboard principal con trades abiertos"""
+async def get_dashboard_data(
+    fecha: str = Query(..., description="Fecha para análisis (YYYY-MM-DD)"),
+    universo: Dict = Depends(filtro_universo)
+):
+    """Obtener datos del dashboard principal con trades abiertos (opcionalmente de un subconjunto)"""
+    key = normalizar_clave_request('dashboard', fecha=fecha, **universo)
+    return await single_flight(key, generar_dashboard, fecha, universo)
+
+def generar_dashboard(fecha: str, universo: Optional[Dict] = None) -> DashboardData:
+    """Servir el dashboard desde el snapshot (construyéndolo si falta o está desactualizado)"""
     try:
-        fecha_fin = datetime.now().strftime('%Y-%m-%d')
-        trades_abiertos = []
-        total_profit = 0
-        
-        # Analizar cada ticker principal
-        for ticker in MAIN_TICKERS:
-            try:
-                analyzer = TradeAnalyzer(
-                    profit_target=DEFAULT_PROFIT_TARGET,
-                    max_hold_days=DEFAULT_MAX_DAYS
-                )
-                
-                resultados = analyzer.analizar_trades(ticker, fecha, fecha_fin)
-                
-                if resultados is not None and not resultados.empty:
-                    # Filtrar solo trades que no alcanzaron el target (abiertos)
-                    trades_pendientes = resultados[
-                        (resultados['resultado'] != 'TARGET_ALCANZADO') |
-                        (resultados['fecha_venta'] >= datetime.now().strftime('%Y-%m-%d'))
-                    ]
-                    
-                    for _, trade in trades_pendientes.iterrows():
-                        # Obtener precio actual
-                        try:
-                            precio_actual_data = await get_current_price(ticker)
-                            precio_actual = precio_actual_data['precio_actual']
-                        except:
-                            precio_actual = trade['precio_compra']
-                        
-                        # Calcular profit actual
-                        profit_actual = ((precio_actual - trade['precio_compra']) / trade['precio_compra']) * 100
-                        profit_absoluto = precio_actual - trade['precio_compra']
-                        
-                        trade_result = TradeResult(
-                            trade_num=int(trade['trade_num']),
-                            ticker=ticker,
-                            fecha_compra=trade['fecha_compra'].strftime('%Y-%m-%d'),
-                            precio_compra=round(float(trade['precio_compra']), 2),
-                            precio_target=round(float(trade['precio_target']), 2),
-                            fecha_venta=None,
-                            precio_venta=None,
-                            dias_trade=int(trade['dias_trade']),
-                            profit_pct=round(profit_actual, 2),
-                            profit_absoluto=round(profit_absoluto, 2),
-                            estado='ABIERTO',
-                            precio_actual=precio_actual
-                        )
-                        
-                        trades_abiertos.append(trade_result)
-                        total_profit += profit_absoluto
-                        
-            except Exception as e:
-                print(f"Error analizando {ticker}: {e}")
-                continue
-        
-        # Calcular estadísticas
-        total_trades = len(trades_abiertos)
-        trades_exitosos = len([t for t in trades_abiertos if t.profit_pct >= DEFAULT_PROFIT_TARGET * 100])
-        dias_promedio = sum(t.dias_trade for t in trades_abiertos) / total_trades if total_trades > 0 else 0
-        
-        dashboard_data = DashboardData(
-            fecha_analisis=fecha,
-            trades_abiertos=trades_abiertos,
-            total_trades=total_trades,
-            trades_exitosos=trades_exitosos,
-            profit_total=round(total_profit, 2),
-            dias_promedio=round(dias_promedio, 1)
-        )
-        
-        return dashboard_data
-        
+        filtrado = universo is not None and any(universo.values())
+        return obtener_dashboard_snapshot(fecha, set(get_universe(**universo)) if filtrado else None)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generando dashboard: {str(e)}")
 
+# =====================================================
+# SNAPSHOT DEL DASHBOARD (TRADES ABIERTOS PRECALCULADOS)
+# =====================================================
+
+# Snapshots por fecha de inicio + configuración por defecto
+dashboard_snapshots: Dict[str, Dict] = {}
+_snapshot_lock = threading.Lock()
+DASHBOARD_SNAPSHOT_MAX = 8  # Fechas de inicio distintas que se mantienen en memoria
+
+def clave_dashboard_snapshot(fecha: str) -> str:
+    """Clave del snapshot: fecha de inicio + hash de la configuración por defecto"""
+    return f"{fecha}:{generar_config_hash(DEFAULT_PROFIT_TARGET, DEFAULT_MAX_DAYS)}"
+
+def analizar_trades_abiertos(ticker: str, fecha: str, fecha_fin: str) -> List[Dict]:
+    """
+    Trades de un ticker que siguen abiertos (sin precio actual aplicado)
+    """
+    analyzer = TradeAnalyzer(
+        profit_target=DEFAULT_PROFIT_TARGET,
+        max_hold_days=DEFAULT_MAX_DAYS,
+        db_path=uri_lectura_eod()
+    )
+    
+    resultados = analyzer.analizar_trades(ticker, fecha, fecha_fin)
+    
+    if resultados is None or resultados.empty:
+        return []
+    
+    # Filtrar solo trades que no alcanzaron el target (abiertos)
+    trades_pendientes = resultados[
+        (resultados['resultado'] != 'TARGET_ALCANZADO') |
+        (resultados['fecha_venta'] >= datetime.now().strftime('%Y-%m-%d'))
+    ]
+    
+    return [
+        {
+            'trade_num': int(trade['trade_num']),
+            'fecha_compra': trade['fecha_compra'].strftime('%Y-%m-%d'),
+            'precio_compra': float(trade['precio_compra']),
+            'precio_target': float(trade['precio_target']),
+            'dias_trade': int(trade['dias_trade'])
+        }
+        for _, trade in trades_pendientes.iterrows()
+    ]
+
+def aplicar_precios_dashboard(snapshot: Dict, price_version: int,
+                              tickers: Optional[set] = None) -> DashboardData:
+    """
+    Armar el DashboardData de un snapshot con los precios actuales del cache
+    (tickers: vista de un subconjunto del universo, sin re-analizar)
+    """
+    trades_abiertos = []
+    total_profit = 0
+    
+    # Precios actuales de todos los tickers con trades abiertos en una sola lectura
+    tickers_abiertos = [
+        t for t, trades in snapshot['trades_por_ticker'].items()
+        if trades and (tickers is None or t in tickers)
+    ]
+    precios = get_prices_bulk(tickers_abiertos)
+    
+    for ticker in tickers_abiertos:
+        precio_actual = round(precios[ticker]['precio_actual'], 2) if precios[ticker] else None
+        
+        for trade in snapshot['trades_por_ticker'][ticker]:
+            precio = precio_actual if precio_actual is not None else trade['precio_compra']
+            
+            # Calcular profit actual
+            profit_actual = ((precio - trade['precio_compra']) / trade['precio_compra']) * 100
+            profit_absoluto = precio - trade['precio_compra']
+            
+            trades_abiertos.append(TradeResult(
+                trade_num=trade['trade_num'],
+                ticker=ticker,
+                fecha_compra=trade['fecha_compra'],
+                precio_compra=round(trade['precio_compra'], 2),
+                precio_target=round(trade['precio_target'], 2),
+                fecha_venta=None,
+                precio_venta=None,
+                dias_trade=trade['dias_trade'],
+                profit_pct=round(profit_actual, 2),
+                profit_absoluto=round(profit_absoluto, 2),
+                estado='ABIERTO',
+                precio_actual=precio
+            ))
+            total_profit += profit_absoluto
+    
+    # Calcular estadísticas
+    total_trades = len(trades_abiertos)
+    trades_exitosos = len([t for t in trades_abiertos if t.profit_pct >= DEFAULT_PROFIT_TARGET * 100])
+    dias_promedio = sum(t.dias_trade for t in trades_abiertos) / total_trades if total_trades > 0 else 0
+    
+    return DashboardData(
+        fecha_analisis=snapshot['fecha'],
+        trades_abiertos=trades_abiertos,
+        total_trades=total_trades,
+        trades_exitosos=trades_exitosos,
+        profit_total=round(total_profit, 2),
+        dias_promedio=round(dias_promedio, 1),
+        data_version=snapshot['data_version'],
+        price_version=price_version,
+        snapshot_built_at=snapshot['built_at']
+    )
+
+def build_dashboard_snapshot(fecha: str, tickers: Optional[List[str]] = None) -> Dict:
+    """
+    Construir (o reconstruir incrementalmente) el snapshot de una fecha de inicio.
+    Si se indican tickers y existe un snapshot vigente, solo se re-analizan esos tickers
+    (más los que se sumaron al universo; los dados de baja se descartan).
+    """
+    versions = get_data_versions()
+    fecha_fin = datetime.now().strftime('%Y-%m-%d')
+    
+    with _snapshot_lock:
+        previo = dashboard_snapshots.get(clave_dashboard_snapshot(fecha))
+    
+    # Un cambio de día invalida todo el snapshot (cambia fecha_fin)
+    incremental = tickers is not None and previo is not None and previo['fecha_fin'] == fecha_fin
+    
+    universo = get_universe()
+    if incremental:
+        activos = set(universo)
+        pedidos = set(tickers)
+        trades_por_ticker = {t: trades for t, trades in previo['trades_por_ticker'].items() if t in activos}
+        tickers_a_analizar = [t for t in universo if t in pedidos or t not in trades_por_ticker]
+    else:
+        trades_por_ticker = {}
+        tickers_a_analizar = universo
+    
+    for ticker in tickers_a_analizar:
+        try:
+            trades_por_ticker[ticker] = analizar_trades_abiertos(ticker, fecha, fecha_fin)
+        except Exception as e:
+            print(f"Error analizando {ticker}: {e}")
+            trades_por_ticker[ticker] = []
+    
+    snapshot = {
+        'fecha': fecha,
+        'fecha_fin': fecha_fin,
+        'trades_por_ticker': trades_por_ticker,
+        'data_version': versions.get('eod', 0),
+        'symbols_version': versions.get('symbols', 0),
+        'built_at': datetime.now().isoformat()
+    }
+    snapshot['dashboard'] = aplicar_precios_dashboard(snapshot, versions.get('prices', 0))
+    
+    with _snapshot_lock:
+        clave = clave_dashboard_snapshot(fecha)
+        dashboard_snapshots.pop(clave, None)
+        dashboard_snapshots[clave] = snapshot
+        
+        # Descartar las fechas usadas hace más tiempo
+        while len(dashboard_snapshots) > DASHBOARD_SNAPSHOT_MAX:
+            dashboard_snapshots.pop(next(iter(dashboard_snapshots)))
+    
+    return snapshot
+
+def obtener_dashboard_snapshot(fecha: str, tickers: Optional[set] = None) -> DashboardData:
+    """
+    Leer el dashboard desde el snapshot vigente.
+    Datos EOD nuevos => re-análisis; cambios en el universo => re-análisis solo de los símbolos nuevos;
+    solo precios nuevos => re-valuación de trades abiertos.
+    """
+    versions = get_data_versions()
+    fecha_fin = datetime.now().strftime('%Y-%m-%d')
+    
+    with _snapshot_lock:
+        clave = clave_dashboard_snapshot(fecha)
+        snapshot = dashboard_snapshots.pop(clave, None)
+        if snapshot is not None:
+            dashboard_snapshots[clave] = snapshot  # Marcar como usado recientemente
+    
+    if (snapshot is None or snapshot['fecha_fin'] != fecha_fin
+            or snapshot['data_version'] != versions.get('eod', 0)):
+        snapshot = build_dashboard_snapshot(fecha)
+    elif snapshot['symbols_version'] != versions.get('symbols', 0):
+        snapshot = build_dashboard_snapshot(fecha, tickers=[])
+    elif snapshot['dashboard'].price_version != versions.get('prices', 0):
+        snapshot['dashboard'] = aplicar_precios_dashboard(snapshot, versions.get('prices', 0))
+    
+    if tickers is not None:
+        return aplicar_precios_dashboard(snapshot, snapshot['dashboard'].price_version, tickers)
+    return snapshot['dashboard']
+
+def refresh_dashboard_snapshots(tickers: Optional[List[str]] = None, solo_precios: bool = False):
+    """
+    Actualizar los snapshots existentes tras un job EOD (tickers afectados)
+    o tras un ciclo de precios (solo re-valuación)
+    """
+    with _snapshot_lock:
+        snapshots = list(dashboard_snapshots.values())
+    
+    if not snapshots:
+        return
+    
+    price_version = get_data_versions().get('prices', 0)
+    
+    for snapshot in snapshots:
+        try:
+            if solo_precios:
+                snapshot['dashboard'] = aplicar_precios_dashboard(snapshot, price_version)
+            else:
+                build_dashboard_snapshot(snapshot['fecha'], tickers)
+        except Exception as e:
+            print(f"Error actualizando snapshot del dashboard ({snapshot['fecha']}): {e}")
+    
+    print(f"📸 Snapshots del dashboard actualizados: {len(snapshots)}")
+
 @app.get("/historical-analysis")
 async def get_historical_analysis(
     fecha_inicio: str = Query(..., description="Fecha inicio del análisis (YYYY-MM-DD)"),
     fecha_fin: str = Query(..., description="Fecha fin del análisis (YYYY-MM-DD)"),
     profit_target: float = Query(DEFAULT_PROFIT_TARGET, description="Target de ganancia (ej: 0.04 = 4%)"),
-    max_days: int = Query(None, description="Días máximos de retención (None = sin límite)")
+    max_days: int = Query(None, description="Días máximos de retención (None = sin límite)"),
+    profile: bool = Query(False, description="Ejecutar bajo profiler (requiere profiling habilitado)"),
+    x_profile: Optional[str] = Header(None),
+    timings: bool = Query(False, description="Incluir tiempos por etapa y por ticker (bloque timings)"),
+    universo: Dict = Depends(filtro_universo)
 ):
     """
     Análisis histórico completo de VIX Fix para un período específico.
     Muestra todos los trades del período con sus resultados finales.
+    Con asset_class/exchange/suffix se analiza solo ese subconjunto del universo.
     """
+    perfilar = perfil_solicitado(profile, x_profile)
+    key = normalizar_clave_request(
+        'historical-analysis',
+        fecha_inicio=fecha_inicio,
+        fecha_fin=fecha_fin,
+        profit_target=profit_target,
+        max_days=max_days,
+        **universo
+    )
+    result = await ejecutar_request(
+        key, 'historical-analysis', perfilar,
+        generar_analisis_historico, fecha_inicio, fecha_fin, profit_target, max_days, universo
+    )
+    return result if timings else sin_timings(result)
+
+def generar_analisis_historico(fecha_inicio: str, fecha_fin: str, profit_target: float,
+                               max_days: Optional[int], universo: Optional[Dict] = None) -> Dict:
+    """Análisis histórico de los tickers activos del universo (o del subconjunto filtrado) (bloqueante)"""
     try:
         resultados_historicos = []
         resumen_estadisticas = {
@@ -713,16 +2398,41 @@ async def get_historical_analysis(
         }
         
         tickers_performance = {}
+        timings_por_ticker = {}
+        timings_totales = StageTimings()
+        
+        tickers = get_universe(**(universo or {}))
+        max_hold_days = max_days if max_days else 365  # Si no hay límite, usar 1 año
+        paneles = {}
+        db_lectura = uri_lectura_eod()  # También re-apunta el motor analítico al snapshot vigente
+        
+        if analytics.enabled:
+            # OHLCV de todos los tickers en una sola consulta vectorizada (warm-up + ventana de salidas)
+            estrategia = VixFixStrategy()
+            warm_up_days = max(estrategia.pd_period, estrategia.bbl, estrategia.lb) + 50
+            try:
+                with timings_totales.medir('data_load.panel'):
+                    paneles = analytics.ohlcv_panel(
+                        tickers,
+                        (pd.Timestamp(fecha_inicio) - pd.Timedelta(days=warm_up_days)).strftime('%Y-%m-%d'),
+                        (pd.Timestamp(fecha_fin) + pd.Timedelta(days=max_hold_days + 10)).strftime('%Y-%m-%d')
+                    )
+            except Exception as e:
+                print(f"⚠️  Motor analítico no disponible para el panel OHLCV: {e}")
         
         # Analizar cada ticker
-        for ticker in MAIN_TICKERS:
+        for ticker in tickers:
             try:
                 analyzer = TradeAnalyzer(
                     profit_target=profit_target,
-                    max_hold_days=max_days if max_days else 365  # Si no hay límite, usar 1 año
+                    max_hold_days=max_hold_days,
+                    db_path=db_lectura
                 )
+                if ticker in paneles:
+                    analyzer.precargar_datos(paneles[ticker])
                 
                 resultados = analyzer.analizar_trades(ticker, fecha_inicio, fecha_fin)
+                formatting_start = time.perf_counter()
                 
                 if resultados is not None and not resultados.empty:
                     ticker_stats = {
@@ -781,6 +2491,10 @@ async def get_historical_analysis(
                         ticker_stats["win_rate"] = (ticker_stats["trades_exitosos"] / ticker_stats["total_trades"]) * 100
                     
                     tickers_performance[ticker] = ticker_stats
+                
+                analyzer.timings.agregar('formatting', time.perf_counter() - formatting_start)
+                timings_por_ticker[ticker] = analyzer.timings.as_dict()
+                timings_totales.merge(analyzer.timings)
                     
             except Exception as e:
                 print(f"Error analizando {ticker}: {e}")
@@ -817,7 +2531,14 @@ async def get_historical_analysis(
         return {
             "resumen": resumen_estadisticas,
             "trades_historicos": resultados_historicos,
-            "performance_por_ticker": tickers_performance
+            "performance_por_ticker": tickers_performance,
+            "timings": {
+                "total": timings_totales.as_dict(),
+                "por_ticker": timings_por_ticker,
+                "yfinance_fallbacks": sorted(
+                    t for t, stages in timings_por_ticker.items() if 'data_load.yfinance' in stages
+                )
+            }
         }
         
     except Exception as e:
@@ -826,12 +2547,14 @@ async def get_historical_analysis(
 @app.get("/analyze-all")
 async def analyze_all_tickers(
     fecha_inicio: str = Query(..., description="Fecha inicio (YYYY-MM-DD)"),
-    fecha_fin: str = Query(..., description="Fecha fin (YYYY-MM-DD)")
+    fecha_fin: str = Query(..., description="Fecha fin (YYYY-MM-DD)"),
+    universo: Dict = Depends(filtro_universo)
 ):
-    """Analizar todos los tickers principales"""
+    """Analizar todos los tickers activos (o el subconjunto filtrado)"""
     resultados_todos = {}
+    tickers = await asyncio.to_thread(get_universe, **universo)
     
-    for ticker in MAIN_TICKERS:
+    for ticker in tickers:
         try:
             request = TradeAnalysisRequest(
                 ticker=ticker,
@@ -841,7 +2564,7 @@ async def analyze_all_tickers(
                 max_days=DEFAULT_MAX_DAYS
             )
             
-            resultado = await analyze_ticker(request)
+            resultado = sin_timings(await analizar_ticker_endpoint(request))
             resultados_todos[ticker] = resultado
             
         except Exception as e:
@@ -849,7 +2572,7 @@ async def analyze_all_tickers(
     
     return {
         "periodo": {"inicio": fecha_inicio, "fin": fecha_fin},
-        "tickers_analizados": len(MAIN_TICKERS),
+        "tickers_analizados": len(tickers),
         "resultados": resultados_todos
     }
 
@@ -859,7 +2582,6 @@ async def analyze_all_tickers(
 
 import json
 from typing import Dict, List, Tuple
-import schedule
 import pytz
 from datetime import timedelta
 
@@ -911,30 +2633,40 @@ def validate_ohlcv_data(symbol: str, ohlcv_data: Dict) -> Tuple[int, List[str]]:
     
     return score, flags
 
-def check_data_continuity(symbol: str, new_close: float, business_date: str) -> Tuple[bool, str]:
+def evaluar_gap_precio(prev_close: float, new_close: float) -> Tuple[bool, str]:
+    """Continuidad entre dos cierres consecutivos (gap > 20% = anomalía)"""
+    price_gap = abs(new_close - prev_close) / prev_close
+    
+    if price_gap > 0.2:  # Gap >20%
+        return False, f"PRICE_GAP_{price_gap:.1%}"
+    
+    return True, "CONTINUITY_OK"
+
+def check_data_continuity(symbol: str, new_close: float, business_date: str,
+                          conn: Optional[sqlite3.Connection] = None) -> Tuple[bool, str]:
     """
-    Verificar continuidad con el día anterior
+    Verificar continuidad con el día anterior (en `conn` si se pasa; si no, en una conexión propia)
     """
+    propia = conn is None
     try:
-        conn = sqlite3.connect('trading_dashboard.db')
+        if propia:
+            conn = connect_db('trading_dashboard.db')
         cursor = conn.cursor()
         
         # Obtener precio de cierre del día anterior
-        cursor.execute('''
-            SELECT close_price FROM market_data_eod 
-            WHERE symbol = ? AND business_date < ?
-            ORDER BY business_date DESC LIMIT 1
+        cursor.execute(f'''
+            SELECT e.close_price FROM {EOD_TABLE} e
+            JOIN symbols s ON s.symbol_id = e.symbol_id
+            WHERE s.symbol = ? AND e.day < {sql_dia('?')}
+            ORDER BY e.day DESC LIMIT 1
         ''', (symbol, business_date))
         
         result = cursor.fetchone()
-        conn.close()
+        if propia:
+            conn.close()
         
         if result:
-            prev_close = float(result[0])
-            price_gap = abs(new_close - prev_close) / prev_close
-            
-            if price_gap > 0.2:  # Gap >20%
-                return False, f"PRICE_GAP_{price_gap:.1%}"
+            return evaluar_gap_precio(float(result[0]), new_close)
         
         return True, "CONTINUITY_OK"
         
@@ -943,66 +2675,139 @@ def check_data_continuity(symbol: str, new_close: float, business_date: str) ->
 
 def insert_or_update_eod_data(symbol: str, business_date: str, ohlcv_data: Dict) -> bool:
     """
-    Insert or update EOD data con validación
+    Insert or update EOD data con validación (una barra por el mismo camino que la carga bulk)
     """
     try:
-        # Validar datos
-        quality_score, anomaly_flags = validate_ohlcv_data(symbol, ohlcv_data)
-        
-        # Check continuity
-        continuity_ok, continuity_msg = check_data_continuity(
-            symbol, float(ohlcv_data['Close']), business_date
-        )
-        
-        if not continuity_ok:
-            anomaly_flags.append(continuity_msg)
-            quality_score -= 15
-        
-        # Solo insertar si quality score >= 50 (configurable)
-        if quality_score < 50:
-            print(f"❌ {symbol} {business_date}: Quality too low ({quality_score}): {anomaly_flags}")
-            return False
-        
-        conn = sqlite3.connect('trading_dashboard.db')
-        cursor = conn.cursor()
-        
-        # INSERT OR REPLACE (maneja UPDATE vs INSERT automáticamente)
-        cursor.execute('''
-            INSERT OR REPLACE INTO market_data_eod 
-            (symbol, business_date, open_price, high_price, low_price, close_price, 
-             volume, adj_close, data_quality_score, anomaly_flags, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            symbol,
-            business_date,
-            float(ohlcv_data['Open']),
-            float(ohlcv_data['High']),
-            float(ohlcv_data['Low']),
-            float(ohlcv_data['Close']),
-            int(ohlcv_data.get('Volume', 0)),
-            float(ohlcv_data.get('Adj Close', ohlcv_data['Close'])),
-            quality_score,
-            json.dumps(anomaly_flags) if anomaly_flags else None,
-            datetime.now()
-        ))
-        
-        conn.commit()
-        conn.close()
-        
-        # Log quality issues
-        if quality_score < 80:
-            print(f"⚠️  {symbol} {business_date}: Quality issues ({quality_score}): {anomaly_flags}")
-        
-        return True
+        data = pd.DataFrame([ohlcv_data], index=pd.DatetimeIndex([business_date]))
+        return guardar_barras_eod(symbol, data)['guardadas'] > 0
         
     except Exception as e:
         print(f"❌ Error inserting {symbol} {business_date}: {e}")
         return False
 
-def run_eod_job(business_date: str = None) -> Dict:
+def symbol_id_eod(cursor, symbol: str) -> int:
+    """symbol_id de un símbolo; si no está en el universo se registra inactivo (clasificación inferida)"""
+    cursor.execute('SELECT symbol_id FROM symbols WHERE symbol = ?', (symbol,))
+    row = cursor.fetchone()
+    if row:
+        return row[0]
+    
+    clasificacion = clasificar_symbol(symbol)
+    cursor.execute('''
+        INSERT INTO symbols (symbol, asset_class, exchange, currency, active)
+        VALUES (?, ?, ?, ?, 0)
+    ''', (symbol, clasificacion['asset_class'], clasificacion['exchange'], clasificacion['currency']))
+    return cursor.lastrowid
+
+def guardar_barras_eod(symbol: str, data: pd.DataFrame) -> Dict[str, int]:
+    """
+    Escritura de barras diarias de un símbolo (DataFrame estilo stock.history) para todos los
+    caminos de ingest: validación y continuidad por fila en memoria (la primera contra el último
+    cierre guardado, las siguientes contra la fila anterior del lote) y un upsert por lote en
+    market_data_eod_v2 en una transacción. Las filas con quality < 50 se descartan.
+    Devuelve {'guardadas', 'nuevas', 'actualizadas', 'descartadas'}.
+    """
+    resumen = {'guardadas': 0, 'nuevas': 0, 'actualizadas': 0, 'descartadas': 0}
+    if data.empty:
+        return resumen
+    
+    ahora = int(time.time())
+    fechas = data.index.strftime('%Y-%m-%d')
+    conn = connect_db('trading_dashboard.db')
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        symbol_id = symbol_id_eod(cursor, symbol)
+        
+        filas = []
+        prev_close = None
+        for fecha, ohlcv_data in zip(fechas, data.to_dict('records')):
+            quality_score, anomaly_flags = validate_ohlcv_data(symbol, ohlcv_data)
+            
+            try:
+                close = float(ohlcv_data['Close'])
+                if prev_close is None:
+                    continuity_ok, continuity_msg = check_data_continuity(symbol, close, fecha, conn)
+                else:
+                    continuity_ok, continuity_msg = evaluar_gap_precio(prev_close, close)
+            except (ValueError, TypeError, ZeroDivisionError) as e:
+                continuity_ok, continuity_msg = False, f"CONTINUITY_CHECK_ERROR_{str(e)}"
+            
+            if not continuity_ok:
+                anomaly_flags.append(continuity_msg)
+                quality_score -= 15
+            
+            # Solo insertar si quality score >= 50 (configurable)
+            if quality_score < 50:
+                print(f"❌ {symbol} {fecha}: Quality too low ({quality_score}): {anomaly_flags}")
+                resumen['descartadas'] += 1
+                continue
+            if quality_score < 80:
+                print(f"⚠️  {symbol} {fecha}: Quality issues ({quality_score}): {anomaly_flags}")
+            
+            prev_close = close
+            filas.append((
+                symbol_id,
+                dia_eod(fecha),
+                float(ohlcv_data['Open']),
+                float(ohlcv_data['High']),
+                float(ohlcv_data['Low']),
+                close,
+                int(ohlcv_data.get('Volume', 0)),
+                float(ohlcv_data.get('Adj Close', close)),
+                quality_score,
+                json.dumps(anomaly_flags) if anomaly_flags else None,
+                MARKET_DATA_PROVIDER,
+                ahora,
+                ahora
+            ))
+        
+        if filas:
+            # Días del lote que ya existían (un rango de la clave): nuevas vs actualizadas
+            dias = {fila[1] for fila in filas}
+            cursor.execute(
+                f'SELECT day FROM {EOD_TABLE} WHERE symbol_id = ? AND day BETWEEN ? AND ?',
+                (symbol_id, min(dias), max(dias))
+            )
+            existentes = len(dias.intersection(day for (day,) in cursor.fetchall()))
+            
+            cursor.executemany(f'''
+                INSERT INTO {EOD_TABLE}
+                (symbol_id, day, open_price, high_price, low_price, close_price, volume, adj_close,
+                 data_quality_score, anomaly_flags, data_source, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(symbol_id, day) DO UPDATE SET
+                    open_price = excluded.open_price, high_price = excluded.high_price,
+                    low_price = excluded.low_price, close_price = excluded.close_price,
+                    volume = excluded.volume, adj_close = excluded.adj_close,
+                    data_quality_score = excluded.data_quality_score,
+                    anomaly_flags = excluded.anomaly_flags, data_source = excluded.data_source,
+                    updated_at = excluded.updated_at
+            ''', filas)
+            resumen.update({
+                'guardadas': len(dias),
+                'nuevas': len(dias) - existentes,
+                'actualizadas': existentes
+            })
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    
+    return resumen
+
+def run_eod_job(business_date: str = None, symbols: Optional[List[str]] = None,
+                job_name: str = 'EOD_UPDATE') -> Dict:
     """
     Job principal EOD con manejo completo de errores
+    (symbols=None procesa todo el universo activo)
     """
+    if symbols is None:
+        symbols = get_universe()
+    
     if business_date is None:
         business_date = datetime.now().strftime('%Y-%m-%d')
     
@@ -1010,36 +2815,34 @@ def run_eod_job(business_date: str = None) -> Dict:
     symbols_processed = 0
     symbols_failed = 0
     failed_symbols = []
+    processed_symbols = []
     
     print(f"🚀 Starting EOD job for {business_date}")
     
     try:
         # Registrar inicio del job
-        conn = sqlite3.connect('trading_dashboard.db')
+        conn = connect_db('trading_dashboard.db')
         cursor = conn.cursor()
         
         cursor.execute('''
             INSERT OR REPLACE INTO job_status 
             (job_name, business_date, status, start_time, symbols_processed, symbols_failed)
             VALUES (?, ?, ?, ?, ?, ?)
-        ''', ('EOD_UPDATE', business_date, 'RUNNING', job_start, 0, 0))
+        ''', (job_name, business_date, 'RUNNING', job_start, 0, 0))
         
         conn.commit()
         conn.close()
         
         # Procesar cada símbolo
-        for symbol in MAIN_TICKERS:
+        for symbol in symbols:
             try:
                 print(f"Processing {symbol}...")
                 
-                # Obtener datos de yfinance
-                stock = yf.Ticker(symbol)
-                
                 # Obtener 2 días para asegurar que tenemos el día solicitado
                 end_date = (datetime.strptime(business_date, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
                 start_date = (datetime.strptime(business_date, '%Y-%m-%d') - timedelta(days=1)).strftime('%Y-%m-%d')
                 
-                data = stock.history(start=start_date, end=end_date)
+                data = descargar_historial(symbol, 'eod', start=start_date, end=end_date)
                 
                 if data.empty:
                     print(f"⚠️  No data for {symbol}")
@@ -1072,6 +2875,7 @@ def run_eod_job(business_date: str = None) -> Dict:
                 # Insertar/actualizar en BD
                 if insert_or_update_eod_data(symbol, business_date, ohlcv_data):
                     symbols_processed += 1
+                    processed_symbols.append(symbol)
                     print(f"✅ {symbol} processed successfully")
                 else:
                     symbols_failed += 1
@@ -1094,7 +2898,7 @@ def run_eod_job(business_date: str = None) -> Dict:
         else:
             status = 'FAILED'
         
-        conn = sqlite3.connect('trading_dashboard.db')
+        conn = connect_db('trading_dashboard.db')
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -1105,19 +2909,39 @@ def run_eod_job(business_date: str = None) -> Dict:
         ''', (
             status, job_end, symbols_processed, symbols_failed,
             json.dumps(failed_symbols) if failed_symbols else None,
-            'EOD_UPDATE', business_date
+            job_name, business_date
         ))
         
         conn.commit()
         conn.close()
         
-        print(f"🏁 EOD job completed in {job_duration:.1f}s")
+        EOD_JOB_SECONDS.observe(job_duration, job=job_name)
+        EOD_JOB_SYMBOLS.inc(symbols_processed, job=job_name, outcome='processed')
+        EOD_JOB_SYMBOLS.inc(symbols_failed, job=job_name, outcome='failed')
+        if job_duration > 0:
+            EOD_JOB_SYMBOLS_PER_SECOND.set(symbols_processed / job_duration, job=job_name)
+        
+        print(f"🏁 EOD job {job_name} completed in {job_duration:.1f}s")
         print(f"✅ Processed: {symbols_processed}")
         print(f"❌ Failed: {symbols_failed}")
         
         if failed_symbols:
             print(f"Failed symbols: {failed_symbols[:5]}...")  # Mostrar solo primeros 5
         
+        # Datos nuevos: invalidar y reconstruir los snapshots del dashboard
+        if processed_symbols:
+            eod_version = cerrar_ingest_eod()
+            refresh_dashboard_snapshots(tickers=processed_symbols)
+            publicar_evento('eod', {
+                'data_version': eod_version,
+                'business_date': business_date,
+                'symbols': processed_symbols
+            })
+            
+            senales = detectar_senales_nuevas(processed_symbols, business_date)
+            if senales:
+                publicar_evento('signals', {'business_date': business_date, 'signals': senales})
+        
         return {
             'status': status,
             'business_date': business_date,
@@ -1132,12 +2956,12 @@ def run_eod_job(business_date: str = None) -> Dict:
         print(f"💥 Critical error in EOD job: {e}")
         
         try:
-            conn = sqlite3.connect('trading_dashboard.db')
+            conn = connect_db('trading_dashboard.db')
             cursor = conn.cursor()
             cursor.execute('''
                 UPDATE job_status SET status = ?, end_time = ?, error_details = ?
                 WHERE job_name = ? AND business_date = ?
-            ''', ('FAILED', datetime.now(), str(e), 'EOD_UPDATE', business_date))
+            ''', ('FAILED', datetime.now(), str(e), job_name, business_date))
             conn.commit()
             conn.close()
         except:
@@ -1148,13 +2972,42 @@ def run_eod_job(business_date: str = None) -> Dict:
             'error': str(e)
         }
 
+def detectar_senales_nuevas(symbols: List[str], business_date: str) -> List[Dict]:
+    """
+    Símbolos cuyo VIX_Fix está en verde en business_date (tras cargar el EOD y publicar el
+    snapshot): el mismo escaneo vectorizado que /screener, solo la última sesión
+    """
+    strategy = VixFixStrategy()
+    resultado = escanear(
+        uri_lectura_eod(), symbols, business_date, 1,
+        pd_period=strategy.pd_period, bbl=strategy.bbl, mult=strategy.mult,
+        lb=strategy.lb, ph=strategy.ph
+    )
+    
+    # Un símbolo sin barra en business_date reporta su última sesión: no es una señal nueva
+    senales = [
+        {k: senal[k] for k in ('ticker', 'close', 'wvf', 'upper_band', 'range_high')}
+        for senal in resultado['signals'] if senal['business_date'] == business_date
+    ]
+    
+    if senales:
+        print(f"🟢 Señales nuevas {business_date}: {[s['ticker'] for s in senales]}")
+    
+    return senales
+
 @app.post("/run-eod-job")
-async def run_eod_job_endpoint(business_date: str = Query(None, description="Fecha para EOD job (YYYY-MM-DD, default: hoy)")):
+async def run_eod_job_endpoint(
+    business_date: str = Query(None, description="Fecha para EOD job (YYYY-MM-DD, default: hoy)"),
+    universo: Dict = Depends(filtro_universo)
+):
     """
-    Ejecutar EOD job manualmente
+    Ejecutar EOD job manualmente (todo el universo activo o el subconjunto filtrado)
     """
+    def ejecutar():
+        return run_eod_job(business_date, get_universe(**universo))
+    
     try:
-        result = run_eod_job(business_date)
+        result = await asyncio.to_thread(ejecutar)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error running EOD job: {str(e)}")
@@ -1168,7 +3021,7 @@ async def get_eod_job_status(business_date: str = Query(None, description="Fecha
         if business_date is None:
             business_date = datetime.now().strftime('%Y-%m-%d')
         
-        conn = sqlite3.connect('trading_dashboard.db')
+        conn = connect_db('trading_dashboard.db')
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -1204,38 +3057,135 @@ async def get_eod_job_status(business_date: str = Query(None, description="Fecha
         raise HTTPException(status_code=500, detail=f"Error getting job status: {str(e)}")
 
 # =====================================================
-# SISTEMA DE CARGA INICIAL MASIVA (2 AÑOS)
+# COBERTURA POR SÍMBOLO (TABLA symbol_coverage)
 # =====================================================
 
-def check_symbol_data_sufficiency(symbol: str, min_days: int = 300) -> Dict:
+def refrescar_cobertura() -> int:
     """
-    Verificar si un símbolo tiene suficientes datos históricos
+    Recalcular en un solo UPDATE la cobertura de los símbolos marcados stale por los triggers
+    (un rango de la clave symbol_id+day por símbolo). Devuelve cuántos se recalcularon.
     """
+    conn = connect_db('trading_dashboard.db')
+    cursor = conn.cursor()
+    
     try:
-        conn = sqlite3.connect('trading_dashboard.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT COUNT(*), MIN(business_date), MAX(business_date)
-            FROM market_data_eod 
-            WHERE symbol = ?
-        ''', (symbol,))
+        cursor.execute('SELECT 1 FROM symbol_coverage WHERE stale = 1 LIMIT 1')
+        if cursor.fetchone() is None:
+            return 0
+        
+        cursor.execute('BEGIN IMMEDIATE')
+        symbol_id = 'SELECT symbol_id FROM symbols WHERE symbol = symbol_coverage.symbol'
+        cursor.execute(f'''
+            UPDATE symbol_coverage SET
+                (record_count, first_date, last_date, min_quality_score, avg_quality_score,
+                 low_quality_count, last_update) = (
+                    SELECT COUNT(*), {sql_fecha('MIN(e.day)')}, {sql_fecha('MAX(e.day)')}, MIN(e.data_quality_score),
+                           AVG(e.data_quality_score), COUNT(*) FILTER (WHERE e.data_quality_score < ?),
+                           datetime(MAX(e.updated_at), 'unixepoch')
+                    FROM {EOD_TABLE} e WHERE e.symbol_id = ({symbol_id})
+                ),
+                last_quality_score = (
+                    SELECT e.data_quality_score FROM {EOD_TABLE} e
+                    WHERE e.symbol_id = ({symbol_id})
+                    ORDER BY e.day DESC LIMIT 1
+                ),
+                stale = 0
+            WHERE stale = 1
+        ''', (INTEGRITY_MIN_QUALITY,))
+        refrescados = cursor.rowcount
+        
+        # Símbolos a los que se les borró toda la historia
+        cursor.execute('DELETE FROM symbol_coverage WHERE record_count = 0')
+        conn.commit()
+        return refrescados
         
-        result = cursor.fetchone()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
         conn.close()
-        
-        count = result[0] if result else 0
-        min_date = result[1] if result else None
-        max_date = result[2] if result else None
-        
-        return {
-            'symbol': symbol,
-            'records': count,
-            'min_date': min_date,
-            'max_date': max_date,
-            'sufficient': count >= min_days,
-            'missing_days': max(0, min_days - count)
-        }
+
+def get_symbol_coverage(symbols: Optional[List[str]] = None, desde_snapshot: bool = False) -> Dict[str, Dict]:
+    """
+    Cobertura por símbolo en una sola consulta (symbols=None: todos los que tienen datos).
+    desde_snapshot=True lee el snapshot de lectura (refrescado al publicarse, sin escribir).
+    """
+    if desde_snapshot:
+        conn = connect_lectura()
+    else:
+        refrescar_cobertura()
+        conn = connect_db('trading_dashboard.db')
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    
+    query = '''
+        SELECT symbol, record_count, first_date, last_date, last_quality_score,
+               min_quality_score, avg_quality_score, low_quality_count, last_update, stale
+        FROM symbol_coverage
+    '''
+    if symbols is None:
+        cursor.execute(query)
+    else:
+        cursor.execute(f"{query} WHERE symbol IN (SELECT value FROM json_each(?))", (json.dumps(list(symbols)),))
+    
+    coverage = {}
+    stale = []
+    for row in cursor.fetchall():
+        fila = dict(row)
+        if fila.pop('stale'):
+            stale.append(row['symbol'])
+        else:
+            coverage[row['symbol']] = fila
+    
+    # Filas stale (snapshot publicado por otro camino o BD sin refrescar): se calculan al vuelo
+    if stale:
+        coverage.update(calcular_cobertura(cursor, stale))
+    conn.close()
+    return coverage
+
+def calcular_cobertura(cursor, symbols: List[str]) -> Dict[str, Dict]:
+    """
+    Cobertura de los símbolos pedidos calculada directo de la tabla EOD, sin escribir
+    (mismas columnas que symbol_coverage; un símbolo sin filas no aparece)
+    """
+    cursor.execute(f'''
+        SELECT s.symbol, COUNT(*) AS record_count,
+               {sql_fecha('MIN(e.day)')} AS first_date, {sql_fecha('MAX(e.day)')} AS last_date,
+               (SELECT u.data_quality_score FROM {EOD_TABLE} u
+                WHERE u.symbol_id = s.symbol_id ORDER BY u.day DESC LIMIT 1) AS last_quality_score,
+               MIN(e.data_quality_score) AS min_quality_score, AVG(e.data_quality_score) AS avg_quality_score,
+               COUNT(*) FILTER (WHERE e.data_quality_score < ?) AS low_quality_count,
+               datetime(MAX(e.updated_at), 'unixepoch') AS last_update
+        FROM symbols s JOIN {EOD_TABLE} e ON e.symbol_id = s.symbol_id
+        WHERE s.symbol IN (SELECT value FROM json_each(?))
+        GROUP BY s.symbol_id
+    ''', (INTEGRITY_MIN_QUALITY, json.dumps(symbols)))
+    return {row[0]: dict(zip([d[0] for d in cursor.description], row)) for row in cursor.fetchall()}
+
+def evaluar_suficiencia(symbol: str, coverage: Optional[Dict], min_days: int) -> Dict:
+    """
+    Suficiencia de datos de un símbolo a partir de su fila de symbol_coverage (None = sin datos)
+    """
+    count = coverage['record_count'] if coverage else 0
+    return {
+        'symbol': symbol,
+        'records': count,
+        'min_date': coverage['first_date'] if coverage else None,
+        'max_date': coverage['last_date'] if coverage else None,
+        'sufficient': count >= min_days,
+        'missing_days': max(0, min_days - count)
+    }
+
+# =====================================================
+# SISTEMA DE CARGA INICIAL MASIVA (2 AÑOS)
+# =====================================================
+
+def check_symbol_data_sufficiency(symbol: str, min_days: int = 300) -> Dict:
+    """
+    Verificar si un símbolo tiene suficientes datos históricos
+    """
+    try:
+        return evaluar_suficiencia(symbol, get_symbol_coverage([symbol]).get(symbol), min_days)
         
     except Exception as e:
         return {
@@ -1257,8 +3207,7 @@ def load_historical_data_for_symbol(symbol: str, years_back: int = 2) -> Dict:
         start_date = end_date - timedelta(days=years_back * 365)
         
         # Descargar datos
-        stock = yf.Ticker(symbol)
-        data = stock.history(start=start_date.strftime('%Y-%m-%d'), end=end_date.strftime('%Y-%m-%d'))
+        data = descargar_historial(symbol, 'historical', start=start_date.strftime('%Y-%m-%d'), end=end_date.strftime('%Y-%m-%d'))
         
         if data.empty:
             return {
@@ -1268,47 +3217,10 @@ def load_historical_data_for_symbol(symbol: str, years_back: int = 2) -> Dict:
                 'records_updated': 0
             }
         
-        # Insertar en BD
-        conn = sqlite3.connect('trading_dashboard.db')
-        cursor = conn.cursor()
-        
-        records_added = 0
-        records_updated = 0
-        
-        for fecha, row in data.iterrows():
-            fecha_str = fecha.strftime('%Y-%m-%d')
-            
-            # Verificar si ya existe
-            cursor.execute('SELECT COUNT(*) FROM market_data_eod WHERE symbol = ? AND business_date = ?', 
-                         (symbol, fecha_str))
-            exists = cursor.fetchone()[0] > 0
-            
-            if exists:
-                # Actualizar
-                cursor.execute('''
-                    UPDATE market_data_eod 
-                    SET open_price = ?, high_price = ?, low_price = ?, close_price = ?, 
-                        volume = ?, updated_at = CURRENT_TIMESTAMP
-                    WHERE symbol = ? AND business_date = ?
-                ''', (
-                    float(row['Open']), float(row['High']), float(row['Low']), 
-                    float(row['Close']), int(row['Volume']), symbol, fecha_str
-                ))
-                records_updated += 1
-            else:
-                # Insertar nuevo
-                cursor.execute('''
-                    INSERT INTO market_data_eod 
-                    (symbol, business_date, open_price, high_price, low_price, close_price, volume)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    symbol, fecha_str, float(row['Open']), float(row['High']), 
-                    float(row['Low']), float(row['Close']), int(row['Volume'])
-                ))
-                records_added += 1
-        
-        conn.commit()
-        conn.close()
+        # Insertar en BD (upsert por lote, misma validación que el EOD job)
+        resumen = guardar_barras_eod(symbol, data)
+        records_added = resumen['nuevas']
+        records_updated = resumen['actualizadas']
         
         print(f"OK {symbol}: {records_added} nuevos, {records_updated} actualizados")
         
@@ -1330,9 +3242,10 @@ def load_historical_data_for_symbol(symbol: str, years_back: int = 2) -> Dict:
             'records_updated': 0
         }
 
-def run_initial_data_load(years_back: int = 2, force_reload: bool = False) -> Dict:
+def run_initial_data_load(years_back: int = 2, force_reload: bool = False,
+                          symbols: Optional[List[str]] = None) -> Dict:
     """
-    Carga inicial masiva de datos históricos para todos los símbolos
+    Carga inicial masiva de datos históricos (symbols=None: todo el universo activo)
     """
     job_start = datetime.now()
     print(f"Iniciando carga inicial masiva de {years_back} años de datos...")
@@ -1344,10 +3257,13 @@ def run_initial_data_load(years_back: int = 2, force_reload: bool = False) -> Di
     total_records_added = 0
     
     try:
-        for symbol in MAIN_TICKERS:
+        symbols = symbols if symbols is not None else get_universe()
+        coverage = {} if force_reload else get_symbol_coverage(symbols)
+        
+        for symbol in symbols:
             # Verificar si necesita datos (a menos que force_reload=True)
             if not force_reload:
-                sufficiency = check_symbol_data_sufficiency(symbol, min_days=years_back * 250)  # ~250 días hábiles por año
+                sufficiency = evaluar_suficiencia(symbol, coverage.get(symbol), min_days=years_back * 250)  # ~250 días hábiles por año
                 if sufficiency['sufficient']:
                     print(f"SKIP {symbol}: Suficientes datos ({sufficiency['records']} registros)")
                     continue
@@ -1371,7 +3287,7 @@ def run_initial_data_load(years_back: int = 2, force_reload: bool = False) -> Di
         duration = (job_end - job_start).total_seconds()
         
         # Registrar en job_status
-        conn = sqlite3.connect('trading_dashboard.db')
+        conn = connect_db('trading_dashboard.db')
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -1393,6 +3309,9 @@ def run_initial_data_load(years_back: int = 2, force_reload: bool = False) -> Di
         conn.commit()
         conn.close()
         
+        if symbols_successful > 0:
+            cerrar_ingest_eod()
+        
         print(f"Carga inicial completada:")
         print(f"   - Simbolos procesados: {symbols_processed}")
         print(f"   - Exitosos: {symbols_successful}")
@@ -1423,35 +3342,44 @@ def run_initial_data_load(years_back: int = 2, force_reload: bool = False) -> Di
 @app.post("/initial-data-load")
 async def run_initial_data_load_endpoint(
     years_back: int = Query(2, description="Años de datos históricos a cargar"),
-    force_reload: bool = Query(False, description="Forzar recarga incluso si hay datos")
+    force_reload: bool = Query(False, description="Forzar recarga incluso si hay datos"),
+    universo: Dict = Depends(filtro_universo)
 ):
     """
     Ejecutar carga inicial masiva de datos históricos
     """
+    def ejecutar():
+        return run_initial_data_load(years_back, force_reload, get_universe(**universo))
+    
     try:
-        result = run_initial_data_load(years_back, force_reload)
+        result = await asyncio.to_thread(ejecutar)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error in initial data load: {str(e)}")
 
 @app.get("/data-sufficiency-check")
-async def check_all_symbols_data_sufficiency(min_days: int = Query(300, description="Días mínimos requeridos")):
+async def check_all_symbols_data_sufficiency(
+    min_days: int = Query(300, description="Días mínimos requeridos"),
+    universo: Dict = Depends(filtro_universo)
+):
     """
-    Verificar suficiencia de datos para todos los símbolos
+    Verificar suficiencia de datos para los símbolos activos (o el subconjunto filtrado)
     """
     try:
         results = []
         insufficient_symbols = []
+        symbols = await asyncio.to_thread(get_universe, **universo)
+        coverage = await asyncio.to_thread(get_symbol_coverage, symbols, True)
         
-        for symbol in MAIN_TICKERS:
-            sufficiency = check_symbol_data_sufficiency(symbol, min_days)
+        for symbol in symbols:
+            sufficiency = evaluar_suficiencia(symbol, coverage.get(symbol), min_days)
             results.append(sufficiency)
             
             if not sufficiency.get('sufficient', False):
                 insufficient_symbols.append(symbol)
         
         return {
-            'total_symbols': len(MAIN_TICKERS),
+            'total_symbols': len(symbols),
             'sufficient_symbols': len([r for r in results if r.get('sufficient', False)]),
             'insufficient_symbols': len(insufficient_symbols),
             'insufficient_list': insufficient_symbols,
@@ -1470,80 +3398,299 @@ async def check_all_symbols_data_sufficiency(min_days: int = Query(300, descript
 # SISTEMA DE INTEGRIDAD Y RECUPERACIÓN
 # =====================================================
 
-def check_data_integrity() -> Dict:
+# Checks persistidos en data_integrity_log: el log guarda solo hallazgos abiertos
+INTEGRITY_CHECK_TYPES = ('DATE_GAP', 'LOW_QUALITY', 'INSUFFICIENT_DATA')
+INTEGRITY_MIN_QUALITY = 80    # data_quality_score por debajo = LOW_QUALITY
+INTEGRITY_MIN_RECORDS = 30    # Menos registros por símbolo = INSUFFICIENT_DATA
+
+def run_integrity_check(full: bool = False) -> Dict:
     """
-    Verificar integridad de datos históricos
+    Checks de integridad en SQL sobre las filas encoladas en integrity_pending desde el último
+    chequeo (los triggers de market_data_eod_v2 son el checkpoint). Los hallazgos se guardan en
+    data_integrity_log y los que dejan de aplicar se borran.
+    full=True vuelve a encolar toda la historia (reconstrucción completa del log).
     """
+    job_start = datetime.now()
+    business_date = job_start.strftime('%Y-%m-%d')
+    conn = connect_db('trading_dashboard.db')
+    cursor = conn.cursor()
+    
     try:
-        conn = sqlite3.connect('trading_dashboard.db')
-        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
         
-        # Check 1: Buscar gaps en fechas
-        cursor.execute('''
-            SELECT symbol, business_date, 
-                   LAG(business_date) OVER (PARTITION BY symbol ORDER BY business_date) as prev_date
-            FROM market_data_eod
-            ORDER BY symbol, business_date
-        ''')
+        if full:
+            cursor.execute('''
+                INSERT OR IGNORE INTO integrity_pending (symbol, business_date)
+                SELECT symbol, business_date FROM market_data_eod
+            ''')
+            cursor.execute(
+                f"DELETE FROM data_integrity_log WHERE check_type IN ({','.join('?' * len(INTEGRITY_CHECK_TYPES))})",
+                INTEGRITY_CHECK_TYPES
+            )
         
-        data_gaps = []
-        for row in cursor.fetchall():
-            symbol, current_date, prev_date = row
-            if prev_date:
-                current = datetime.strptime(current_date, '%Y-%m-%d').date()
-                previous = datetime.strptime(prev_date, '%Y-%m-%d').date()
-                gap_days = (current - previous).days
-                
-                if gap_days > 5:  # Más de 5 días = posible gap de mercado
-                    data_gaps.append({
-                        'symbol': symbol,
-                        'gap_from': prev_date,
-                        'gap_to': current_date,
-                        'gap_days': gap_days
-                    })
-        
-        # Check 2: Buscar datos con quality score bajo
+        cursor.execute('DROP TABLE IF EXISTS temp.integrity_lote')
         cursor.execute('''
-            SELECT symbol, business_date, data_quality_score, anomaly_flags
-            FROM market_data_eod
-            WHERE data_quality_score < 80
-            ORDER BY data_quality_score ASC
+            CREATE TEMP TABLE integrity_lote (
+                symbol TEXT, business_date DATE, symbol_id INTEGER, day INTEGER,
+                PRIMARY KEY (symbol, business_date)
+            ) WITHOUT ROWID
         ''')
+        # symbol_id/day para leer market_data_eod_v2 por su clave (NULL: símbolo ya borrado de symbols)
+        cursor.execute(f'''
+            INSERT INTO integrity_lote
+            SELECT p.symbol, p.business_date, s.symbol_id, {sql_dia('p.business_date')}
+            FROM integrity_pending p
+            LEFT JOIN symbols s ON s.symbol = p.symbol
+        ''')
+        rows_checked = cursor.rowcount
         
-        low_quality = []
-        for row in cursor.fetchall():
-            low_quality.append({
-                'symbol': row[0],
-                'business_date': row[1],
-                'quality_score': row[2],
-                'anomaly_flags': json.loads(row[3]) if row[3] else []
-            })
+        if rows_checked:
+            _integrity_check_gaps(cursor)
+            _integrity_check_quality(cursor)
+            _integrity_check_coverage(cursor)
+            cursor.execute('DELETE FROM integrity_pending')
+        
+        cursor.execute('DROP TABLE IF EXISTS temp.integrity_lote')
+        conn.commit()
         
-        # Check 3: Verificar símbolos con muy pocos datos
+        job_end = datetime.now()
         cursor.execute('''
-            SELECT symbol, COUNT(*) as record_count
-            FROM market_data_eod
-            GROUP BY symbol
-            HAVING COUNT(*) < 30  -- Menos de 30 días
-            ORDER BY COUNT(*) ASC
-        ''')
+            INSERT OR REPLACE INTO job_status
+            (job_name, business_date, status, symbols_processed, symbols_failed, start_time, end_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', ('INTEGRITY_CHECK', business_date, 'SUCCESS', rows_checked, 0, job_start, job_end))
+        conn.commit()
+        
+        duration = (job_end - job_start).total_seconds()
+        if rows_checked:
+            print(f"🔎 Integrity check ({'full' if full else 'incremental'}): {rows_checked} filas en {duration:.2f}s")
+        
+        return {
+            'status': 'SUCCESS',
+            'mode': 'full' if full else 'incremental',
+            'rows_checked': rows_checked,
+            'duration_seconds': duration
+        }
+        
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Error en integrity check: {e}")
+        return {'status': 'FAILED', 'error': str(e)}
+    finally:
+        conn.close()
+
+def _integrity_check_gaps(cursor):
+    """
+    DATE_GAP: días de mercado faltantes entre cada fila y la anterior del mismo símbolo, según el
+    calendario del exchange (MARKET_SCHEDULES). Se recalculan las filas del lote y la siguiente de
+    cada una (insertar o borrar una fila cambia el gap de la que sigue).
+    """
+    cursor.execute('DROP TABLE IF EXISTS temp.integrity_calendario')
+    cursor.execute('''
+        CREATE TEMP TABLE integrity_calendario (
+            exchange TEXT PRIMARY KEY, dias_mercado TEXT, tolerancia INTEGER
+        )
+    ''')
+    # market_days usa weekday() (0=lunes); strftime('%w') de SQLite usa 0=domingo
+    cursor.executemany('INSERT INTO integrity_calendario VALUES (?, ?, ?)', [
+        (exchange, ''.join(str((dia + 1) % 7) for dia in config['market_days']), config.get('max_missing_days', 0))
+        for exchange, config in MARKET_SCHEDULES.items()
+    ])
+    
+    cursor.execute('DROP TABLE IF EXISTS temp.integrity_afectados')
+    cursor.execute('''
+        CREATE TEMP TABLE integrity_afectados (
+            symbol_id INTEGER, day INTEGER, symbol TEXT, prev_day INTEGER, PRIMARY KEY (symbol_id, day)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute(f'''
+        INSERT OR IGNORE INTO integrity_afectados (symbol_id, day, symbol)
+        SELECT symbol_id, day, symbol FROM integrity_lote WHERE symbol_id IS NOT NULL
+        UNION
+        SELECT symbol_id, siguiente, symbol FROM (
+            SELECT l.symbol_id, l.symbol, (
+                SELECT MIN(e.day) FROM {EOD_TABLE} e
+                WHERE e.symbol_id = l.symbol_id AND e.day > l.day
+            ) AS siguiente
+            FROM integrity_lote l
+            WHERE l.symbol_id IS NOT NULL
+        )
+        WHERE siguiente IS NOT NULL
+    ''')
+    cursor.execute(f'''
+        UPDATE integrity_afectados SET prev_day = (
+            SELECT MAX(e.day) FROM {EOD_TABLE} e
+            WHERE e.symbol_id = integrity_afectados.symbol_id AND e.day < integrity_afectados.day
+        )
+    ''')
+    
+    cursor.execute(f'''
+        DELETE FROM data_integrity_log
+        WHERE check_type = 'DATE_GAP'
+          AND (symbol, business_date) IN (
+              SELECT symbol, {sql_fecha('day')} FROM integrity_afectados
+              UNION
+              SELECT symbol, business_date FROM integrity_lote
+          )
+    ''')
+    # day 0 (1970-01-01) fue jueves: strftime('%w') equivale a (day + 4) % 7
+    cursor.execute(f'''
+        WITH RECURSIVE candidatos AS (
+            SELECT a.symbol_id, a.day, a.prev_day, a.symbol, c.dias_mercado, c.tolerancia
+            FROM integrity_afectados a
+            JOIN symbols s ON s.symbol_id = a.symbol_id
+            JOIN integrity_calendario c ON c.exchange = s.exchange
+            WHERE a.prev_day IS NOT NULL
+              AND a.day - a.prev_day > 1
+              AND EXISTS (
+                  SELECT 1 FROM {EOD_TABLE} e
+                  WHERE e.symbol_id = a.symbol_id AND e.day = a.day
+              )
+        ),
+        dias (symbol_id, day, dia) AS (
+            SELECT symbol_id, day, prev_day + 1 FROM candidatos
+            UNION ALL
+            SELECT symbol_id, day, dia + 1 FROM dias
+            WHERE dia + 1 < day
+        ),
+        faltantes AS (
+            SELECT d.symbol_id, d.day, COUNT(*) AS dias_faltantes
+            FROM dias d
+            JOIN candidatos c ON c.symbol_id = d.symbol_id AND c.day = d.day
+            WHERE instr(c.dias_mercado, (d.dia + 4) % 7) > 0
+            GROUP BY d.symbol_id, d.day
+        )
+        INSERT INTO data_integrity_log (symbol, business_date, check_type, status, details, checked_at)
+        SELECT c.symbol, {sql_fecha('c.day')}, 'DATE_GAP', 'FAIL',
+               json_object(
+                   'gap_from', {sql_fecha('c.prev_day')},
+                   'gap_days', c.day - c.prev_day,
+                   'missing_market_days', f.dias_faltantes
+               ),
+               CURRENT_TIMESTAMP
+        FROM candidatos c
+        JOIN faltantes f ON f.symbol_id = c.symbol_id AND f.day = c.day
+        WHERE f.dias_faltantes > c.tolerancia
+    ''')
+    
+    cursor.execute('DROP TABLE IF EXISTS temp.integrity_afectados')
+    cursor.execute('DROP TABLE IF EXISTS temp.integrity_calendario')
+
+def _integrity_check_quality(cursor):
+    """
+    LOW_QUALITY: filas del lote con data_quality_score bajo (FAIL si quedó por debajo del
+    mínimo que acepta insert_or_update_eod_data, p.ej. cargas directas)
+    """
+    cursor.execute('''
+        DELETE FROM data_integrity_log
+        WHERE check_type = 'LOW_QUALITY'
+          AND (symbol, business_date) IN (SELECT symbol, business_date FROM integrity_lote)
+    ''')
+    cursor.execute(f'''
+        INSERT INTO data_integrity_log (symbol, business_date, check_type, status, details, checked_at)
+        SELECT l.symbol, l.business_date, 'LOW_QUALITY',
+               CASE WHEN e.data_quality_score < 50 THEN 'FAIL' ELSE 'WARNING' END,
+               json_object(
+                   'quality_score', e.data_quality_score,
+                   'anomaly_flags', CASE WHEN json_valid(e.anomaly_flags) THEN json(e.anomaly_flags) ELSE json_array() END
+               ),
+               CURRENT_TIMESTAMP
+        FROM integrity_lote l
+        JOIN {EOD_TABLE} e ON e.symbol_id = l.symbol_id AND e.day = l.day
+        WHERE e.data_quality_score < ?
+    ''', (INTEGRITY_MIN_QUALITY,))
+
+def _integrity_check_coverage(cursor):
+    """
+    INSUFFICIENT_DATA: símbolos del lote con menos de INTEGRITY_MIN_RECORDS registros
+    (un hallazgo por símbolo, fechado en su último registro)
+    """
+    cursor.execute('''
+        DELETE FROM data_integrity_log
+        WHERE check_type = 'INSUFFICIENT_DATA'
+          AND symbol IN (SELECT symbol FROM integrity_lote)
+    ''')
+    cursor.execute(f'''
+        INSERT INTO data_integrity_log (symbol, business_date, check_type, status, details, checked_at)
+        SELECT s.symbol, {sql_fecha('MAX(e.day)')}, 'INSUFFICIENT_DATA', 'WARNING',
+               json_object('record_count', COUNT(*), 'first_date', {sql_fecha('MIN(e.day)')}),
+               CURRENT_TIMESTAMP
+        FROM {EOD_TABLE} e
+        JOIN symbols s ON s.symbol_id = e.symbol_id
+        WHERE e.symbol_id IN (SELECT symbol_id FROM integrity_lote)
+        GROUP BY e.symbol_id
+        HAVING COUNT(*) < ?
+    ''', (INTEGRITY_MIN_RECORDS,))
+
+def check_data_integrity(refresh: bool = False) -> Dict:
+    """
+    Hallazgos abiertos de data_integrity_log (lectura indexada) del snapshot de lectura.
+    refresh=True procesa antes las filas pendientes desde el último chequeo y lee la BD principal.
+    """
+    try:
+        if refresh:
+            run_integrity_check()
+            conn = connect_db('trading_dashboard.db')
+        else:
+            conn = connect_lectura()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            SELECT symbol, business_date, check_type, status, details
+            FROM data_integrity_log
+            WHERE check_type IN ({','.join('?' * len(INTEGRITY_CHECK_TYPES))})
+            ORDER BY symbol, business_date
+        ''', INTEGRITY_CHECK_TYPES)
         
+        data_gaps = []
+        low_quality = []
         insufficient_data = []
-        for row in cursor.fetchall():
-            insufficient_data.append({
-                'symbol': row[0],
-                'record_count': row[1]
-            })
+        for symbol, business_date, check_type, status, details in cursor.fetchall():
+            details = json.loads(details) if details else {}
+            if check_type == 'DATE_GAP':
+                data_gaps.append({
+                    'symbol': symbol,
+                    'gap_from': details.get('gap_from'),
+                    'gap_to': business_date,
+                    'gap_days': details.get('gap_days'),
+                    'missing_market_days': details.get('missing_market_days')
+                })
+            elif check_type == 'LOW_QUALITY':
+                low_quality.append({
+                    'symbol': symbol,
+                    'business_date': business_date,
+                    'quality_score': details.get('quality_score'),
+                    'anomaly_flags': details.get('anomaly_flags', []),
+                    'status': status
+                })
+            else:
+                insufficient_data.append({
+                    'symbol': symbol,
+                    'record_count': details.get('record_count')
+                })
         
+        cursor.execute('SELECT COUNT(*) FROM integrity_pending')
+        pending_rows = cursor.fetchone()[0]
+        cursor.execute('''
+            SELECT end_time FROM job_status
+            WHERE job_name = 'INTEGRITY_CHECK' AND status = 'SUCCESS'
+            ORDER BY business_date DESC LIMIT 1
+        ''')
+        ultimo = cursor.fetchone()
         conn.close()
         
+        low_quality.sort(key=lambda r: r['quality_score'])
+        insufficient_data.sort(key=lambda r: r['record_count'])
+        
         return {
             'data_gaps': data_gaps,
             'low_quality_records': low_quality,
             'insufficient_data_symbols': insufficient_data,
             'total_gaps': len(data_gaps),
             'total_low_quality': len(low_quality),
-            'total_insufficient': len(insufficient_data)
+            'total_insufficient': len(insufficient_data),
+            'pending_rows': pending_rows,
+            'last_checked_at': ultimo[0] if ultimo else None
         }
         
     except Exception as e:
@@ -1573,10 +3720,10 @@ def repair_data_gaps(symbol: str, start_date: str, end_date: str) -> Dict:
         
         for date in business_dates:
             # Verificar si ya existe
-            conn = sqlite3.connect('trading_dashboard.db')
+            conn = connect_db('trading_dashboard.db')
             cursor = conn.cursor()
             cursor.execute(
-                'SELECT COUNT(*) FROM market_data_eod WHERE symbol = ? AND business_date = ?',
+                f'SELECT COUNT(*) FROM {EOD_TABLE} WHERE {WHERE_CLAVE_EOD}',
                 (symbol, date)
             )
             exists = cursor.fetchone()[0] > 0
@@ -1585,9 +3732,8 @@ def repair_data_gaps(symbol: str, start_date: str, end_date: str) -> Dict:
             if not exists:
                 try:
                     # Intentar obtener datos para esta fecha
-                    stock = yf.Ticker(symbol)
                     next_date = (datetime.strptime(date, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
-                    data = stock.history(start=date, end=next_date)
+                    data = descargar_historial(symbol, 'repair', start=date, end=next_date)
                     
                     if not data.empty:
                         row = data.iloc[0]
@@ -1611,6 +3757,9 @@ def repair_data_gaps(symbol: str, start_date: str, end_date: str) -> Dict:
                 except Exception as e:
                     failed_dates.append(f"{date}: {str(e)}")
         
+        if repaired_count > 0:
+            cerrar_ingest_eod()
+        
         return {
             'symbol': symbol,
             'period': f"{start_date} to {end_date}",
@@ -1623,16 +3772,49 @@ def repair_data_gaps(symbol: str, start_date: str, end_date: str) -> Dict:
         return {'error': str(e)}
 
 @app.get("/data-integrity-check")
-async def data_integrity_check():
+async def data_integrity_check(
+    refresh: bool = Query(False, description="Procesar antes las filas pendientes desde el último chequeo")
+):
     """
-    Endpoint para verificar integridad de datos
+    Endpoint para verificar integridad de datos (lee los hallazgos de data_integrity_log)
     """
     try:
-        result = check_data_integrity()
+        result = await asyncio.to_thread(check_data_integrity, refresh)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error checking data integrity: {str(e)}")
 
+@app.post("/run-integrity-check")
+async def run_integrity_check_endpoint(
+    full: bool = Query(False, description="Re-chequear toda la historia en lugar de solo lo pendiente")
+):
+    """
+    Endpoint para correr los checks de integridad (incremental por defecto)
+    """
+    result = await asyncio.to_thread(run_integrity_check, full)
+    if result['status'] == 'FAILED':
+        raise HTTPException(status_code=500, detail=f"Error running integrity check: {result['error']}")
+    if result['rows_checked']:
+        await asyncio.to_thread(publicar_snapshot_lectura)
+    return result
+
+@app.get("/read-snapshot")
+async def get_read_snapshot():
+    """
+    Estado del snapshot de lectura (versión EOD publicada frente a la BD principal)
+    """
+    return await asyncio.to_thread(estado_snapshot_lectura)
+
+@app.post("/read-snapshot/publish")
+async def publish_read_snapshot():
+    """
+    Publicar un snapshot de lectura nuevo (ej: después de cargar datos con scripts externos)
+    """
+    result = await asyncio.to_thread(publicar_snapshot_lectura)
+    if result['status'] == 'FAILED':
+        raise HTTPException(status_code=500, detail=f"Error publishing read snapshot: {result['error']}")
+    return result
+
 @app.post("/repair-data-gaps")
 async def repair_data_gaps_endpoint(
     symbol: str = Query(..., description="Símbolo a reparar"),
@@ -1643,7 +3825,7 @@ async def repair_data_gaps_endpoint(
     Endpoint para reparar gaps de datos
     """
     try:
-        result = repair_data_gaps(symbol, start_date, end_date)
+        result = await asyncio.to_thread(repair_data_gaps, symbol, start_date, end_date)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error repairing data gaps: {str(e)}")
@@ -1651,58 +3833,37 @@ async def repair_data_gaps_endpoint(
 @app.get("/market-data-stats")
 async def get_market_data_stats():
     """
-    Estadísticas generales de los datos almacenados
+    Estadísticas generales de los datos almacenados (desde symbol_coverage)
     """
     try:
-        conn = sqlite3.connect('trading_dashboard.db')
-        cursor = conn.cursor()
-        
-        # Stats básicas
-        cursor.execute('SELECT COUNT(*) FROM market_data_eod')
-        total_records = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(DISTINCT symbol) FROM market_data_eod')
-        unique_symbols = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT MIN(business_date), MAX(business_date) FROM market_data_eod')
-        date_range = cursor.fetchone()
-        
-        # Quality stats
-        cursor.execute('''
-            SELECT 
-                AVG(data_quality_score) as avg_quality,
-                MIN(data_quality_score) as min_quality,
-                COUNT(*) FILTER (WHERE data_quality_score < 80) as low_quality_count
-            FROM market_data_eod
-        ''')
-        quality_stats = cursor.fetchone()
-        
-        # Records por símbolo
-        cursor.execute('''
-            SELECT symbol, COUNT(*) as record_count
-            FROM market_data_eod
-            GROUP BY symbol
-            ORDER BY COUNT(*) DESC
-        ''')
-        symbol_stats = cursor.fetchall()
-        
-        conn.close()
+        coverage = await asyncio.to_thread(get_symbol_coverage, None, True)
+        filas = sorted(coverage.values(), key=lambda r: r['record_count'], reverse=True)
+        total_records = sum(r['record_count'] for r in filas)
         
         return {
             'total_records': total_records,
-            'unique_symbols': unique_symbols,
+            'unique_symbols': len(filas),
             'date_range': {
-                'from': date_range[0],
-                'to': date_range[1]
+                'from': min((r['first_date'] for r in filas), default=None),
+                'to': max((r['last_date'] for r in filas), default=None)
             },
             'quality_stats': {
-                'average_quality_score': round(quality_stats[0], 2) if quality_stats[0] else 0,
-                'minimum_quality_score': quality_stats[1],
-                'low_quality_records': quality_stats[2]
+                'average_quality_score': round(
+                    sum(r['avg_quality_score'] * r['record_count'] for r in filas) / total_records, 2
+                ) if total_records else 0,
+                'minimum_quality_score': min((r['min_quality_score'] for r in filas), default=None),
+                'low_quality_records': sum(r['low_quality_count'] for r in filas)
             },
             'symbol_coverage': [
-                {'symbol': row[0], 'record_count': row[1]}
-                for row in symbol_stats
+                {
+                    'symbol': r['symbol'],
+                    'record_count': r['record_count'],
+                    'first_date': r['first_date'],
+                    'last_date': r['last_date'],
+                    'last_quality_score': r['last_quality_score'],
+                    'last_update': r['last_update']
+                }
+                for r in filas
             ]
         }
         
@@ -1717,32 +3878,96 @@ async def get_market_data_stats():
 MARKET_SCHEDULES = {
     'NYSE': {
         'timezone': 'America/New_York',
+        'open_time': '09:30',
+        'close_time': '16:00',
         'eod_time': '18:00',  # 6 PM ET (después del cierre 4 PM)
-        'market_days': [0, 1, 2, 3, 4]  # Lunes-Viernes
+        'market_days': [0, 1, 2, 3, 4],  # Lunes-Viernes
+        'max_missing_days': 1  # Feriados sueltos (Good Friday, 4 de julio, ...)
     },
     'BCBA': {
         'timezone': 'America/Argentina/Buenos_Aires', 
+        'open_time': '11:00',
+        'close_time': '17:00',
         'eod_time': '18:30',  # 6:30 PM ART
-        'market_days': [0, 1, 2, 3, 4]
+        'market_days': [0, 1, 2, 3, 4],
+        'max_missing_days': 2  # Carnaval y Semana Santa: 2 días hábiles seguidos
+    },
+    'CRYPTO': {
+        'timezone': 'UTC',
+        'open_time': '00:00',
+        'close_time': '24:00',  # 24/7
+        'eod_time': '00:15',    # Corte diario UTC: procesa la vela del día anterior
+        'business_date_offset': -1,
+        'market_days': [0, 1, 2, 3, 4, 5, 6],
+        'max_missing_days': 0  # Opera todos los días
     }
 }
 
+def get_symbol_exchange(symbol: str) -> str:
+    """
+    Exchange inferido de un símbolo fuera del universo: BCBA (.BA), CRYPTO (-USD) o NYSE (resto)
+    """
+    return clasificar_symbol(symbol)['exchange']
+
+def get_exchange_groups(**filtros) -> Dict[str, List[str]]:
+    """
+    Agrupar los símbolos activos por exchange según la tabla symbols (un grupo EOD por exchange)
+    """
+    groups = {}
+    for symbol, exchange in get_universe_exchanges(**filtros):
+        groups.setdefault(exchange, []).append(symbol)
+    return groups
+
+def is_exchange_open(exchange: str, now: Optional[datetime] = None) -> bool:
+    """
+    Verificar si un exchange está en horario de operación (cripto opera 24/7)
+    """
+    if exchange not in MARKET_SCHEDULES:
+        return True
+    
+    config = MARKET_SCHEDULES[exchange]
+    local_now = (now or datetime.now(pytz.utc)).astimezone(pytz.timezone(config['timezone']))
+    
+    if local_now.weekday() not in config['market_days']:
+        return False
+    
+    hora = local_now.strftime('%H:%M')
+    return config['open_time'] <= hora < config['close_time']
+
 # Variables globales para control del scheduler
 scheduler_running = False
 eod_schedule_config = {
     'enabled': True,
-    'time': '18:00',  # Hora EOD por defecto
+    'per_exchange': True,  # Un EOD por exchange al cierre de cada mercado (MARKET_SCHEDULES)
+    'time': '18:00',  # Hora EOD única (solo si per_exchange=False)
     'timezone': 'America/New_York',
     'market_days_only': True
 }
 
+scheduler_state = {
+    'generation': 0,   # Cambia en cada start/stop: los threads viejos terminan solos
+    'next_runs': {},   # grupo -> {'run_at', 'business_date', 'symbols'}
+    'last_runs': {}    # grupo -> resultado del último EOD programado
+}
+_scheduler_wakeup = threading.Event()
+SCHEDULER_RECHEQUEO_SEGUNDOS = 300  # Espera máxima del loop: un thread de una generación vieja termina a tiempo
+
+# Pool para ejecutar los EOD de cada exchange en paralelo
+eod_executor = ThreadPoolExecutor(max_workers=len(MARKET_SCHEDULES), thread_name_prefix='eod')
+
 # Configuración para actualización de precios
 price_update_config = {
     'enabled': True,
     'interval_minutes': 5,  # Cada 5 minutos por defecto
+    'max_workers': 8,       # Descargas en paralelo por ciclo
     'running': False
 }
 
+price_updater_state = {
+    'generation': 0  # Cambia en cada start/stop: el thread viejo termina solo
+}
+_price_updater_wakeup = threading.Event()
+
 def is_market_day(timezone_str: str = 'America/New_York') -> bool:
     """
     Verificar si hoy es día de mercado (Lunes-Viernes)
@@ -1752,25 +3977,73 @@ def is_market_day(timezone_str: str = 'America/New_York') -> bool:
     # 0=Monday, 6=Sunday
     return now.weekday() < 5
 
-def scheduled_eod_job():
+def get_eod_schedule_groups() -> Dict[str, Dict]:
     """
-    Job EOD programado que respeta días de mercado
+    Grupos EOD a programar: uno por exchange, o un único grupo 'ALL'
+    con la hora configurada si per_exchange está deshabilitado
     """
-    try:
-        if eod_schedule_config['market_days_only'] and not is_market_day(eod_schedule_config['timezone']):
-            print(f"📅 Saltando EOD job - No es día de mercado")
-            return
+    if not eod_schedule_config['per_exchange']:
+        return {
+            'ALL': {
+                'timezone': eod_schedule_config['timezone'],
+                'eod_time': eod_schedule_config['time'],
+                'market_days': [0, 1, 2, 3, 4] if eod_schedule_config['market_days_only'] else list(range(7)),
+                'symbols': get_universe()
+            }
+        }
+    
+    groups = {}
+    for exchange, symbols in get_exchange_groups().items():
+        config = MARKET_SCHEDULES[exchange]
+        groups[exchange] = {
+            'timezone': config['timezone'],
+            'eod_time': config['eod_time'],
+            'business_date_offset': config.get('business_date_offset', 0),
+            'market_days': config['market_days'] if eod_schedule_config['market_days_only'] else list(range(7)),
+            'symbols': symbols
+        }
+    return groups
+
+def calcular_proxima_ejecucion(group: Dict, after: datetime) -> Tuple[datetime, str]:
+    """
+    Próxima ejecución (UTC) estrictamente posterior a `after` para un grupo,
+    en la hora EOD de su timezone, y la business_date que procesa
+    """
+    tz = pytz.timezone(group['timezone'])
+    hora, minuto = [int(x) for x in group['eod_time'].split(':')]
+    local_after = after.astimezone(tz)
+    
+    for dias in range(0, 8):
+        dia = (local_after + timedelta(days=dias)).date()
+        run_at = tz.localize(datetime(dia.year, dia.month, dia.day, hora, minuto))
+        business_date = dia + timedelta(days=group.get('business_date_offset', 0))
         
-        print(f"🕰️  Ejecutando EOD job programado...")
-        result = run_eod_job()
+        if run_at > local_after and business_date.weekday() in group['market_days']:
+            return run_at.astimezone(pytz.utc), business_date.strftime('%Y-%m-%d')
+    
+    raise ValueError(f"Sin días de mercado configurados para {group}")
+
+def scheduled_eod_job(group_name: str, business_date: str, symbols: List[str]):
+    """
+    Job EOD programado de un grupo de símbolos (un exchange)
+    """
+    try:
+        print(f"🕰️  Ejecutando EOD job programado {group_name} ({len(symbols)} símbolos, {business_date})...")
+        job_name = 'EOD_UPDATE' if group_name == 'ALL' else f'EOD_UPDATE_{group_name}'
+        result = run_eod_job(business_date, symbols=symbols, job_name=job_name)
+        scheduler_state['last_runs'][group_name] = {
+            'business_date': business_date,
+            'status': result['status'],
+            'finished_at': datetime.now().isoformat()
+        }
         
         if result['status'] == 'SUCCESS':
-            print(f"✅ EOD job programado completado exitosamente")
+            print(f"✅ EOD job programado {group_name} completado exitosamente")
         else:
-            print(f"⚠️  EOD job programado completado con warnings: {result}")
+            print(f"⚠️  EOD job programado {group_name} completado con warnings: {result}")
             
     except Exception as e:
-        print(f"❌ Error en EOD job programado: {e}")
+        print(f"❌ Error en EOD job programado {group_name}: {e}")
 
 def start_scheduler():
     """
@@ -1782,15 +4055,19 @@ def start_scheduler():
         print("⚠️  Scheduler ya está ejecutándose")
         return
     
-    # Limpiar schedule anterior
-    schedule.clear()
+    # Generación nueva: el thread anterior (si sigue esperando) la ve distinta y termina solo.
+    # El evento no se limpia acá: un stop recién hecho tiene que llegar a despertarlo.
+    scheduler_state['generation'] += 1
+    scheduler_state['next_runs'] = {}
     
     if eod_schedule_config['enabled']:
-        # Programar EOD job
-        schedule.every().day.at(eod_schedule_config['time']).do(scheduled_eod_job)
-        print(f"📅 EOD job programado para {eod_schedule_config['time']} {eod_schedule_config['timezone']}")
+        for name, group in get_eod_schedule_groups().items():
+            print(f"📅 EOD job {name} programado para {group['eod_time']} {group['timezone']} ({len(group['symbols'])} símbolos)")
     
     scheduler_running = True
+    threading.Thread(
+        target=run_pending_jobs, args=(scheduler_state['generation'],), name='eod-scheduler', daemon=True
+    ).start()
     print("🚀 Scheduler iniciado")
 
 def stop_scheduler():
@@ -1798,39 +4075,88 @@ def stop_scheduler():
     Detener el scheduler
     """
     global scheduler_running
-    schedule.clear()
+    scheduler_state['generation'] += 1
+    scheduler_state['next_runs'] = {}
     scheduler_running = False
+    _scheduler_wakeup.set()  # Despertar el thread para que termine
     print("⏹️  Scheduler detenido")
 
-def run_pending_jobs():
+def run_pending_jobs(generation: int):
     """
-    Ejecutar jobs pendientes (llamar desde background thread)
+    Loop del scheduler (background thread): duerme hasta el próximo deadline
+    de cualquier exchange y dispara en paralelo los grupos que vencieron.
+    Termina cuando cambia la generación (stop/restart); ninguna espera pasa de
+    SCHEDULER_RECHEQUEO_SEGUNDOS.
     """
-    while scheduler_running:
+    last_fired = {}
+    
+    while scheduler_running and scheduler_state['generation'] == generation:
+        registrar_latido('eod-scheduler')
         try:
-            schedule.run_pending()
-            time.sleep(60)  # Check cada minuto
+            if not eod_schedule_config['enabled']:
+                if _scheduler_wakeup.wait(timeout=SCHEDULER_RECHEQUEO_SEGUNDOS):
+                    _scheduler_wakeup.clear()
+                continue
+            
+            now = datetime.now(pytz.utc)
+            groups = get_eod_schedule_groups()
+            next_runs = {}
+            for name, group in groups.items():
+                run_at, business_date = calcular_proxima_ejecucion(group, last_fired.get(name, now))
+                next_runs[name] = {'run_at': run_at, 'business_date': business_date, 'symbols': group['symbols']}
+            
+            scheduler_state['next_runs'] = next_runs
+            proximo = min(run['run_at'] for run in next_runs.values())
+            espera = (proximo - datetime.now(pytz.utc)).total_seconds()
+            
+            # Re-chequear periódicamente (cambios de horario / ajustes de reloj / generación nueva)
+            if espera > SCHEDULER_RECHEQUEO_SEGUNDOS:
+                if _scheduler_wakeup.wait(timeout=SCHEDULER_RECHEQUEO_SEGUNDOS):
+                    _scheduler_wakeup.clear()
+                continue
+            if espera > 0 and _scheduler_wakeup.wait(timeout=espera):
+                _scheduler_wakeup.clear()
+                continue
+            
+            if scheduler_state['generation'] != generation:
+                break
+            
+            now = datetime.now(pytz.utc)
+            for name, run in next_runs.items():
+                if run['run_at'] <= now:
+                    last_fired[name] = run['run_at']
+                    eod_executor.submit(scheduled_eod_job, name, run['business_date'], run['symbols'])
+                    
         except Exception as e:
             print(f"❌ Error en scheduler: {e}")
             time.sleep(60)
 
+def get_next_runs() -> Dict[str, Dict]:
+    """Próximas ejecuciones por grupo (formato JSON)"""
+    return {
+        name: {
+            'run_at': run['run_at'].isoformat(),
+            'business_date': run['business_date'],
+            'symbols': len(run['symbols'])
+        }
+        for name, run in scheduler_state['next_runs'].items()
+    }
+
 @app.post("/scheduler/start")
 async def start_scheduler_endpoint():
     """
     Iniciar scheduler automático
     """
+    if not leader_state['is_leader']:
+        raise HTTPException(status_code=409, detail=f"El worker {WORKER_ID} no es líder; el scheduler corre en el líder")
+    
     try:
         start_scheduler()
         
-        # Iniciar thread del scheduler si no está corriendo
-        if scheduler_running:
-            scheduler_thread = threading.Thread(target=run_pending_jobs, daemon=True)
-            scheduler_thread.start()
-        
         return {
             "message": "Scheduler iniciado",
             "config": eod_schedule_config,
-            "jobs": len(schedule.jobs)
+            "jobs": len(get_eod_schedule_groups()) if eod_schedule_config['enabled'] else 0
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error starting scheduler: {str(e)}")
@@ -1851,19 +4177,30 @@ async def get_scheduler_status():
     """
     Obtener status del scheduler
     """
+    next_runs = get_next_runs()
+    
     return {
         "running": scheduler_running,
         "config": eod_schedule_config,
-        "scheduled_jobs": len(schedule.jobs),
-        "next_run": schedule.next_run().isoformat() if schedule.jobs else None,
-        "is_market_day": is_market_day(eod_schedule_config['timezone'])
+        "scheduled_jobs": len(next_runs),
+        "next_run": min((r['run_at'] for r in next_runs.values()), default=None),
+        "next_runs": next_runs,
+        "last_runs": scheduler_state['last_runs'],
+        "is_market_day": is_market_day(eod_schedule_config['timezone']),
+        "leader": {
+            "worker_id": WORKER_ID,
+            "is_leader": leader_state['is_leader'],
+            "leader_since": leader_state['leader_since'],
+            "lease": get_leader_lease()
+        }
     }
 
 @app.post("/scheduler/configure")
 async def configure_scheduler(
     enabled: bool = Query(True, description="Habilitar scheduler automático"),
-    time: str = Query("18:00", description="Hora EOD (HH:MM)"),
-    timezone: str = Query("America/New_York", description="Timezone"),
+    per_exchange: bool = Query(True, description="Un EOD por exchange al cierre de cada mercado"),
+    time: str = Query("18:00", description="Hora EOD (HH:MM, solo si per_exchange=false)"),
+    timezone: str = Query("America/New_York", description="Timezone (solo si per_exchange=false)"),
     market_days_only: bool = Query(True, description="Solo días de mercado")
 ):
     """
@@ -1879,6 +4216,7 @@ async def configure_scheduler(
         # Actualizar configuración
         eod_schedule_config.update({
             'enabled': enabled,
+            'per_exchange': per_exchange,
             'time': time,
             'timezone': timezone,
             'market_days_only': market_days_only
@@ -1888,15 +4226,14 @@ async def configure_scheduler(
         if scheduler_running:
             stop_scheduler()
             start_scheduler()
-            
-            # Reiniciar thread
-            scheduler_thread = threading.Thread(target=run_pending_jobs, daemon=True)
-            scheduler_thread.start()
         
         return {
             "message": "Configuración actualizada",
             "config": eod_schedule_config,
-            "next_run": schedule.next_run().isoformat() if schedule.jobs else None
+            "groups": {
+                name: {'eod_time': g['eod_time'], 'timezone': g['timezone'], 'symbols': len(g['symbols'])}
+                for name, g in get_eod_schedule_groups().items()
+            }
         }
         
     except ValueError as e:
@@ -1911,7 +4248,7 @@ async def test_eod_job():
     """
     try:
         print("🧪 Ejecutando EOD job de prueba...")
-        result = run_eod_job()
+        result = await asyncio.to_thread(run_eod_job)
         return {
             "message": "EOD job de prueba completado",
             "result": result,
@@ -1941,13 +4278,9 @@ async def configure_price_updates(
         
         # Si cambió la configuración y está corriendo, reiniciar
         if old_config != price_update_config and price_update_config['running']:
-            price_update_config['running'] = False  # Detener el actual
-            time.sleep(2)  # Esperar que termine
-            
-            # Iniciar nuevo thread
+            detener_actualizador_precios()
             if enabled:
-                price_thread = threading.Thread(target=actualizar_precios_background, daemon=True)
-                price_thread.start()
+                iniciar_actualizador_precios()
         
         return {
             "message": "Configuración de precios actualizada",
@@ -1968,6 +4301,205 @@ async def get_price_updates_status():
         "message": "Actualización de precios " + ("activa" if price_update_config['running'] else "inactiva")
     }
 
+# =====================================================
+# ELECCIÓN DE LÍDER ENTRE WORKERS (LEASE EN SQLITE)
+# =====================================================
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+LEADER_LEASE_NAME = 'background_services'
+
+leader_config = {
+    'ttl_seconds': 30,        # El lease expira si no hay heartbeat en este tiempo
+    'heartbeat_seconds': 10   # Frecuencia de renovación / intento de adquisición
+}
+
+leader_state = {
+    'running': False,
+    'is_leader': False,
+    'leader_since': None,
+    'last_heartbeat': None,
+    'lease_expires_at': None,  # Vencimiento (epoch) del último lease propio renovado
+    'eod_version': None
+}
+
+def try_acquire_leader_lease() -> Optional[bool]:
+    """
+    Adquirir o renovar el lease de líder (transacción IMMEDIATE: un solo writer a la vez).
+    True: lease propio; False: lo tiene otro worker; None: no se pudo leer (ej: BD bloqueada
+    por un EOD o una carga bulk), el estado no se sabe.
+    """
+    now = time.time()
+    conn = connect_db('trading_dashboard.db', timeout=10, isolation_level=None)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute('SELECT holder, expires_at FROM service_leases WHERE name = ?', (LEADER_LEASE_NAME,))
+        row = cursor.fetchone()
+        
+        if row is None or row[0] == WORKER_ID or row[1] < now:
+            acquired_at = datetime.now() if row is None or row[0] != WORKER_ID else None
+            cursor.execute('''
+                INSERT INTO service_leases (name, holder, acquired_at, heartbeat_at, expires_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    holder = excluded.holder,
+                    acquired_at = COALESCE(?, acquired_at),
+                    heartbeat_at = excluded.heartbeat_at,
+                    expires_at = excluded.expires_at
+            ''', (LEADER_LEASE_NAME, WORKER_ID, acquired_at, datetime.now(),
+                  now + leader_config['ttl_seconds'], acquired_at))
+            acquired = True
+        else:
+            acquired = False
+        
+        cursor.execute('COMMIT')
+        if acquired:
+            leader_state['lease_expires_at'] = now + leader_config['ttl_seconds']
+        return acquired
+        
+    except Exception as e:
+        print(f"❌ Error en lease de líder: {e}")
+        try:
+            cursor.execute('ROLLBACK')
+        except Exception:
+            pass
+        return None
+    finally:
+        conn.close()
+
+def release_leader_lease():
+    """
+    Liberar el lease al cerrar para que otro worker tome el liderazgo sin esperar el TTL
+    """
+    if not leader_state['is_leader']:
+        return
+    
+    stop_background_services()
+    
+    try:
+        conn = connect_db('trading_dashboard.db', timeout=10)
+        conn.execute('DELETE FROM service_leases WHERE name = ? AND holder = ?', (LEADER_LEASE_NAME, WORKER_ID))
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        print(f"❌ Error liberando lease de líder: {e}")
+
+def get_leader_lease() -> Optional[Dict]:
+    """Estado actual del lease (quién es líder y hasta cuándo)"""
+    conn = connect_db('trading_dashboard.db')
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT holder, acquired_at, heartbeat_at, expires_at
+        FROM service_leases WHERE name = ?
+    ''', (LEADER_LEASE_NAME,))
+    row = cursor.fetchone()
+    conn.close()
+    
+    if row is None:
+        return None
+    
+    return {
+        'holder': row[0],
+        'acquired_at': row[1],
+        'heartbeat_at': row[2],
+        'expires_at': datetime.fromtimestamp(row[3]).isoformat(),
+        'expired': row[3] < time.time()
+    }
+
+def start_background_services():
+    """
+    Iniciar job de precios y scheduler EOD (solo el líder)
+    """
+    # Iniciar job de actualización de precios en background
+    if price_update_config['enabled'] and not price_update_config['running']:
+        iniciar_actualizador_precios()
+        print(f"Job de actualización de precios iniciado (cada {price_update_config['interval_minutes']} minutos)")
+    
+    # Snapshot de lectura faltante o anterior al último ingest (ej: BD cargada por scripts)
+    if READ_SNAPSHOT_ENABLED and estado_snapshot_lectura()['stale']:
+        threading.Thread(target=publicar_snapshot_lectura, name='read-snapshot', daemon=True).start()
+    
+    # Iniciar scheduler automático de EOD
+    start_scheduler()
+    if scheduler_running:
+        print("📅 Scheduler EOD iniciado automáticamente (un EOD por exchange)" if eod_schedule_config['per_exchange']
+              else f"📅 Scheduler EOD iniciado automáticamente - Próxima ejecución: {eod_schedule_config['time']} {eod_schedule_config['timezone']}")
+    else:
+        print("⚠️  Scheduler EOD no se pudo iniciar")
+
+def stop_background_services():
+    """
+    Detener job de precios y scheduler EOD (al perder el liderazgo o al cerrar)
+    """
+    detener_actualizador_precios()
+    if scheduler_running:
+        stop_scheduler()
+
+def sincronizar_desde_lider():
+    """
+    Followers: recargar precios y reenviar eventos cuando el líder publica datos nuevos
+    """
+    versions = get_data_versions()
+    
+    if versions.get('prices', 0) != price_table_state['version']:
+        anteriores = {t: d['precio_actual'] for t, d in get_prices_bulk().items()}
+        cargar_price_table()
+        cambios = [
+            formatear_precio(d) for t, d in get_prices_bulk().items()
+            if anteriores.get(t) != d['precio_actual']
+        ]
+        if cambios:
+            publicar_evento('prices', {'price_version': price_table_state['version'], 'prices': cambios})
+    
+    eod_version = versions.get('eod', 0)
+    if leader_state['eod_version'] is not None and eod_version != leader_state['eod_version']:
+        publicar_evento('eod', {'data_version': eod_version})
+    leader_state['eod_version'] = eod_version
+
+def actualizar_liderazgo():
+    """
+    Un tick de la elección: renovar/adquirir el lease y arrancar o detener servicios
+    """
+    es_lider = try_acquire_leader_lease()
+    
+    if es_lider is None:
+        # Error transitorio: el líder sigue siéndolo mientras su lease no venza
+        # (nadie más puede tomarlo antes de expires_at)
+        vencido = leader_state['lease_expires_at'] is None or leader_state['lease_expires_at'] < time.time()
+        if not (leader_state['is_leader'] and vencido):
+            return
+        es_lider = False
+    
+    if es_lider:
+        leader_state['last_heartbeat'] = datetime.now().isoformat()
+    
+    if es_lider and not leader_state['is_leader']:
+        leader_state['is_leader'] = True
+        leader_state['leader_since'] = datetime.now().isoformat()
+        print(f"👑 Worker {WORKER_ID} es líder: iniciando servicios en background")
+        start_background_services()
+    elif not es_lider and leader_state['is_leader']:
+        leader_state['is_leader'] = False
+        leader_state['leader_since'] = None
+        print(f"⚠️  Worker {WORKER_ID} perdió el liderazgo: deteniendo servicios en background")
+        stop_background_services()
+    
+    if not es_lider:
+        sincronizar_desde_lider()
+
+def run_leader_election():
+    """
+    Loop de elección de líder (background thread en cada worker)
+    """
+    while leader_state['running']:
+        time.sleep(leader_config['heartbeat_seconds'])
+        registrar_latido('leader-election')
+        try:
+            actualizar_liderazgo()
+        except Exception as e:
+            print(f"❌ Error en elección de líder: {e}")
+
 if __name__ == "__main__":
     print("Iniciando Trading Dashboard API...")
     uvicorn.run(
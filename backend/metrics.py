@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Métricas en formato Prometheus (text exposition 0.0.4) sin dependencias externas.
+Scrapeable por un Prometheus local o simplemente con curl /metrics.
+
+Cada worker de uvicorn expone sus propias métricas (registro en memoria del proceso).
+"""
+
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Buckets por defecto (segundos), los mismos que usa prometheus_client
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+_registry: List['Metric'] = []
+_collectors: List[Callable[[], None]] = []
+
+
+def _formatear_valor(valor: float) -> str:
+    if valor == float('inf'):
+        return '+Inf'
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor))
+
+
+def _formatear_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class Metric:
+    """Métrica base con labels (una serie por combinación de valores)"""
+    tipo = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], object] = {}
+        _registry.append(self)
+
+    def _clave(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, '')) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        lineas = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.tipo}']
+        with self._lock:
+            series = list(self._series.items())
+        for clave, valor in series:
+            lineas.extend(self._render_serie(clave, valor))
+        return lineas
+
+    def _render_serie(self, clave, valor) -> List[str]:
+        return [f'{self.name}{_formatear_labels(self.labelnames, clave)} {_formatear_valor(valor)}']
+
+
+class Counter(Metric):
+    tipo = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels):
+        clave = self._clave(labels)
+        with self._lock:
+            self._series[clave] = self._series.get(clave, 0.0) + amount
+
+
+class Gauge(Metric):
+    tipo = 'gauge'
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._series[self._clave(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        clave = self._clave(labels)
+        with self._lock:
+            self._series[clave] = self._series.get(clave, 0.0) + amount
+
+
+class Histogram(Metric):
+    tipo = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value: float, **labels):
+        clave = self._clave(labels)
+        with self._lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                # [conteos por bucket..., suma]
+                serie = self._series[clave] = [0] * len(self.buckets) + [0.0]
+            for i, limite in enumerate(self.buckets):
+                if value <= limite:
+                    serie[i] += 1
+            serie[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - inicio, **labels)
+
+    def _render_serie(self, clave, serie) -> List[str]:
+        lineas = []
+        for limite, conteo in zip(self.buckets, serie):
+            labels = _formatear_labels(self.labelnames, clave, f'le="{_formatear_valor(limite)}"')
+            lineas.append(f'{self.name}_bucket{labels} {conteo}')
+        labels = _formatear_labels(self.labelnames, clave)
+        lineas.append(f'{self.name}_sum{labels} {_formatear_valor(serie[-1])}')
+        lineas.append(f'{self.name}_count{labels} {serie[len(self.buckets) - 1]}')
+        return lineas
+
+
+def registrar_collector(func: Callable[[], None]):
+    """Registrar una función que actualiza gauges justo antes de cada scrape"""
+    _collectors.append(func)
+    return func
+
+
+def render_metrics() -> str:
+    """Todas las métricas en formato text exposition de Prometheus"""
+    for collector in _collectors:
+        try:
+            collector()
+        except Exception as e:
+            print(f"⚠️  Error en collector de métricas {collector.__name__}: {e}")
+    lineas = []
+    for metric in _registry:
+        lineas.extend(metric.render())
+    return '\n'.join(lineas) + '\n'
+
+
+# =====================================================
+# HTTP: LATENCIA POR RUTA
+# =====================================================
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Latencia de requests HTTP por ruta',
+    ('method', 'route', 'status')
+)
+
+
+class PrometheusMiddleware:
+    """
+    Middleware ASGI: latencia por template de ruta (/price/{ticker}, no /price/AAPL).
+    En streams (SSE) mide hasta el fin del stream.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        status = {'code': 500}
+
+        async def send_con_status(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_con_status)
+        finally:
+            route = scope.get('route')
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - inicio,
+                method=scope['method'],
+                route=getattr(route, 'path', 'unmatched'),
+                status=status['code']
+            )
+
+
+# =====================================================
+# SQLITE: TIEMPO DE QUERY POR CALL SITE
+# =====================================================
+
+SQLITE_QUERY_SECONDS = Histogram(
+    'sqlite_query_duration_seconds',
+    'Tiempo de execute/executemany en SQLite por call site',
+    ('site',),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor que mide cada execute con el call site de su conexión"""
+
+    def execute(self, *args, **kwargs):
+        with SQLITE_QUERY_SECONDS.time(site=self.connection.site):
+            return super().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        with SQLITE_QUERY_SECONDS.time(site=self.connection.site):
+            return super().executemany(*args, **kwargs)
+
+    def executescript(self, *args, **kwargs):
+        with SQLITE_QUERY_SECONDS.time(site=self.connection.site):
+            return super().executescript(*args, **kwargs)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Conexión cuyo call site es la función que la abrió"""
+    site = 'unknown'
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, *args, **kwargs):
+        return self.cursor().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return self.cursor().executemany(*args, **kwargs)
+
+
+def connect_db(database: str, site: Optional[str] = None, **kwargs) -> sqlite3.Connection:
+    """
+    sqlite3.connect instrumentado. Sin `site` se usa el nombre de la función llamadora.
+    """
+    conn = sqlite3.connect(database, factory=InstrumentedConnection, **kwargs)
+    conn.site = site or sys._getframe(1).f_code.co_name
+    return conn
+
+
+# =====================================================
+# LIVENESS DE THREADS EN BACKGROUND
+# =====================================================
+
+THREAD_ALIVE = Gauge('background_thread_alive', 'Thread de background vivo (1) o no (0)', ('thread',))
+THREAD_HEARTBEAT_AGE = Gauge(
+    'background_thread_heartbeat_age_seconds',
+    'Segundos desde el último latido del thread',
+    ('thread',)
+)
+
+_latidos: Dict[str, float] = {}
+
+
+def registrar_latido(thread_name: str):
+    """Marcar que un thread de background sigue iterando"""
+    _latidos[thread_name] = time.time()
+
+
+@registrar_collector
+def _actualizar_threads():
+    vivos = {t.name for t in threading.enumerate() if t.is_alive()}
+    ahora = time.time()
+    for nombre, ultimo in list(_latidos.items()):
+        THREAD_ALIVE.set(1 if nombre in vivos else 0, thread=nombre)
+        THREAD_HEARTBEAT_AGE.set(ahora - ultimo, thread=nombre)
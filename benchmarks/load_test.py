@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Load test HTTP del backend: levanta la API contra una BD sembrada con el mercado sintético
+y reproduce el tráfico del frontend (polls del dashboard, /prices/all, /analyze,
+/historical-analysis). Reporta p50/p95/p99, throughput y tasa de error por endpoint.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+BACKEND_DIR = os.path.join(ROOT_DIR, 'backend')
+
+# Intervalos de refresh del frontend (RefreshControl) con su peso en el mix de usuarios
+FRONTEND_REFRESH_INTERVALS = [(10, 0.15), (30, 0.5), (60, 0.2), (120, 0.1), (300, 0.05)]
+
+class Resultados:
+    """Latencias y errores por endpoint (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencias = {}
+        self.errores = {}
+
+    def registrar(self, endpoint, segundos, ok):
+        with self._lock:
+            self.latencias.setdefault(endpoint, []).append(segundos)
+            if not ok:
+                self.errores[endpoint] = self.errores.get(endpoint, 0) + 1
+
+    def resumen(self, duracion):
+        resumen = {}
+        for endpoint, valores in sorted(self.latencias.items()):
+            ms = np.array(valores) * 1000
+            errores = self.errores.get(endpoint, 0)
+            resumen[endpoint] = {
+                'requests': len(valores),
+                'errors': errores,
+                'error_rate': round(errores / len(valores), 4),
+                'throughput_rps': round(len(valores) / duracion, 2),
+                'p50_ms': round(float(np.percentile(ms, 50)), 1),
+                'p95_ms': round(float(np.percentile(ms, 95)), 1),
+                'p99_ms': round(float(np.percentile(ms, 99)), 1),
+                'max_ms': round(float(ms.max()), 1)
+            }
+        return resumen
+
+class Cliente:
+    """Conexión keep-alive por usuario virtual"""
+
+    def __init__(self, base_url, resultados, timeout=120):
+        url = urlparse(base_url)
+        self.host, self.port = url.hostname, url.port or 80
+        self.timeout = timeout
+        self.resultados = resultados
+        self.conn = None
+
+    def request(self, endpoint, method, path, body=None):
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        payload = json.dumps(body) if body is not None else None
+        inicio = time.perf_counter()
+        ok = False
+
+        # Si el servidor cerró la conexión keep-alive ociosa se reintenta una vez (como un browser)
+        for _ in range(2):
+            reusada = self.conn is not None
+            try:
+                if self.conn is None:
+                    self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                self.conn.request(method, path, body=payload, headers=headers)
+                response = self.conn.getresponse()
+                response.read()
+                ok = response.status < 400
+                break
+            except (OSError, http.client.HTTPException):
+                if self.conn is not None:
+                    self.conn.close()
+                self.conn = None
+                if not reusada:
+                    break
+        self.resultados.registrar(endpoint, time.perf_counter() - inicio, ok)
+
+def usuario_dashboard(cliente, args, deadline, rng):
+    """Usuario del dashboard: carga inicial y luego polls a su intervalo de refresh"""
+    intervalos, pesos = zip(*FRONTEND_REFRESH_INTERVALS)
+    intervalo = rng.choices(intervalos, pesos)[0] * args.time_scale
+
+    cliente.request('health', 'GET', '/health')
+    cliente.request('tickers', 'GET', '/tickers')
+
+    # Escalonar el arranque para no sincronizar los polls de todos los usuarios
+    time.sleep(rng.uniform(0, intervalo))
+    while time.time() < deadline:
+        # La mayoría mira la fecha por defecto; algunos cambian la fecha en el selector
+        dias = 0 if rng.random() < 0.9 else rng.randint(1, 90)
+        fecha = (datetime.now() - timedelta(days=30 + dias)).strftime('%Y-%m-%d')
+        cliente.request('dashboard', 'GET', f'/dashboard?fecha={fecha}')
+        cliente.request('prices_all', 'GET', '/prices/all')
+        time.sleep(intervalo)
+
+def usuario_analista(cliente, args, deadline, rng, tickers):
+    """Usuario que analiza tickers puntuales y de vez en cuando corre un histórico"""
+    while time.time() < deadline:
+        if rng.random() < args.historical_ratio:
+            dias = rng.choice([30, 90, 180])
+            inicio = (datetime.now() - timedelta(days=dias)).strftime('%Y-%m-%d')
+            fin = datetime.now().strftime('%Y-%m-%d')
+            cliente.request('historical_analysis', 'GET', f'/historical-analysis?fecha_inicio={inicio}&fecha_fin={fin}')
+        else:
+            dias = rng.choice([90, 180, 365, 730])
+            cliente.request('analyze', 'POST', '/analyze', {
+                'ticker': rng.choice(tickers),
+                'fecha_inicio': (datetime.now() - timedelta(days=dias)).strftime('%Y-%m-%d'),
+                'fecha_fin': datetime.now().strftime('%Y-%m-%d'),
+                'profit_target': rng.choice([0.03, 0.04, 0.05]),
+                'max_days': rng.choice([15, 30, 60])
+            })
+        time.sleep(rng.uniform(2, 10) * args.time_scale)
+
+def ejecutar_etapa(base_url, usuarios, args, tickers):
+    """Una etapa de carga con `usuarios` usuarios de dashboard concurrentes"""
+    resultados = Resultados()
+    analistas = max(1, int(usuarios * args.analyst_ratio))
+    deadline = time.time() + args.duration
+    threads = []
+
+    for i in range(usuarios + analistas):
+        rng = random.Random(args.seed * 100_003 + i)
+        cliente = Cliente(base_url, resultados)
+        if i < usuarios:
+            target, extra = usuario_dashboard, ()
+        else:
+            target, extra = usuario_analista, (tickers,)
+        thread = threading.Thread(target=target, args=(cliente, args, deadline, rng, *extra), daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    inicio = time.time()
+    for thread in threads:
+        thread.join()
+    return resultados.resumen(time.time() - inicio), analistas
+
+# =====================================================
+# SERVIDOR CONTRA BD SEMBRADA
+# =====================================================
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def esperar_servidor(base_url, timeout=120):
+    url = urlparse(base_url)
+    limite = time.time() + timeout
+    while time.time() < limite:
+        try:
+            conn = http.client.HTTPConnection(url.hostname, url.port, timeout=5)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError(f"El servidor no respondió en {timeout}s")
+
+def preparar_servidor(args, workdir):
+    """Sembrar la BD y levantar uvicorn con el proveedor sintético"""
+    env = dict(os.environ)
+    env.update({
+        'MARKET_DATA_PROVIDER': 'synthetic',
+        'SYNTHETIC_UNIVERSE_SIZE': str(args.symbols),
+        'SYNTHETIC_SEED': str(args.seed),
+        'PYTHONPATH': os.pathsep.join([BACKEND_DIR, ROOT_DIR, env.get('PYTHONPATH', '')])
+    })
+
+    print(f"🌱 Sembrando {args.symbols} símbolos x {args.years} años en {workdir}...")
+    subprocess.run([
+        sys.executable, '-c',
+        'import main, market_simulator; main.init_db(); '
+        f'print(market_simulator.sembrar_base_datos("trading_dashboard.db", main.get_universe(), {args.years}))'
+    ], cwd=workdir, env=env, check=True, stdout=subprocess.DEVNULL)
+
+    port = puerto_libre()
+    log = open(os.path.join(workdir, 'server.log'), 'w')
+    server = subprocess.Popen([
+        sys.executable, '-m', 'uvicorn', 'main:app',
+        '--host', '127.0.0.1', '--port', str(port),
+        '--workers', str(args.workers), '--log-level', 'warning'
+    ], cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    base_url = f'http://127.0.0.1:{port}'
+    esperar_servidor(base_url)
+    print(f"🚀 API en {base_url} ({args.workers} workers)")
+    return server, base_url
+
+def imprimir_resumen(usuarios, analistas, resumen):
+    print(f"\n👥 {usuarios} usuarios de dashboard + {analistas} analistas")
+    print(f"{'Endpoint':<22} {'reqs':>7} {'err%':>6} {'rps':>7} {'p50':>9} {'p95':>9} {'p99':>9}")
+    print('-' * 74)
+    for endpoint, r in resumen.items():
+        print(f"{endpoint:<22} {r['requests']:>7} {r['error_rate'] * 100:>5.1f}% {r['throughput_rps']:>7.2f} "
+              f"{r['p50_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms {r['p99_ms']:>7.1f}ms")
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(
+        description='Load test HTTP con tráfico realista del frontend',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Ejemplos de uso:
+  python benchmarks/load_test.py --users 10 50 100 --duration 60
+  python benchmarks/load_test.py --users 200 --symbols 500 --workers 4 --time-scale 0.1
+  python benchmarks/load_test.py --url http://127.0.0.1:8000 --users 20 --output /tmp/carga.json
+
+--time-scale 0.1 comprime los intervalos de refresh (30s -> 3s) para generar más carga por usuario.
+Sin --url se levanta uvicorn contra una BD temporal sembrada con market_simulator.py.
+        """
+    )
+    parser.add_argument('--users', type=int, nargs='+', default=[10, 50], help='Usuarios de dashboard concurrentes (una etapa por valor)')
+    parser.add_argument('--duration', type=int, default=60, help='Segundos por etapa')
+    parser.add_argument('--time-scale', type=float, default=1.0, help='Factor sobre intervalos de refresh y think time')
+    parser.add_argument('--analyst-ratio', type=float, default=0.1, help='Analistas (/analyze) por usuario de dashboard')
+    parser.add_argument('--historical-ratio', type=float, default=0.1, help='Fracción de requests de analistas a /historical-analysis')
+    parser.add_argument('--url', help='Usar una API ya levantada en lugar de levantar una')
+    parser.add_argument('--symbols', type=int, default=58, help='Tamaño del universo sintético')
+    parser.add_argument('--years', type=int, default=2, help='Años de historia sembrados')
+    parser.add_argument('--workers', type=int, default=1, help='Workers de uvicorn')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla (mercado y tráfico)')
+    parser.add_argument('--output', '-o', help='Guardar resultados JSON')
+
+    args = parser.parse_args()
+    server = None
+    workdir = None
+
+    try:
+        if args.url:
+            base_url = args.url.rstrip('/')
+        else:
+            workdir = tempfile.mkdtemp(prefix='loadtest_')
+            server, base_url = preparar_servidor(args, workdir)
+
+        url = urlparse(base_url)
+        conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+        conn.request('GET', '/tickers')
+        tickers = json.loads(conn.getresponse().read())['tickers']
+
+        etapas = []
+        for usuarios in args.users:
+            print(f"\n⏱️  Etapa: {usuarios} usuarios durante {args.duration}s...")
+            resumen, analistas = ejecutar_etapa(base_url, usuarios, args, tickers)
+            imprimir_resumen(usuarios, analistas, resumen)
+            etapas.append({'users': usuarios, 'analysts': analistas, 'endpoints': resumen})
+
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'timestamp': datetime.now().isoformat(),
+                    'config': vars(args),
+                    'stages': etapas
+                }, f, indent=2)
+            print(f"\n💾 Resultados guardados en {args.output}")
+
+    except KeyboardInterrupt:
+        print("\nOperación cancelada")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks: indicador VIX_Fix, análisis de trades, ingesta EOD y API end-to-end
+Los resultados se guardan en JSON; `compare` marca regresiones contra una corrida base
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'backend'))
+sys.path.insert(0, BENCH_DIR)
+
+from market_simulator import SyntheticMarket, filas_market_data_eod
+
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+# Mismo generador que el proveedor synthetic del backend y que load_test.py
+MERCADO = SyntheticMarket(seed=42)
+# Series de hasta 100k barras: símbolos cripto (todos los días) desde 1740
+MERCADO_LARGO = SyntheticMarket(seed=42, epoch='1740-01-01')
+# Densidad de señales para TradeAnalyzer: crashes por barra
+MERCADO_DENSIDAD = {
+    'dense': SyntheticMarket(seed=7, prob_crash=0.03),
+    'sparse': SyntheticMarket(seed=7, prob_crash=0.001)
+}
+
+def serie_sintetica(symbol, n_bars, market=MERCADO):
+    """Últimas n_bars barras diarias del símbolo hasta hoy"""
+    fin = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+    return market.history(symbol, end=fin).tail(n_bars)
+
+def medir(func, repeat, setup=None):
+    """
+    Ejecutar func `repeat` veces (setup fuera de la medición) y devolver estadísticas en segundos
+    """
+    tiempos = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            func()
+            tiempos.append(time.perf_counter() - inicio)
+    return {
+        'median_s': statistics.median(tiempos),
+        'min_s': min(tiempos),
+        'mean_s': statistics.mean(tiempos),
+        'repeat': repeat
+    }
+
+# =====================================================
+# PROVEEDOR DE DATOS FAKE (sin red)
+# =====================================================
+
+class FakeTicker:
+    """Reemplazo de yf.Ticker: history() del mercado sintético (determinístico por símbolo)"""
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    def history(self, **kwargs):
+        return MERCADO.history(self.symbol, **kwargs)
+
+def instalar_proveedor_fake(*modulos):
+    fake_yf = types.SimpleNamespace(Ticker=FakeTicker)
+    for modulo in modulos:
+        modulo.yf = fake_yf
+
+# =====================================================
+# BENCHMARKS
+# =====================================================
+
+def bench_vix_fix(args, resultados):
+    from vix_fix_strategy import VixFixStrategy
+
+    strategy = VixFixStrategy()
+    for n_bars, etiqueta in ((1_000, '1k'), (10_000, '10k'), (100_000, '100k')):
+        if args.quick and n_bars > 10_000:
+            continue
+        data = serie_sintetica('BENCH-USD', n_bars, MERCADO_LARGO)
+        resultados[f'vix_fix.calculate.{etiqueta}'] = medir(
+            lambda: strategy.calculate_vix_fix(data), args.repeat
+        )
+
+        # Salida de las señales: reporte humano (sink tabla) y CSV en memoria
+        df_vix = strategy.calculate_vix_fix(data)
+        senales = df_vix[df_vix['es_verde']]
+        resultados[f'vix_fix.mostrar_resultados.{etiqueta}'] = medir(
+            lambda: strategy.mostrar_resultados(senales, 'BENCH'), args.repeat
+        )
+        resultados[f'vix_fix.exportar_csv.{etiqueta}'] = medir(
+            lambda: strategy.exportar_resultados(senales, 'csv'), args.repeat
+        )
+
+def bench_trade_analyzer(args, resultados):
+    import main
+    from trade_analyzer import TradeAnalyzer
+
+    fecha_fin = datetime.now().strftime('%Y-%m-%d')
+    fecha_inicio = (datetime.now() - timedelta(days=730)).strftime('%Y-%m-%d')
+
+    for densidad in ('dense', 'sparse'):
+        symbol = f'BENCH_{densidad.upper()}'
+        sembrar_simbolo(main, symbol, serie_sintetica(symbol, 1500, MERCADO_DENSIDAD[densidad]))
+
+        analyzer = TradeAnalyzer(profit_target=0.04, max_hold_days=30)
+        with contextlib.redirect_stdout(io.StringIO()):
+            trades = analyzer.analizar_trades(symbol, fecha_inicio, fecha_fin)
+
+        stats = medir(lambda: analyzer.analizar_trades(symbol, fecha_inicio, fecha_fin), args.repeat)
+        stats['trades'] = 0 if trades is None else len(trades)
+        resultados[f'trade_analyzer.analizar_trades.{densidad}'] = stats
+
+def bench_ingesta(args, resultados):
+    import main
+
+    n_filas = 5_000 if args.quick else 50_000
+    df = serie_sintetica('INGEST-USD', n_filas, MERCADO_LARGO)
+    filas = filas_market_data_eod('BENCH_INGEST', df)
+
+    def borrar():
+        conn = main.connect_db('trading_dashboard.db')
+        conn.execute("DELETE FROM market_data_eod WHERE symbol = 'BENCH_INGEST'")
+        conn.commit()
+        conn.close()
+
+    def ingesta_bulk():
+        conn = main.connect_db('trading_dashboard.db')
+        conn.executemany('''
+            INSERT OR REPLACE INTO market_data_eod
+            (symbol, business_date, open_price, high_price, low_price, close_price, volume, adj_close, data_source)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', filas)
+        conn.commit()
+        conn.close()
+
+    resultados[f'ingesta.executemany.{n_filas // 1000}k'] = medir(ingesta_bulk, args.repeat, setup=borrar)
+
+    # Camino del EOD job: validación + continuidad + un INSERT por fila
+    registros = df.tail(500)
+
+    def ingesta_eod():
+        for fecha, row in registros.iterrows():
+            main.insert_or_update_eod_data('BENCH_INGEST', fecha.strftime('%Y-%m-%d'), row.to_dict())
+
+    stats = medir(ingesta_eod, args.repeat, setup=borrar)
+    stats['rows'] = len(registros)
+    resultados['ingesta.insert_or_update_eod_data.500'] = stats
+
+    # Carga histórica / smart_populate: el mismo lote en un solo upsert
+    stats = medir(lambda: main.guardar_barras_eod('BENCH_INGEST', registros), args.repeat, setup=borrar)
+    stats['rows'] = len(registros)
+    resultados['ingesta.guardar_barras_eod.500'] = stats
+
+def bench_api(args, resultados):
+    import main
+    from fastapi.testclient import TestClient
+
+    symbols = [f'SYN{i:03d}' for i in range(args.symbols)]
+    for symbol in symbols:
+        sembrar_simbolo(main, symbol, serie_sintetica(symbol, 1100))
+    # El universo del benchmark son solo los símbolos sintéticos (registrados al sembrar sus datos;
+    # symbols no se vacía: su symbol_id es la clave de las filas EOD)
+    conn = main.connect_db('trading_dashboard.db')
+    conn.execute('UPDATE symbols SET active = symbol IN (SELECT value FROM json_each(?))', (json.dumps(symbols),))
+    conn.commit()
+    conn.close()
+    main.universo_modificado()
+
+    fecha_dashboard = (datetime.now() - timedelta(days=60)).strftime('%Y-%m-%d')
+    fecha_inicio = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
+    fecha_fin = datetime.now().strftime('%Y-%m-%d')
+
+    with contextlib.redirect_stdout(io.StringIO()), TestClient(main.app) as client:
+        def get(url):
+            response = client.get(url)
+            assert response.status_code == 200, f"{url}: {response.status_code} {response.text[:200]}"
+
+        dashboard_url = f'/dashboard?fecha={fecha_dashboard}'
+        resultados[f'api.dashboard.cold.{len(symbols)}_symbols'] = medir(
+            lambda: get(dashboard_url), args.repeat, setup=main.dashboard_snapshots.clear
+        )
+        get(dashboard_url)
+        resultados[f'api.dashboard.warm.{len(symbols)}_symbols'] = medir(
+            lambda: get(dashboard_url), args.repeat
+        )
+        historical_url = f'/historical-analysis?fecha_inicio={fecha_inicio}&fecha_fin={fecha_fin}'
+        resultados[f'api.historical_analysis.{len(symbols)}_symbols'] = medir(
+            lambda: get(historical_url), args.repeat
+        )
+
+def bench_analitica(args, resultados):
+    import main
+    from analytics_engine import AnalyticsEngine
+    from screener import escanear
+    from vix_fix_strategy import VixFixStrategy
+
+    symbols = [f'ANA{i:03d}' for i in range(args.symbols)]
+    for symbol in symbols:
+        sembrar_simbolo(main, symbol, serie_sintetica(symbol, 1100))
+
+    fecha_inicio = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
+    fecha_fin = datetime.now().strftime('%Y-%m-%d')
+    n = len(symbols)
+
+    resultados[f'analitica.integridad.sql_full.{n}_symbols'] = medir(
+        lambda: main.run_integrity_check(full=True), args.repeat
+    )
+
+    def reescribir_ultima_fila():
+        # Simula un EOD: una fila nueva por símbolo queda encolada para el chequeo incremental
+        conn = main.connect_db('trading_dashboard.db')
+        conn.execute('''
+            UPDATE market_data_eod SET data_quality_score = data_quality_score
+            WHERE (symbol, business_date) IN (
+                SELECT symbol, MAX(business_date) FROM market_data_eod WHERE symbol LIKE 'ANA%' GROUP BY symbol
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    resultados[f'analitica.integridad.sql_incremental.{n}_symbols'] = medir(
+        main.run_integrity_check, args.repeat, setup=reescribir_ultima_fila
+    )
+    resultados[f'analitica.integridad.lectura_log.{n}_symbols'] = medir(main.check_data_integrity, args.repeat)
+
+    def senales_por_simbolo():
+        strategy = VixFixStrategy()
+        for symbol in symbols:
+            strategy.obtener_fechas_compra(symbol, fecha_inicio, fecha_fin)
+
+    resultados[f'analitica.vix_fix.por_simbolo.{n}_symbols'] = medir(senales_por_simbolo, args.repeat)
+
+    def verdes_hoy_por_simbolo():
+        strategy = VixFixStrategy()
+        for symbol in symbols:
+            strategy.obtener_fechas_compra(symbol, fecha_fin, fecha_fin)
+
+    resultados[f'analitica.screener.por_simbolo.{n}_symbols'] = medir(verdes_hoy_por_simbolo, args.repeat)
+    resultados[f'analitica.screener.vectorizado.{n}_symbols'] = medir(
+        lambda: escanear('trading_dashboard.db', symbols, fecha_fin), args.repeat
+    )
+
+    engine = AnalyticsEngine('trading_dashboard.db', engine='duckdb')
+    if not engine.enabled:
+        print(f"   (sin DuckDB: {engine.error})")
+        return
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.ohlcv_panel(symbols, fecha_inicio, fecha_fin)  # Conexión y copia inicial fuera de la medición
+    resultados[f'analitica.ohlcv.panel_duckdb.{n}_symbols'] = medir(
+        lambda: engine.ohlcv_panel(symbols, fecha_inicio, fecha_fin), args.repeat
+    )
+
+# Módulos de línea de comandos: su import no debe arrastrar yfinance (solo se usa en el fallback)
+MODULOS_CLI = ('vix_fix_strategy', 'trade_analyzer', 'analizar_ticker', 'ticker_data', 'screener')
+
+def medir_import(modulo):
+    """Tiempo de import (segundos) en un intérprete nuevo y si terminó cargando yfinance"""
+    codigo = (
+        "import sys, time\n"
+        "inicio = time.perf_counter()\n"
+        f"import {modulo}\n"
+        "print(time.perf_counter() - inicio, 'yfinance' in sys.modules)"
+    )
+    salida = subprocess.check_output(
+        [sys.executable, '-c', codigo], cwd=ROOT_DIR, stderr=subprocess.DEVNULL
+    ).decode().split()
+    return float(salida[0]), salida[1] == 'True'
+
+def bench_arranque(args, resultados):
+    for modulo in MODULOS_CLI:
+        tiempos = []
+        carga_yfinance = False
+        for _ in range(args.repeat):
+            segundos, con_yf = medir_import(modulo)
+            tiempos.append(segundos)
+            carga_yfinance = carga_yfinance or con_yf
+
+        mediana = statistics.median(tiempos)
+        resultados[f'arranque.import.{modulo}'] = {
+            'median_s': mediana,
+            'min_s': min(tiempos),
+            'mean_s': statistics.mean(tiempos),
+            'repeat': args.repeat,
+            'yfinance': carga_yfinance,
+            'budget_s': args.import_budget,
+            'budget_ok': not carga_yfinance and mediana <= args.import_budget
+        }
+
+    # CLI completo (intérprete incluido): --help no debe pagar el import de pandas/numpy
+    resultados['arranque.help.analizar_ticker'] = medir(
+        lambda: subprocess.run(
+            [sys.executable, os.path.join(ROOT_DIR, 'analizar_ticker.py'), '--help'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True
+        ),
+        args.repeat
+    )
+
+def sembrar_simbolo(main, symbol, df):
+    conn = main.connect_db('trading_dashboard.db')
+    conn.execute('DELETE FROM market_data_eod WHERE symbol = ?', (symbol,))
+    conn.executemany('''
+        INSERT INTO market_data_eod
+        (symbol, business_date, open_price, high_price, low_price, close_price, volume, adj_close, data_source)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', filas_market_data_eod(symbol, df))
+    conn.commit()
+    conn.close()
+
+BENCHMARKS = {
+    'vix_fix': bench_vix_fix,
+    'trade_analyzer': bench_trade_analyzer,
+    'ingesta': bench_ingesta,
+    'api': bench_api,
+    'analitica': bench_analitica,
+    'arranque': bench_arranque
+}
+
+# =====================================================
+# COMANDOS
+# =====================================================
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+def comando_run(args):
+    grupos = args.only or list(BENCHMARKS)
+    workdir = tempfile.mkdtemp(prefix='bench_')
+    cwd = os.getcwd()
+    resultados = {}
+
+    try:
+        # BD aislada: main y los analizadores usan trading_dashboard.db del directorio actual
+        os.chdir(workdir)
+        import main
+        import trade_analyzer
+        import vix_fix_strategy
+
+        instalar_proveedor_fake(main, trade_analyzer, vix_fix_strategy)
+        main.start_background_services = lambda: None  # Sin refresher ni scheduler durante la medición
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.init_db()
+
+        for grupo in grupos:
+            print(f"⏱️  {grupo}...")
+            BENCHMARKS[grupo](args, resultados)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    reporte = {
+        'timestamp': datetime.now().isoformat(),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': resultados
+    }
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(reporte, f, indent=2)
+
+    print(f"\n{'Benchmark':<50} {'mediana':>12} {'mínimo':>12}")
+    print('-' * 76)
+    for nombre, stats in resultados.items():
+        print(f"{nombre:<50} {stats['median_s'] * 1000:>10.2f}ms {stats['min_s'] * 1000:>10.2f}ms")
+    print(f"\n💾 Resultados guardados en {output}")
+
+    fuera_de_budget = [nombre for nombre, stats in resultados.items() if stats.get('budget_ok') is False]
+    if fuera_de_budget:
+        for nombre in fuera_de_budget:
+            stats = resultados[nombre]
+            motivo = 'importa yfinance' if stats['yfinance'] else f"supera {stats['budget_s'] * 1000:.0f}ms"
+            print(f"❌ {nombre}: {motivo}")
+        sys.exit(1)
+
+def comando_compare(args):
+    with open(args.base, encoding='utf-8') as f:
+        base = json.load(f)['results']
+    with open(args.new, encoding='utf-8') as f:
+        nuevo = json.load(f)['results']
+
+    regresiones = []
+    print(f"{'Benchmark':<50} {'base':>11} {'nuevo':>11} {'cambio':>9}")
+    print('-' * 84)
+    for nombre in sorted(set(base) & set(nuevo)):
+        antes = base[nombre]['median_s']
+        despues = nuevo[nombre]['median_s']
+        cambio = (despues - antes) / antes if antes > 0 else 0.0
+
+        marca = ''
+        if cambio > args.threshold:
+            marca = '  ❌ REGRESIÓN'
+            regresiones.append(nombre)
+        elif cambio < -args.threshold:
+            marca = '  ✅ mejora'
+
+        print(f"{nombre:<50} {antes * 1000:>9.2f}ms {despues * 1000:>9.2f}ms {cambio:>+8.1%}{marca}")
+
+    for nombre in sorted(set(base) ^ set(nuevo)):
+        print(f"{nombre:<50} (solo en {'base' if nombre in base else 'nuevo'})")
+
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} regresiones por encima de {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"\n✅ Sin regresiones por encima de {args.threshold:.0%}")
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(
+        description='Benchmarks de performance (VIX_Fix, trades, ingesta, API)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Ejemplos de uso:
+  python benchmarks/run_benchmarks.py run
+  python benchmarks/run_benchmarks.py run --only vix_fix trade_analyzer --repeat 10
+  python benchmarks/run_benchmarks.py run --quick --output /tmp/antes.json
+  python benchmarks/run_benchmarks.py run --only arranque --import-budget 0.5
+  python benchmarks/run_benchmarks.py compare /tmp/antes.json /tmp/despues.json --threshold 0.15
+        """
+    )
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Ejecutar benchmarks y guardar resultados JSON')
+    run_parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help='Grupos a ejecutar (default: todos)')
+    run_parser.add_argument('--repeat', type=int, default=5, help='Repeticiones por benchmark')
+    run_parser.add_argument('--symbols', type=int, default=10, help='Símbolos sintéticos para los benchmarks de API')
+    run_parser.add_argument('--quick', action='store_true', help='Tamaños reducidos (sin 100k barras)')
+    run_parser.add_argument('--import-budget', type=float, default=0.75, help='Máximo (segundos) para el import de cada módulo CLI en el grupo arranque')
+    run_parser.add_argument('--output', '-o', help='Archivo JSON de salida (default: benchmarks/results/)')
+
+    compare_parser = subparsers.add_parser('compare', help='Comparar dos corridas y marcar regresiones')
+    compare_parser.add_argument('base', help='JSON de la corrida base')
+    compare_parser.add_argument('new', help='JSON de la corrida nueva')
+    compare_parser.add_argument('--threshold', type=float, default=0.10, help='Regresión si la mediana empeora más que esto (0.10 = 10%%)')
+
+    args = parser.parse_args()
+
+    try:
+        if args.comando == 'run':
+            comando_run(args)
+        else:
+            comando_compare(args)
+    except KeyboardInterrupt:
+        print("\nOperación cancelada")
+        sys.exit(0)
+
+if __name__ == "__main__":
+    main()
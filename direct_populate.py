@@ -8,12 +8,13 @@ import sqlite3
 import pandas as pd
 from datetime import datetime, timedelta
 import os
+import sys
 
 # Configuración
 DB_PATH = "backend/trading_dashboard.db"
 MESES_ATRAS = 3
 
-# Lista de símbolos principales
+# Lista de respaldo si la BD todavía no tiene la tabla symbols del backend
 SYMBOLS = [
     # Cryptos
     "BTC-USD", "ETH-USD", "USDT-USD", "BNB-USD", "XRP-USD", "USDC-USD", "ADA-USD",
@@ -36,14 +37,25 @@ def conectar_bd():
     """Conectar a la base de datos"""
     return sqlite3.connect(DB_PATH)
 
+def cargar_simbolos():
+    """Universo activo desde la tabla symbols (o la lista de respaldo)"""
+    conn = conectar_bd()
+    try:
+        rows = conn.execute("SELECT symbol FROM symbols WHERE active = 1 ORDER BY symbol_id").fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    finally:
+        conn.close()
+    return [row[0] for row in rows] or SYMBOLS
+
 def verificar_tabla_existe():
-    """Verificar que la tabla market_data_eod existe"""
+    """Verificar que market_data_eod existe (tabla original o vista del esquema compacto)"""
     conn = conectar_bd()
     cursor = conn.cursor()
     
     cursor.execute("""
         SELECT name FROM sqlite_master 
-        WHERE type='table' AND name='market_data_eod'
+        WHERE type IN ('table', 'view') AND name='market_data_eod'
     """)
     
     exists = cursor.fetchone() is not None
@@ -154,6 +166,23 @@ def insertar_datos_simbolo(symbol, fecha_inicio, fecha_fin):
         print(f"    ERROR {symbol}: {e}")
         return 0
 
+def cerrar_ingest():
+    """
+    Mismo cierre que un ingest del backend: integridad, cobertura, snapshot de lectura y
+    versión 'eod' nueva (sin esto el backend sigue sirviendo el snapshot anterior)
+    """
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+    # El backend trabaja sobre trading_dashboard.db del directorio actual
+    os.chdir(os.path.dirname(os.path.abspath(DB_PATH)))
+    try:
+        import main as backend
+    except ImportError as e:
+        print(f"AVISO: Backend no disponible ({e}); publicar con POST /read-snapshot/publish")
+        return
+    
+    backend.init_db()
+    print(f"  Versión EOD publicada: {backend.cerrar_ingest_eod()}")
+
 def generar_fechas_objetivo():
     """Generar fechas de los últimos N meses"""
     hoy = datetime.now()
@@ -176,14 +205,15 @@ def main():
     # Calcular fechas
     fecha_inicio, fecha_fin = generar_fechas_objetivo()
     print(f"Período: {fecha_inicio} a {fecha_fin}")
-    print(f"Símbolos a procesar: {len(SYMBOLS)}")
+    symbols = cargar_simbolos()
+    print(f"Símbolos a procesar: {len(symbols)}")
     
     # Procesar cada símbolo
     total_procesados = 0
     exitosos = 0
     
-    for i, symbol in enumerate(SYMBOLS, 1):
-        print(f"[{i}/{len(SYMBOLS)}] Procesando {symbol}")
+    for i, symbol in enumerate(symbols, 1):
+        print(f"[{i}/{len(symbols)}] Procesando {symbol}")
         
         registros = insertar_datos_simbolo(symbol, fecha_inicio, fecha_fin)
         total_procesados += registros
@@ -193,7 +223,7 @@ def main():
     
     # Resumen final
     print(f"\nResumen:")
-    print(f"  Símbolos exitosos: {exitosos}/{len(SYMBOLS)}")
+    print(f"  Símbolos exitosos: {exitosos}/{len(symbols)}")
     print(f"  Total registros procesados: {total_procesados}")
     
     # Estado final de ETH-USD
@@ -212,6 +242,9 @@ def main():
     print(f"  Fechas únicas: {total_dates}")
     print(f"  Rango: {date_range[0]} a {date_range[1]}")
     print(f"  VIX_Fix: {'SUFICIENTE' if eth_records >= 50 else 'INSUFICIENTE'} ({eth_records}/50+)")
+    
+    if total_procesados:
+        cerrar_ingest()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
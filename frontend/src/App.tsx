@@ -4,10 +4,16 @@ import StatsCards from './components/StatsCards';
 import DateSelector from './components/DateSelector';
 import TradesTable from './components/TradesTable';
 import { RefreshControl } from './components/RefreshControl';
-import { tradingAPI } from './services/api';
-import { DashboardData } from './types';
+import { tradingAPI, subscribeToEvents } from './services/api';
+import { DashboardData, TradeResult } from './types';
 import { AlertCircle } from 'lucide-react';
 
+// Mismo criterio que el backend: un trade abierto es exitoso si el precio actual alcanzó su target
+const esTradeExitoso = (trade: TradeResult): boolean =>
+  trade.estado === 'ABIERTO'
+    ? (trade.precio_actual ?? trade.precio_compra) >= trade.precio_target
+    : trade.estado === 'EXITOSO';
+
 function App() {
   const [dashboardData, setDashboardData] = useState<DashboardData | null>(null);
   const [selectedDate, setSelectedDate] = useState<string>(() => {
@@ -22,6 +28,7 @@ function App() {
   const [isAutoRefreshEnabled, setIsAutoRefreshEnabled] = useState<boolean>(true);
   const [refreshInterval, setRefreshInterval] = useState<number>(30000);
   const [lastUpdated, setLastUpdated] = useState<Date | undefined>();
+  const [isLive, setIsLive] = useState<boolean>(false);
 
   // Check API health
   const checkApiHealth = useCallback(async () => {
@@ -119,9 +126,52 @@ function App() {
     }
   }, [loadDashboardData, apiStatus]);
 
-  // Auto-refresh with configurable interval
+  // Push updates: precios se aplican en el lugar, datos EOD nuevos recargan el dashboard
+  useEffect(() => {
+    if (!isAutoRefreshEnabled || apiStatus !== 'connected') {
+      setIsLive(false);
+      return;
+    }
+
+    const unsubscribe = subscribeToEvents({
+      onStatusChange: setIsLive,
+      onPrices: ({ prices }) => {
+        const preciosPorTicker = new Map(prices.map(p => [p.ticker, p.precio_actual]));
+        setDashboardData(prev => {
+          if (!prev) return prev;
+          const trades = prev.trades_abiertos.map(trade => {
+            const precio = preciosPorTicker.get(trade.ticker);
+            if (precio === undefined || trade.estado !== 'ABIERTO') return trade;
+            const profitAbsoluto = precio - trade.precio_compra;
+            return {
+              ...trade,
+              precio_actual: precio,
+              profit_absoluto: Math.round(profitAbsoluto * 100) / 100,
+              profit_pct: Math.round((profitAbsoluto / trade.precio_compra) * 10000) / 100,
+            };
+          });
+          // Los KPIs que dependen del precio se recalculan juntos
+          return {
+            ...prev,
+            trades_abiertos: trades,
+            trades_exitosos: trades.filter(esTradeExitoso).length,
+            profit_total: Math.round(trades.reduce((sum, t) => sum + t.profit_absoluto, 0) * 100) / 100,
+          };
+        });
+        setLastUpdated(new Date());
+      },
+      onEod: () => loadDashboardData(),
+    });
+
+    return () => {
+      unsubscribe();
+      setIsLive(false);
+    };
+  }, [isAutoRefreshEnabled, apiStatus, loadDashboardData]);
+
+  // Auto-refresh with configurable interval (solo si el canal push no está conectado)
   useEffect(() => {
-    if (!isAutoRefreshEnabled) return;
+    if (!isAutoRefreshEnabled || isLive) return;
 
     const interval = setInterval(() => {
       if (apiStatus === 'connected' && !isLoading) {
@@ -130,7 +180,7 @@ function App() {
     }, refreshInterval);
 
     return () => clearInterval(interval);
-  }, [loadDashboardData, apiStatus, isLoading, isAutoRefreshEnabled, refreshInterval]);
+  }, [loadDashboardData, apiStatus, isLoading, isAutoRefreshEnabled, isLive, refreshInterval]);
 
   // Refresh control handlers
   const handleToggleAutoRefresh = () => {
@@ -187,6 +237,7 @@ function App() {
             onManualRefresh={handleManualRefresh}
             isLoading={isLoading}
             lastUpdated={lastUpdated}
+            isLive={isLive}
           />
         </div>
 
@@ -9,6 +9,7 @@ interface RefreshControlProps {
   onManualRefresh: () => void;
   isLoading: boolean;
   lastUpdated?: Date;
+  isLive?: boolean;
 }
 
 const REFRESH_OPTIONS = [
@@ -27,12 +28,13 @@ export const RefreshControl: React.FC<RefreshControlProps> = ({
   onManualRefresh,
   isLoading,
   lastUpdated,
+  isLive = false,
 }) => {
   const [isExpanded, setIsExpanded] = useState(false);
   const [countdown, setCountdown] = useState(0);
 
   useEffect(() => {
-    if (!isAutoRefreshEnabled) {
+    if (!isAutoRefreshEnabled || isLive) {
       setCountdown(0);
       return;
     }
@@ -49,7 +51,7 @@ export const RefreshControl: React.FC<RefreshControlProps> = ({
     }, 100);
 
     return () => clearInterval(timer);
-  }, [isAutoRefreshEnabled, refreshInterval, lastUpdated]);
+  }, [isAutoRefreshEnabled, isLive, refreshInterval, lastUpdated]);
 
   const formatTime = (ms: number) => {
     const seconds = Math.ceil(ms / 1000);
@@ -129,7 +131,20 @@ export const RefreshControl: React.FC<RefreshControlProps> = ({
         </div>
       </div>
 
-      {isAutoRefreshEnabled && (
+      {isAutoRefreshEnabled && isLive && (
+        <div className="mb-4 p-3 bg-success-900/20 border border-success-700/50 rounded-md">
+          <div className="flex items-center justify-between">
+            <span className="text-sm text-success-300">
+              Conectado en vivo
+            </span>
+            <span className="text-xs text-gray-400">
+              Precios y señales llegan al cambiar en el servidor
+            </span>
+          </div>
+        </div>
+      )}
+
+      {isAutoRefreshEnabled && !isLive && (
         <div className="mb-4 p-3 bg-primary-900/20 border border-primary-700/50 rounded-md">
           <div className="flex items-center justify-between">
             <span className="text-sm text-primary-300">
@@ -174,6 +189,7 @@ export const RefreshControl: React.FC<RefreshControlProps> = ({
           </div>
 
           <div className="text-xs text-gray-400 pt-2 border-t border-gray-700">
+            <p>• Con la conexión en vivo activa no se hace polling; el intervalo se usa solo si se pierde la conexión</p>
             <p>• El auto-refresh se pausa automáticamente durante las cargas</p>
             <p>• Los datos se actualizan solo si la API está conectada</p>
             <p>• Usa "Actualizar" para refrescar manualmente en cualquier momento</p>
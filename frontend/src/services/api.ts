@@ -47,6 +47,16 @@ export const tradingAPI = {
     return response.data;
   },
 
+  // Obtener precios de varios tickers en una sola llamada
+  getPrices: async (tickers: string[]): Promise<{
+    prices: Record<string, TickerPrice>;
+    missing: string[];
+    count: number;
+  }> => {
+    const response = await api.get(`/prices?tickers=${encodeURIComponent(tickers.join(','))}`);
+    return response.data;
+  },
+
   // Obtener datos del dashboard
   getDashboardData: async (fecha: string): Promise<DashboardData> => {
     const response = await api.get(`/dashboard?fecha=${fecha}`);
@@ -129,4 +139,25 @@ export const tradingAPI = {
   },
 };
 
+// Suscripción push (Server-Sent Events) a cambios de precios, datos EOD y señales
+export interface LiveEventHandlers {
+  onPrices?: (data: { price_version: number; prices: TickerPrice[] }) => void;
+  onEod?: (data: { data_version: number; business_date: string; symbols: string[] }) => void;
+  onSignals?: (data: { business_date: string; signals: Array<{ ticker: string; close: number; wvf: number }> }) => void;
+  onStatusChange?: (connected: boolean) => void;
+}
+
+export const subscribeToEvents = (handlers: LiveEventHandlers): (() => void) => {
+  const source = new EventSource(`${API_BASE_URL}/events`);
+
+  source.addEventListener('hello', () => handlers.onStatusChange?.(true));
+  source.addEventListener('prices', (event) => handlers.onPrices?.(JSON.parse((event as MessageEvent).data)));
+  source.addEventListener('eod', (event) => handlers.onEod?.(JSON.parse((event as MessageEvent).data)));
+  source.addEventListener('signals', (event) => handlers.onSignals?.(JSON.parse((event as MessageEvent).data)));
+  // EventSource reintenta solo; mientras tanto el dashboard vuelve a polling
+  source.onerror = () => handlers.onStatusChange?.(false);
+
+  return () => source.close();
+};
+
 export default api;
\ No newline at end of file
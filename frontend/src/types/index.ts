@@ -22,6 +22,9 @@ export interface DashboardData {
   trades_exitosos: number;
   profit_total: number;
   dias_promedio: number;
+  data_version?: number;
+  price_version?: number;
+  snapshot_built_at?: string;
 }
 
 export interface TickerPrice {
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Acceso compartido a la BD local para los scripts de línea de comandos y los analizadores
+
+- buscar_db_path(): ubicación de trading_dashboard.db, resuelta una vez por proceso
+- leer_ohlcv_eod(): rango OHLCV diario de un símbolo (esquema compacto o tabla original)
+- leer_panel_ohlcv_eod(): el mismo rango para varios símbolos en una consulta
+- leer_universo(): símbolos activos (tabla symbols del backend)
+- importar_yfinance(): yfinance se importa recién cuando hace falta el fallback
+  (su import cuesta más que todo el resto del arranque y con datos locales no se usa)
+"""
+
+import os
+import sqlite3
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+POSSIBLE_DB_PATHS = [
+    'backend/trading_dashboard.db',           # Desde root del proyecto
+    'trading_dashboard.db',                   # Desde directorio backend
+    '../trading_dashboard.db',                # Desde subdirectorio
+    os.path.join(ROOT_DIR, 'backend', 'trading_dashboard.db'),  # Relativo al script
+    os.path.join(os.path.dirname(ROOT_DIR), 'backend', 'trading_dashboard.db')  # Backup
+]
+
+_db_path = None
+
+def buscar_db_path():
+    """
+    Encontrar path correcto de la BD (None si no existe). El primer hallazgo queda cacheado
+    como path absoluto (no depende de cambios posteriores del directorio actual).
+    """
+    global _db_path
+    if _db_path is None:
+        encontrado = next((path for path in POSSIBLE_DB_PATHS if os.path.exists(path)), None)
+        _db_path = os.path.abspath(encontrado) if encontrado else None
+    return _db_path
+
+def importar_yfinance():
+    """Import diferido de yfinance (solo para el fallback sin datos locales)"""
+    import yfinance
+    return yfinance
+
+COLUMNAS_OHLCV = {
+    'open_price': 'Open',
+    'high_price': 'High',
+    'low_price': 'Low',
+    'close_price': 'Close',
+    'volume': 'Volume'
+}
+
+def esquema_compacto(conn):
+    """
+    market_data_eod_v2 keyeada por symbols.symbol_id (backend/eod_storage.py). Una BD todavía sin
+    migrar (tabla original, o v2 con el diccionario eod_symbols anterior) se lee por market_data_eod.
+    """
+    tablas = {nombre for (nombre,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE name IN ('market_data_eod_v2', 'eod_symbols')"
+    )}
+    return tablas == {'market_data_eod_v2'}
+
+def _consulta_ohlcv(conn, n_symbols, columnas_extra=(), con_symbol=False):
+    """SELECT OHLCV de n_symbols símbolos en un rango de fechas (params: *symbols, inicio, fin)"""
+    # Esquema compacto: un rango de la clave (symbol_id, day)
+    esquema_v2 = esquema_compacto(conn)
+    extra = ''.join(f', e.{columna}' for columna in columnas_extra)
+    placeholders = ','.join('?' * n_symbols)
+
+    if esquema_v2:
+        symbol = 's.symbol, ' if con_symbol else ''
+        return f'''
+            SELECT {symbol}date(e.day * 86400, 'unixepoch') AS business_date,
+                   e.open_price, e.high_price, e.low_price, e.close_price, e.volume{extra}
+            FROM market_data_eod_v2 e
+            JOIN symbols s ON s.symbol_id = e.symbol_id
+            WHERE s.symbol IN ({placeholders})
+              AND e.day >= CAST(julianday(?) - 2440587.5 AS INTEGER)
+              AND e.day <= CAST(julianday(?) - 2440587.5 AS INTEGER)
+            ORDER BY e.symbol_id, e.day ASC
+        '''
+    symbol = 'e.symbol, ' if con_symbol else ''
+    return f'''
+        SELECT {symbol}e.business_date, e.open_price, e.high_price, e.low_price, e.close_price, e.volume{extra}
+        FROM market_data_eod e
+        WHERE e.symbol IN ({placeholders}) AND e.business_date >= ? AND e.business_date <= ?
+        ORDER BY e.symbol, e.business_date ASC
+    '''
+
+def leer_ohlcv_eod(db_path, ticker, fecha_inicio, fecha_fin, columnas_extra=()):
+    """
+    OHLCV diario de ticker entre fecha_inicio y fecha_fin (inclusive) ordenado por fecha.
+    db_path puede ser un path o una URI sqlite (ej: snapshot inmutable del backend).
+    Columnas: business_date, open_price, high_price, low_price, close_price, volume + columnas_extra.
+    """
+    import pandas as pd
+
+    conn = sqlite3.connect(db_path, uri=True)
+    try:
+        query = _consulta_ohlcv(conn, 1, columnas_extra)
+        return pd.read_sql_query(query, conn, params=(ticker, fecha_inicio, fecha_fin))
+    finally:
+        conn.close()
+
+def leer_panel_ohlcv_eod(db_path, tickers, fecha_inicio, fecha_fin):
+    """
+    OHLCV de varios símbolos en una sola consulta: {symbol: DataFrame estilo yfinance}
+    (mismo formato que AnalyticsEngine.ohlcv_panel, listo para TradeAnalyzer.precargar_datos).
+    Los símbolos sin filas no aparecen en el resultado.
+    """
+    import pandas as pd
+
+    if not tickers:
+        return {}
+    conn = sqlite3.connect(db_path, uri=True)
+    try:
+        query = _consulta_ohlcv(conn, len(tickers), con_symbol=True)
+        df = pd.read_sql_query(query, conn, params=(*tickers, fecha_inicio, fecha_fin))
+    finally:
+        conn.close()
+
+    df['business_date'] = pd.to_datetime(df['business_date'])
+    df = df.rename(columns=COLUMNAS_OHLCV)
+    return {
+        symbol: grupo.set_index('business_date')[list(COLUMNAS_OHLCV.values())]
+        for symbol, grupo in df.groupby('symbol', sort=False)
+    }
+
+def leer_universo(db_path):
+    """
+    Símbolos activos del universo (tabla symbols, en el orden del backend).
+    Una BD sin tabla symbols usa los símbolos con datos EOD.
+    """
+    conn = sqlite3.connect(db_path, uri=True)
+    try:
+        tablas = {nombre for (nombre,) in conn.execute("SELECT name FROM sqlite_master")}
+        if 'symbols' in tablas:
+            query = 'SELECT symbol FROM symbols WHERE active = 1 ORDER BY symbol_id'
+        else:
+            query = 'SELECT DISTINCT symbol FROM market_data_eod ORDER BY symbol'
+        return [symbol for (symbol,) in conn.execute(query)]
+    finally:
+        conn.close()
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Market Simulator - Mercado sintético determinístico y proveedor offline
+Random walk geométrico con regímenes de volatilidad y episodios de crash (disparan señales
+verdes de VIX_Fix), calendarios por exchange y universos de 58 a 10.000+ símbolos.
+
+El backend lo usa en lugar de yfinance con MARKET_DATA_PROVIDER=synthetic
+(EOD job, carga inicial, reparación de gaps y actualizador de precios).
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import zlib
+from datetime import datetime, timedelta, time as dtime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import pytz
+
+# Calendarios por exchange (mismos horarios que MARKET_SCHEDULES en backend/main.py)
+EXCHANGE_CALENDARS = {
+    'NYSE': {
+        'timezone': 'America/New_York',
+        'open_time': dtime(9, 30),
+        'close_time': dtime(16, 0),
+        'market_days': [0, 1, 2, 3, 4],
+        'holidays': ['01-01', '06-19', '07-04', '12-25'],
+        'vol_mult': 1.0,
+        'precio_base': 80.0
+    },
+    'BCBA': {
+        'timezone': 'America/Argentina/Buenos_Aires',
+        'open_time': dtime(11, 0),
+        'close_time': dtime(17, 0),
+        'market_days': [0, 1, 2, 3, 4],
+        'holidays': ['01-01', '03-24', '05-01', '05-25', '07-09', '12-25'],
+        'vol_mult': 1.6,
+        'precio_base': 1500.0
+    },
+    'CRYPTO': {
+        'timezone': 'UTC',
+        'open_time': dtime(0, 0),
+        'close_time': None,  # 24/7: la sesión termina a medianoche
+        'market_days': [0, 1, 2, 3, 4, 5, 6],
+        'holidays': [],
+        'vol_mult': 1.8,
+        'precio_base': 20.0
+    }
+}
+
+# Regímenes de volatilidad diaria (calmo / normal / turbulento) y duración media en días
+REGIMENES = [
+    {'vol': 0.009, 'duracion_media': 60},
+    {'vol': 0.016, 'duracion_media': 90},
+    {'vol': 0.032, 'duracion_media': 25}
+]
+PROB_CRASH_DIARIA = 1 / 250  # Un episodio de crash por año (hábil) por símbolo
+
+def exchange_de(symbol):
+    """Exchange del símbolo (misma regla que get_symbol_exchange del backend)"""
+    if symbol.endswith('.BA'):
+        return 'BCBA'
+    if symbol.endswith('-USD'):
+        return 'CRYPTO'
+    return 'NYSE'
+
+def generar_universo(n_symbols, base=None):
+    """
+    Universo de n símbolos: los tickers reales de `base` primero y luego sintéticos
+    repartidos entre NYSE (SYN00001), BCBA (SYN00002.BA) y CRYPTO (SYN00003-USD)
+    """
+    base = list(base or [])
+    if n_symbols <= len(base):
+        return base[:n_symbols]
+
+    sufijos = ['', '.BA', '-USD']
+    sinteticos = [f"SYN{i:05d}{sufijos[i % 3]}" for i in range(1, n_symbols - len(base) + 1)]
+    return base + sinteticos
+
+class SyntheticMarket:
+    """
+    Mercado sintético: mismo seed + símbolo = misma serie, sin importar cuándo se consulte
+    """
+
+    def __init__(self, seed=42, epoch='2015-01-01', horizon='2030-12-31', prob_crash=PROB_CRASH_DIARIA):
+        self.seed = seed
+        self.epoch = pd.Timestamp(epoch)
+        self.horizon = pd.Timestamp(horizon)
+        self.prob_crash = prob_crash  # Frecuencia de crashes (densidad de señales VIX_Fix)
+
+    def _seed_symbol(self, symbol, *extra):
+        return [self.seed, zlib.crc32(symbol.encode()), *extra]
+
+    def dias_de_mercado(self, exchange, start, end):
+        """Días hábiles del exchange entre start y end (inclusive)"""
+        calendario = EXCHANGE_CALENDARS[exchange]
+        dias = pd.date_range(start, end, freq='D')
+        dias = dias[dias.weekday.isin(calendario['market_days'])]
+        if calendario['holidays']:
+            dias = dias[~dias.strftime('%m-%d').isin(calendario['holidays'])]
+        return dias
+
+    @lru_cache(maxsize=256)
+    def daily_bars(self, symbol):
+        """Serie diaria completa (epoch a horizon) del símbolo, índice naive por fecha"""
+        exchange = exchange_de(symbol)
+        calendario = EXCHANGE_CALENDARS[exchange]
+        dias = self.dias_de_mercado(exchange, self.epoch, self.horizon)
+        n = len(dias)
+
+        # Un generador por componente: cada uno es independiente del resto
+        rng_precio, rng_regimen, rng_crash, rng_ohlc = [
+            np.random.default_rng(s) for s in np.random.SeedSequence(self._seed_symbol(symbol)).spawn(4)
+        ]
+
+        # Regímenes de volatilidad: segmentos de duración geométrica
+        vol = np.empty(n)
+        i = 0
+        regimen = 1
+        while i < n:
+            duracion = int(rng_regimen.geometric(1 / REGIMENES[regimen]['duracion_media']))
+            vol[i:i + duracion] = REGIMENES[regimen]['vol']
+            i += duracion
+            regimen = int(rng_regimen.choice([r for r in range(len(REGIMENES)) if r != regimen]))
+        vol *= calendario['vol_mult']
+
+        drift = rng_precio.normal(0.0004, 0.0002)
+        # Drift en log-precio: la mediana crece aun en regímenes turbulentos
+        retornos = drift + vol * rng_precio.standard_normal(n)
+
+        # Episodios de crash: caídas fuertes de 3-10 días con volatilidad x1.5,
+        # seguidas de una recuperación parcial en los 40 días siguientes
+        for inicio in np.flatnonzero(rng_crash.random(n) < self.prob_crash):
+            fin = min(n, inicio + int(rng_crash.integers(3, 11)))
+            retornos[inicio:fin] += rng_crash.normal(-0.035, 0.012, fin - inicio) * calendario['vol_mult'] ** 0.5
+            retornos[inicio:fin] *= 1.5
+            caida = retornos[inicio:fin].sum()
+            recuperacion = retornos[fin:fin + 40]
+            recuperacion -= rng_crash.uniform(0.75, 1.0) * caida / 40
+
+        precio_inicial = calendario['precio_base'] * float(np.exp(rng_precio.normal(0, 0.8)))
+        close = precio_inicial * np.exp(np.cumsum(retornos))
+        prev_close = np.concatenate(([precio_inicial], close[:-1]))
+        open_ = prev_close * np.exp(rng_ohlc.normal(0, vol * 0.3))
+        high = np.maximum(open_, close) * np.exp(np.abs(rng_ohlc.normal(0, vol * 0.5)))
+        low = np.minimum(open_, close) * np.exp(-np.abs(rng_ohlc.normal(0, vol * 0.5)))
+        volume = (rng_ohlc.lognormal(13, 0.6, n) * (1 + 4 * (vol / vol.mean() - 1).clip(0))).astype(np.int64)
+
+        return pd.DataFrame({
+            'Open': open_,
+            'High': high,
+            'Low': low,
+            'Close': close,
+            'Volume': volume,
+            'vol': vol
+        }, index=dias)
+
+    def _sesion(self, exchange, dia):
+        """(apertura, cierre) tz-aware de la sesión de `dia`"""
+        calendario = EXCHANGE_CALENDARS[exchange]
+        tz = pytz.timezone(calendario['timezone'])
+        apertura = tz.localize(datetime.combine(dia, calendario['open_time']))
+        if calendario['close_time'] is None:
+            cierre = tz.localize(datetime.combine(dia + timedelta(days=1), dtime(0, 0)))
+        else:
+            cierre = tz.localize(datetime.combine(dia, calendario['close_time']))
+        return apertura, cierre
+
+    def _daily(self, symbol, start, end, now):
+        exchange = exchange_de(symbol)
+        tz = pytz.timezone(EXCHANGE_CALENDARS[exchange]['timezone'])
+        df = self.daily_bars(symbol)
+        local_now = now.astimezone(tz)
+
+        # La barra del día actual aparece recién al cierre de la sesión
+        hoy = pd.Timestamp(local_now.date())
+        if hoy in df.index and local_now < self._sesion(exchange, local_now.date())[1]:
+            df = df[df.index < hoy]
+        else:
+            df = df[df.index <= hoy]
+
+        if start is not None:
+            df = df[df.index >= pd.Timestamp(start).tz_localize(None).normalize()]
+        if end is not None:
+            df = df[df.index < pd.Timestamp(end).tz_localize(None).normalize()]
+
+        df = df[['Open', 'High', 'Low', 'Close', 'Volume']].copy()
+        df.index = df.index.tz_localize(tz)
+        df.index.name = 'Date'
+        return df
+
+    def intraday_bars(self, symbol, dia, now):
+        """Barras de 1 minuto de la sesión de `dia` hasta `now` (puente browniano al cierre diario)"""
+        exchange = exchange_de(symbol)
+        daily = self.daily_bars(symbol)
+        clave = pd.Timestamp(dia)
+        if clave not in daily.index:
+            return None
+
+        posicion = daily.index.get_loc(clave)
+        barra = daily.iloc[posicion]
+        apertura, cierre = self._sesion(exchange, dia)
+        minutos = int((cierre - apertura).total_seconds() // 60)
+        rng = np.random.default_rng(self._seed_symbol(symbol, clave.toordinal()))
+
+        # Camino log-precio desde la apertura hasta el cierre del día
+        t = np.arange(1, minutos + 1) / minutos
+        w = np.cumsum(rng.standard_normal(minutos)) / np.sqrt(minutos)
+        puente = w - t * w[-1]
+        log_path = np.log(barra['Open']) + t * (np.log(barra['Close']) - np.log(barra['Open'])) + barra['vol'] * puente
+        close = np.exp(log_path)
+        open_ = np.concatenate(([barra['Open']], close[:-1]))
+        ruido = np.abs(rng.normal(0, barra['vol'] / np.sqrt(minutos), minutos))
+
+        index = pd.date_range(apertura, periods=minutos, freq='min')
+        df = pd.DataFrame({
+            'Open': open_,
+            'High': np.maximum(open_, close) * np.exp(ruido),
+            'Low': np.minimum(open_, close) * np.exp(-ruido),
+            'Close': close,
+            'Volume': rng.poisson(max(barra['Volume'] / minutos, 1), minutos)
+        }, index=index)
+        df.index.name = 'Datetime'
+        return df[df.index <= now]
+
+    def _intraday(self, symbol, start, now):
+        exchange = exchange_de(symbol)
+        tz = pytz.timezone(EXCHANGE_CALENDARS[exchange]['timezone'])
+        local_now = now.astimezone(tz)
+        desde = None
+        if start is not None:
+            desde = pd.Timestamp(start)
+            desde = desde.tz_localize(tz) if desde.tzinfo is None else desde.tz_convert(tz)
+        primer_dia = desde.date() if desde is not None else local_now.date()
+
+        frames = []
+        dia = primer_dia
+        while dia <= local_now.date():
+            barras = self.intraday_bars(symbol, dia, now)
+            if barras is not None and not barras.empty:
+                frames.append(barras)
+            dia += timedelta(days=1)
+
+        if not frames:
+            # Sin sesión hoy (fin de semana/feriado): yfinance devuelve la última sesión
+            if desde is None:
+                ultimo = self._daily(symbol, None, None, now)
+                if not ultimo.empty:
+                    return self.intraday_bars(symbol, ultimo.index[-1].date(), now)
+            return pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+
+        df = pd.concat(frames)
+        return df[df.index >= desde] if desde is not None else df
+
+    def history(self, symbol, start=None, end=None, period=None, interval='1d', now=None, **kwargs):
+        """
+        Misma interfaz que yf.Ticker(symbol).history(...): start/end (end exclusivo),
+        period ('1d', '5d', '1mo', '1y') e interval '1d' o '1m'
+        """
+        now = now or datetime.now(pytz.utc)
+
+        if interval == '1m':
+            return self._intraday(symbol, start, now)
+
+        if period and start is None:
+            cantidad = int(''.join(c for c in period if c.isdigit()) or 1)
+            dias = cantidad * (365 if period.endswith('y') else 31 if period.endswith('mo') else 1)
+            start = (now - timedelta(days=dias + 5)).strftime('%Y-%m-%d')
+            df = self._daily(symbol, start, end, now)
+            return df.tail(cantidad) if period.endswith('d') else df
+
+        return self._daily(symbol, start, end, now)
+
+def filas_market_data_eod(symbol, df, fuente='synthetic'):
+    """Filas (symbol, business_date, open, high, low, close, volume, adj_close, data_source) para market_data_eod"""
+    fechas = df.index.strftime('%Y-%m-%d')
+    return [
+        (symbol, fecha, float(o), float(h), float(l), float(c), int(v), float(c), fuente)
+        for fecha, o, h, l, c, v in zip(fechas, df['Open'], df['High'], df['Low'], df['Close'], df['Volume'])
+    ]
+
+def filas_symbols(symbols):
+    """Filas (symbol, asset_class, exchange, currency) para symbols (misma inferencia por sufijo que el backend)"""
+    filas = []
+    for symbol in symbols:
+        exchange = exchange_de(symbol)
+        filas.append((symbol, 'crypto' if exchange == 'CRYPTO' else 'equity', exchange,
+                      'ARS' if exchange == 'BCBA' else 'USD'))
+    return filas
+
+def sembrar_base_datos(db_path, symbols, years=2, market=None, fin=None):
+    """
+    Cargar market_data_eod con `years` años de barras sintéticas (bulk, una transacción).
+    Los símbolos quedan activos en symbols (el universo del backend); los que ya estaban
+    conservan su clasificación.
+    """
+    market = market or SyntheticMarket()
+    fin = fin or datetime.now().strftime('%Y-%m-%d')
+    inicio = (pd.Timestamp(fin) - pd.Timedelta(days=365 * years)).strftime('%Y-%m-%d')
+    fin_exclusivo = (pd.Timestamp(fin) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+
+    conn = sqlite3.connect(db_path)
+    conn.executemany('''
+        INSERT INTO symbols (symbol, asset_class, exchange, currency, active) VALUES (?, ?, ?, ?, 1)
+        ON CONFLICT(symbol) DO UPDATE SET active = 1, updated_at = CURRENT_TIMESTAMP
+    ''', filas_symbols(symbols))
+    total = 0
+    for symbol in symbols:
+        filas = filas_market_data_eod(symbol, market.history(symbol, start=inicio, end=fin_exclusivo))
+        conn.executemany('''
+            INSERT OR REPLACE INTO market_data_eod
+            (symbol, business_date, open_price, high_price, low_price, close_price, volume, adj_close, data_source)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', filas)
+        total += len(filas)
+    conn.commit()
+    conn.close()
+    return total
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(
+        description='Mercado sintético determinístico: sembrar una BD o inspeccionar series',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Ejemplos de uso:
+  python market_simulator.py --ticker GGAL.BA --inicio 2024-01-01 --fin 2024-03-31
+  python market_simulator.py --seed-db backend/trading_dashboard.db --symbols 1000 --years 2
+
+Backend offline (sin yfinance):
+  MARKET_DATA_PROVIDER=synthetic SYNTHETIC_UNIVERSE_SIZE=2000 python backend/main.py
+        """
+    )
+    parser.add_argument('--ticker', '-t', default='SPY', help='Símbolo a inspeccionar')
+    parser.add_argument('--inicio', '-i', help='Fecha de inicio (YYYY-MM-DD)')
+    parser.add_argument('--fin', '-f', help='Fecha de fin (YYYY-MM-DD)')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla del mercado')
+    parser.add_argument('--seed-db', help='Sembrar market_data_eod y symbols en esta BD (debe existir el esquema)')
+    parser.add_argument('--symbols', type=int, default=58, help='Tamaño del universo a sembrar')
+    parser.add_argument('--years', type=int, default=2, help='Años de historia a sembrar')
+
+    args = parser.parse_args()
+    market = SyntheticMarket(seed=args.seed)
+
+    try:
+        if args.seed_db:
+            ruta_bd = os.path.abspath(args.seed_db)
+            sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+            # El backend trabaja sobre trading_dashboard.db del directorio actual
+            os.chdir(os.path.dirname(ruta_bd))
+            import main as backend
+            symbols = generar_universo(args.symbols, backend.DEFAULT_TICKERS)
+            inicio = datetime.now()
+            total = sembrar_base_datos(ruta_bd, symbols, args.years, market)
+            print(f"✅ {total} barras para {len(symbols)} símbolos en {(datetime.now() - inicio).total_seconds():.1f}s")
+
+            # Mismo cierre que un ingest del backend: sin versión 'eod' nueva se sigue sirviendo el snapshot anterior
+            if os.path.basename(ruta_bd) == 'trading_dashboard.db':
+                backend.universo_modificado()
+                print(f"📦 Versión EOD publicada: {backend.cerrar_ingest_eod()}")
+            else:
+                print("⚠️ El backend usa trading_dashboard.db: publicar con POST /read-snapshot/publish al apuntarlo a esta BD")
+        else:
+            fin = (pd.Timestamp(args.fin) + pd.Timedelta(days=1)).strftime('%Y-%m-%d') if args.fin else None
+            df = market.history(args.ticker, start=args.inicio, end=fin)
+            print(f"{args.ticker} ({exchange_de(args.ticker)}): {len(df)} barras")
+            print(df.tail(20).round(2).to_string())
+    except KeyboardInterrupt:
+        print("\nOperación cancelada")
+        sys.exit(0)
+
+if __name__ == "__main__":
+    main()
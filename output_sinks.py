@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Salidas de resultados de los CLIs (vix_fix_strategy, trade_analyzer, analizar_ticker)
+
+Un sink recibe DataFrames (una o muchas veces) y los escribe por lotes de LOTE_FILAS filas
+directamente desde los arrays de columnas, sin iterrows ni armar la salida completa en memoria:
+- tabla:   formato humano, una línea por fila con una plantilla str.format
+- csv:     encabezado en el primer lote
+- jsonl:   un objeto JSON por fila (fechas ISO)
+- arrow:   Arrow IPC stream (requiere pyarrow)
+- parquet: un row group por lote (requiere pyarrow)
+
+Uso:
+    with crear_sink('csv', 'trades.csv') as sink:
+        for df in resultados:
+            sink.escribir(df)
+"""
+
+import contextlib
+import os
+import sys
+
+LOTE_FILAS = 10_000
+
+EXTENSIONES = {'.csv': 'csv', '.jsonl': 'jsonl', '.arrow': 'arrow', '.parquet': 'parquet'}
+
+def _importar_pyarrow(formato):
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError:
+        raise RuntimeError(f"El formato {formato} requiere pyarrow (pip install pyarrow)")
+
+class Sink:
+    """
+    Base: abre el destino (path o stdout si es None) y reparte cada DataFrame en lotes.
+    Las subclases implementan _escribir_lote(lote) y opcionalmente _cerrar().
+    """
+    binario = False
+
+    def __init__(self, destino=None):
+        self.destino = destino
+        self.filas = 0
+        self.columnas_salida = None
+        if destino is None:
+            # stdout vigente al crear el sink (respeta redirect_stdout)
+            self.archivo = sys.stdout.buffer if self.binario else sys.stdout
+            self.propio = False
+        else:
+            self.archivo = open(destino, 'wb') if self.binario else open(destino, 'w', encoding='utf-8', newline='')
+            self.propio = True
+
+    def escribir(self, df):
+        # Mismas columnas y orden que el primer DataFrame (CSV/Arrow/Parquet tienen un solo esquema)
+        if self.columnas_salida is None:
+            self.columnas_salida = list(df.columns)
+        elif list(df.columns) != self.columnas_salida:
+            df = df.reindex(columns=self.columnas_salida)
+
+        for inicio in range(0, len(df), LOTE_FILAS):
+            lote = df.iloc[inicio:inicio + LOTE_FILAS]
+            self._escribir_lote(lote)
+            self.filas += len(lote)
+
+    def _escribir_lote(self, lote):
+        raise NotImplementedError
+
+    def _cerrar(self):
+        pass
+
+    def cerrar(self):
+        self._cerrar()
+        if self.propio:
+            self.archivo.close()
+        else:
+            self.archivo.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+class TablaSink(Sink):
+    """
+    Formato humano. plantilla: str.format con un campo por columna (en orden de `columnas`).
+    Sin plantilla: columnas alineadas a `ancho` caracteres con encabezado.
+    """
+
+    def __init__(self, destino=None, plantilla=None, columnas=None, ancho=14):
+        super().__init__(destino)
+        self.plantilla = plantilla
+        self.columnas = columnas
+        self.ancho = ancho
+
+    def _escribir_lote(self, lote):
+        columnas = self.columnas or list(lote.columns)
+        if self.plantilla is None:
+            # Genérica: encabezado con los nombres, reales con 4 decimales y el resto como texto
+            self.archivo.write(' '.join(f'{columna:<{self.ancho}}' for columna in columnas) + '\n')
+            self.plantilla = ' '.join(
+                f'{{:<{self.ancho}.4f}}' if lote[columna].dtype.kind == 'f' else f'{{!s:<{self.ancho}}}'
+                for columna in columnas
+            )
+
+        plantilla = self.plantilla + '\n'
+        # Fechas como texto por columna (sin la hora si son todas a medianoche)
+        valores = [
+            lote[columna].astype(str).tolist() if lote[columna].dtype.kind == 'M' else lote[columna].tolist()
+            for columna in columnas
+        ]
+        self.archivo.write(''.join(plantilla.format(*fila) for fila in zip(*valores)))
+
+class CsvSink(Sink):
+    def _escribir_lote(self, lote):
+        lote.to_csv(self.archivo, header=self.filas == 0, index=False)
+
+class JsonlSink(Sink):
+    def _escribir_lote(self, lote):
+        self.archivo.write(lote.to_json(orient='records', lines=True, date_format='iso'))
+
+class ArrowSink(Sink):
+    """Arrow IPC stream: el esquema sale del primer lote (pyarrow.ipc.open_stream para leerlo)"""
+    binario = True
+
+    def __init__(self, destino=None):
+        self.pa = _importar_pyarrow('arrow')
+        super().__init__(destino)
+        self.writer = None
+
+    def _escribir_lote(self, lote):
+        batch = self.pa.RecordBatch.from_pandas(lote, preserve_index=False)
+        if self.writer is None:
+            self.writer = self.pa.ipc.new_stream(self.archivo, batch.schema)
+        self.writer.write_batch(batch)
+
+    def _cerrar(self):
+        if self.writer is not None:
+            self.writer.close()
+
+class ParquetSink(Sink):
+    """Parquet con un row group por lote (el archivo queda válido recién al cerrar)"""
+    binario = True
+
+    def __init__(self, destino=None):
+        self.pa = _importar_pyarrow('parquet')
+        import pyarrow.parquet
+        super().__init__(destino)
+        self.writer = None
+
+    def _escribir_lote(self, lote):
+        tabla = self.pa.Table.from_pandas(lote, preserve_index=False)
+        if self.writer is None:
+            self.writer = self.pa.parquet.ParquetWriter(self.archivo, tabla.schema)
+        self.writer.write_table(tabla)
+
+    def _cerrar(self):
+        if self.writer is not None:
+            self.writer.close()
+
+SINKS = {
+    'tabla': TablaSink,
+    'csv': CsvSink,
+    'jsonl': JsonlSink,
+    'arrow': ArrowSink,
+    'parquet': ParquetSink
+}
+
+def formato_por_extension(path, formato=None):
+    """Formato explícito o por extensión del archivo de salida"""
+    if formato:
+        return formato
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXTENSIONES:
+        raise ValueError(f"Extensión no reconocida: {path} (use {', '.join(EXTENSIONES)} o --formato)")
+    return EXTENSIONES[extension]
+
+def crear_sink(formato, destino=None, **opciones):
+    """Sink del formato indicado hacia destino (path) o stdout"""
+    if formato not in SINKS:
+        raise ValueError(f"Formato inválido: {formato} (válidos: {', '.join(SINKS)})")
+    return SINKS[formato](destino, **opciones)
+
+def resolver_formato(salida=None, formato=None):
+    """
+    --formato explícito; si no, por extensión de --salida; sin ninguno: tabla.
+    Verifica pyarrow antes de empezar (no al final de un análisis largo).
+    """
+    if not formato:
+        formato = formato_por_extension(salida) if salida else 'tabla'
+    if formato in ('arrow', 'parquet'):
+        _importar_pyarrow(formato)
+    return formato
+
+def canal_mensajes(formato, salida=None):
+    """Con datos por stdout (para encadenar con otras herramientas) los mensajes van a stderr"""
+    if salida is None and formato != 'tabla':
+        return contextlib.redirect_stdout(sys.stderr)
+    return contextlib.nullcontext()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Screener VIX_Fix - Qué símbolos están en verde en una fecha (o en las últimas K sesiones)
+
+En lugar de correr obtener_fechas_compra por ticker con warm-up completo:
+- Una sola consulta multi-símbolo trae solo las últimas barras necesarias de cada símbolo
+  (pd_period + max(bbl, lb) - 1 + K - 1: el alcance real de las ventanas del indicador)
+- Un solo pase vectorizado (numpy) sobre la matriz símbolos x barras calcula wvf, bandas y rangos
+- Ranking por cuánto supera wvf a upperBand / rangeHigh
+
+Mismas fórmulas que VixFixStrategy.calculate_vix_fix (ventanas por filas con min_periods=1).
+Lo usan el endpoint GET /screener del backend y este CLI.
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+import warnings
+from datetime import date, datetime, timedelta
+from itertools import groupby
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from market_db import buscar_db_path, esquema_compacto, leer_universo
+
+# Símbolos cuya última barra es más vieja que esto (días corridos antes de la fecha) no se evalúan
+MAX_ANTIGUEDAD_DIAS = 7
+
+# =====================================================
+# LECTURA: ÚLTIMAS N BARRAS POR SÍMBOLO
+# =====================================================
+
+def _dia(fecha):
+    """Días desde 1970-01-01 (la clave `day` del esquema compacto)"""
+    return (datetime.strptime(fecha, '%Y-%m-%d').date() - date(1970, 1, 1)).days
+
+def leer_ultimas_barras(conn, symbols, fecha, n_barras):
+    """
+    [(symbol, fecha, close, low)] de las últimas n_barras <= fecha de cada símbolo,
+    agrupadas por símbolo y ordenadas por fecha. Cada símbolo es un seek sobre su clave.
+    """
+    placeholders = ','.join('?' * len(symbols))
+    if esquema_compacto(conn):
+        dia = _dia(fecha)
+        query = f'''
+            WITH sel AS (
+                SELECT s.symbol, s.symbol_id,
+                       COALESCE((SELECT x.day FROM market_data_eod_v2 x
+                                 WHERE x.symbol_id = s.symbol_id AND x.day <= {dia}
+                                 ORDER BY x.day DESC LIMIT 1 OFFSET {int(n_barras) - 1}), -2147483648) AS desde
+                FROM symbols s
+                WHERE s.symbol IN ({placeholders})
+            )
+            SELECT sel.symbol, date(e.day * 86400, 'unixepoch'), e.close_price, e.low_price
+            FROM sel
+            JOIN market_data_eod_v2 e
+              ON e.symbol_id = sel.symbol_id AND e.day >= sel.desde AND e.day <= {dia}
+            ORDER BY sel.symbol_id, e.day
+        '''
+        return conn.execute(query, list(symbols)).fetchall()
+
+    # BD sin migrar (tabla original o vista anterior): mismo recorte por (symbol, business_date)
+    query = f'''
+        WITH sel AS (
+            SELECT s.symbol,
+                   COALESCE((SELECT x.business_date FROM market_data_eod x
+                             WHERE x.symbol = s.symbol AND x.business_date <= ?
+                             ORDER BY x.business_date DESC LIMIT 1 OFFSET {int(n_barras) - 1}), '') AS desde
+            FROM (SELECT DISTINCT symbol FROM market_data_eod WHERE symbol IN ({placeholders})) s
+        )
+        SELECT e.symbol, e.business_date, e.close_price, e.low_price
+        FROM sel
+        JOIN market_data_eod e
+          ON e.symbol = sel.symbol AND e.business_date >= sel.desde AND e.business_date <= ?
+        ORDER BY e.symbol, e.business_date
+    '''
+    return conn.execute(query, [fecha, *symbols, fecha]).fetchall()
+
+# =====================================================
+# INDICADOR VECTORIZADO (símbolos x barras)
+# =====================================================
+
+def _ventana(matriz, largo, funcion):
+    """
+    funcion (nan-aware) sobre las `largo` barras que terminan en cada columna.
+    Las barras faltantes al inicio son NaN: equivale a rolling(min_periods=1) de pandas.
+    """
+    relleno = np.full((matriz.shape[0], largo - 1), np.nan)
+    return funcion(sliding_window_view(np.hstack([relleno, matriz]), largo, axis=1), axis=-1)
+
+def calcular_vix_fix_matriz(close, low, pd_period=22, bbl=20, mult=2.0, lb=50, ph=0.85):
+    """
+    VIX_Fix sobre matrices (símbolos x barras, alineadas a la derecha y con NaN a la izquierda).
+    Devuelve dict de matrices: wvf, upperBand, rangeHigh, es_verde
+    """
+    with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+        # Ventanas sin datos (relleno) dan NaN: no es un error
+        warnings.simplefilter('ignore', RuntimeWarning)
+
+        highest_close = _ventana(close, pd_period, np.nanmax)
+        wvf = (highest_close - low) / highest_close * 100
+
+        mid_line = _ventana(wvf, bbl, np.nanmean)
+        upper_band = mid_line + mult * _ventana(wvf, bbl, lambda v, axis: np.nanstd(v, axis=axis, ddof=1))
+        range_high = _ventana(wvf, lb, np.nanmax) * ph
+
+        # Comparaciones con NaN dan False (igual que en pandas)
+        es_verde = (wvf >= upper_band) | (wvf >= range_high)
+
+    return {'wvf': wvf, 'upperBand': upper_band, 'rangeHigh': range_high, 'es_verde': es_verde}
+
+# =====================================================
+# SCREENER
+# =====================================================
+
+def escanear(db_path, symbols, fecha=None, dias=1, pd_period=22, bbl=20, mult=2.0, lb=50,
+             ph=0.85, max_antiguedad=MAX_ANTIGUEDAD_DIAS, limit=None):
+    """
+    Símbolos con es_verde en alguna de sus últimas `dias` sesiones hasta `fecha` (default: hoy).
+    db_path puede ser un path o una URI sqlite (ej: snapshot de lectura del backend).
+
+    Cada señal reporta su barra verde más reciente de la ventana. Ranking por `fuerza`:
+    cuánto supera wvf (en proporción) al umbral que cruzó, upperBand o rangeHigh.
+    """
+    inicio = time.perf_counter()
+    fecha = fecha or datetime.now().strftime('%Y-%m-%d')
+    dias = max(1, int(dias))
+    n_barras = pd_period + max(bbl, lb) - 1 + dias - 1
+
+    filas = []
+    if symbols:
+        conn = sqlite3.connect(db_path, uri=True)
+        try:
+            filas = leer_ultimas_barras(conn, symbols, fecha, n_barras)
+        finally:
+            conn.close()
+
+    # Matriz símbolos x barras: cada símbolo alineado a la derecha (su última barra en la última columna)
+    grupos = [(symbol, len(list(filas_symbol))) for symbol, filas_symbol in groupby(filas, key=lambda f: f[0])]
+    nombres = [symbol for symbol, _ in grupos]
+    cantidades = np.array([cantidad for _, cantidad in grupos], dtype=np.int64)
+    filas_matriz = np.repeat(np.arange(len(grupos)), cantidades)
+    inicios = np.repeat(np.cumsum(cantidades) - cantidades, cantidades)
+    columnas = n_barras - np.repeat(cantidades, cantidades) + (np.arange(len(filas)) - inicios)
+
+    close = np.full((len(grupos), n_barras), np.nan)
+    low = np.full((len(grupos), n_barras), np.nan)
+    fechas = np.full((len(grupos), n_barras), '', dtype=object)
+    if filas:
+        _, fechas_filas, close_filas, low_filas = zip(*filas)
+        close[filas_matriz, columnas] = np.array(close_filas, dtype=float)
+        low[filas_matriz, columnas] = np.array(low_filas, dtype=float)
+        fechas[filas_matriz, columnas] = fechas_filas
+
+    indicador = calcular_vix_fix_matriz(close, low, pd_period, bbl, mult, lb, ph)
+
+    # Solo las últimas `dias` sesiones de cada símbolo, y solo símbolos con datos recientes
+    fecha_minima = (datetime.strptime(fecha, '%Y-%m-%d') - timedelta(days=max_antiguedad)).strftime('%Y-%m-%d')
+    vigentes = np.array([ultima >= fecha_minima for ultima in fechas[:, -1]], dtype=bool)
+    verdes = indicador['es_verde'][:, -dias:] & vigentes[:, None]
+
+    senales = []
+    for i in np.flatnonzero(verdes.any(axis=1)):
+        # Barra verde más reciente de la ventana
+        j = n_barras - dias + int(np.flatnonzero(verdes[i])[-1])
+        wvf = float(indicador['wvf'][i, j])
+        upper_band = float(indicador['upperBand'][i, j])
+        range_high = float(indicador['rangeHigh'][i, j])
+        excesos = [wvf / umbral - 1 for umbral in (upper_band, range_high)
+                   if np.isfinite(umbral) and umbral > 0 and wvf >= umbral]
+        senales.append({
+            'ticker': nombres[i],
+            'business_date': fechas[i, j],
+            'close': round(float(close[i, j]), 2),
+            'wvf': round(wvf, 2),
+            'upper_band': round(upper_band, 2) if np.isfinite(upper_band) else None,
+            'range_high': round(range_high, 2) if np.isfinite(range_high) else None,
+            'exceso_upper_band': round(wvf - upper_band, 2) if np.isfinite(upper_band) else None,
+            'exceso_range_high': round(wvf - range_high, 2) if np.isfinite(range_high) else None,
+            'fuerza': round(max(excesos, default=0.0), 4),
+            'sesiones_verdes': int(verdes[i].sum())
+        })
+
+    senales.sort(key=lambda s: (s['fuerza'], s['wvf']), reverse=True)
+    if limit:
+        senales = senales[:limit]
+
+    return {
+        'fecha': fecha,
+        'dias': dias,
+        'symbols_evaluados': int(vigentes.sum()),
+        'symbols_sin_datos': len(symbols) - int(vigentes.sum()),
+        'total_signals': len(senales),
+        'signals': senales,
+        'duration_ms': round((time.perf_counter() - inicio) * 1000, 1)
+    }
+
+# =====================================================
+# CLI
+# =====================================================
+
+def mostrar_screener(resultado):
+    """Tabla de señales ordenadas por fuerza"""
+    print(f"\n{'='*96}")
+    print(f"SCREENER VIX_FIX - {resultado['fecha']} (últimas {resultado['dias']} sesiones)")
+    print(f"Evaluados: {resultado['symbols_evaluados']} | Sin datos recientes: {resultado['symbols_sin_datos']} "
+          f"| Verdes: {resultado['total_signals']} | {resultado['duration_ms']:.0f}ms")
+    print(f"{'='*96}")
+
+    if not resultado['signals']:
+        print("⚪ Ningún símbolo en verde")
+        return
+
+    print(f"{'Ticker':<12} {'Fecha':<12} {'Close':>12} {'WVF':>8} {'Upper':>8} {'RangeH':>8} {'Fuerza':>8} {'Verdes':>7}")
+    print(f"{'-'*96}")
+    for s in resultado['signals']:
+        upper = f"{s['upper_band']:.2f}" if s['upper_band'] is not None else '-'
+        range_high = f"{s['range_high']:.2f}" if s['range_high'] is not None else '-'
+        print(f"{s['ticker']:<12} {s['business_date']:<12} {s['close']:>12.2f} {s['wvf']:>8.2f} "
+              f"{upper:>8} {range_high:>8} {s['fuerza']:>7.1%} {s['sesiones_verdes']:>7}")
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(
+        description='Screener VIX_Fix: símbolos en verde en una fecha o en las últimas sesiones',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Ejemplos de uso:
+  python screener.py
+  python screener.py --fecha 2025-08-04 --dias 5 --top 20
+  python screener.py --tickers GGAL.BA YPF BTC-USD --json
+        """
+    )
+
+    parser.add_argument('--fecha', '-f', help='Fecha a evaluar (YYYY-MM-DD, default: hoy)')
+    parser.add_argument('--dias', '-d', type=int, default=1, help='Últimas K sesiones de cada símbolo (default: 1)')
+    parser.add_argument('--tickers', '-t', nargs='+', help='Símbolos a evaluar (default: todo el universo activo)')
+    parser.add_argument('--top', type=int, help='Mostrar solo las N señales más fuertes')
+    parser.add_argument('--db', help='Ruta de trading_dashboard.db (default: buscarla)')
+    parser.add_argument('--json', action='store_true', help='Salida JSON (para otras herramientas)')
+
+    args = parser.parse_args()
+
+    try:
+        if args.fecha:
+            datetime.strptime(args.fecha, '%Y-%m-%d')
+
+        db_path = args.db or buscar_db_path()
+        if db_path is None:
+            print("❌ No se encontró trading_dashboard.db (indicar --db)")
+            sys.exit(1)
+
+        symbols = [t.upper() for t in args.tickers] if args.tickers else leer_universo(db_path)
+        resultado = escanear(db_path, symbols, args.fecha, args.dias, limit=args.top)
+
+        if args.json:
+            import json
+            print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        else:
+            mostrar_screener(resultado)
+
+    except ValueError as e:
+        print(f"Error en los parámetros: {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\nOperación cancelada")
+        sys.exit(0)
+
+if __name__ == "__main__":
+    main()
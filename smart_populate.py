@@ -1,170 +1,345 @@
 #!/usr/bin/env python3
 """
-Script inteligente para poblar últimos 3 meses con verificación de duplicados
-y actualización solo cuando sea necesario
+Script inteligente para poblar los últimos N meses cargando solo lo que falta
+
+1. Plan: una sola consulta arma la matriz símbolo x día de mercado (calendario de cada
+   exchange en MARKET_SCHEDULES) contra market_data_eod_v2 y devuelve los rangos faltantes
+   (symbol, desde, hasta), con los días consecutivos ya agrupados
+2. Carga: un download por rango y escritura bulk con main.guardar_barras_eod
+   (directo contra la BD, sin pasar por la API HTTP)
+3. Checkpoint: cada rango terminado se registra en un archivo JSON; si la corrida se
+   interrumpe, la siguiente con la misma ventana retoma desde ahí
+4. Días sin datos: los que el proveedor confirma vacíos (feriados, suspensiones) quedan en
+   eod_no_data_days y el plan no los vuelve a pedir en corridas siguientes
 """
-import requests
-import sqlite3
+import argparse
+import json
+import os
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-import os
 
 # Configuración
-BASE_URL = "http://127.0.0.1:8000/run-eod-job"
 DB_PATH = "backend/trading_dashboard.db"
 MESES_ATRAS = 3
+WORKERS = 4  # Descargas en paralelo (la escritura es siempre secuencial)
+DIAS_CONFIRMACION = 7  # Un día vacío se da por confirmado recién pasada una semana (publicaciones tardías)
 
-def conectar_bd():
-    """Conectar a la base de datos"""
-    return sqlite3.connect(DB_PATH)
+# =====================================================
+# PLAN: RANGOS FALTANTES EN UNA CONSULTA
+# =====================================================
 
-def obtener_fechas_existentes():
-    """Obtener todas las fechas que ya existen en la BD"""
-    conn = conectar_bd()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT DISTINCT business_date FROM market_data_eod ORDER BY business_date")
-    fechas = {row[0] for row in cursor.fetchall()}
-    
-    conn.close()
-    return fechas
-
-def obtener_simbolos_por_fecha(fecha):
-    """Obtener símbolos que existen para una fecha específica"""
-    conn = conectar_bd()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT symbol FROM market_data_eod WHERE business_date = ?", (fecha,))
-    simbolos = {row[0] for row in cursor.fetchall()}
-    
-    conn.close()
-    return simbolos
-
-def obtener_total_simbolos_esperados():
-    """Obtener total de símbolos únicos en la BD"""
-    conn = conectar_bd()
+def cargar_universo(main, simbolos=None, exchange=None):
+    """(symbol, exchange) a cubrir: universo activo del backend, o los símbolos pedidos"""
+    universo = main.get_universe_exchanges(exchange=exchange)
+    if not simbolos:
+        return universo
+
+    exchanges = dict(universo)
+    return [(symbol, exchanges.get(symbol) or main.get_symbol_exchange(symbol)) for symbol in simbolos]
+
+def planificar(main, universo, desde, hasta, reintentar_sin_datos=False):
+    """
+    Rangos faltantes [(symbol, desde, hasta, dias)] en el orden del universo.
+    Matriz símbolo x día de mercado con un rango de la clave (symbol_id, day) por celda;
+    los faltantes consecutivos (según el calendario del exchange) se agrupan como islas.
+    Los días de eod_no_data_days cuentan como cubiertos (salvo reintentar_sin_datos).
+    """
+    conn = main.connect_db('trading_dashboard.db')
     cursor = conn.cursor()
-    
-    cursor.execute("SELECT COUNT(DISTINCT symbol) FROM market_data_eod")
-    total = cursor.fetchone()[0]
-    
-    conn.close()
-    return total if total > 0 else 58  # Default esperado
-
-def verificar_fecha_completa(fecha):
-    """Verificar si una fecha tiene todos los símbolos esperados"""
-    simbolos_fecha = obtener_simbolos_por_fecha(fecha)
-    total_esperado = obtener_total_simbolos_esperados()
-    
-    # Si tenemos al menos 50+ símbolos, consideramos la fecha completa
-    return len(simbolos_fecha) >= max(50, total_esperado * 0.8)
-
-def poblar_fecha(fecha_str, forzar=False):
-    """Poblar una fecha específica"""
+
+    try:
+        cursor.execute('DROP TABLE IF EXISTS temp.plan_universo')
+        cursor.execute('''
+            CREATE TEMP TABLE plan_universo (
+                orden INTEGER PRIMARY KEY, symbol TEXT, dias_mercado TEXT
+            )
+        ''')
+        # market_days usa weekday() (0=lunes); strftime('%w') de SQLite usa 0=domingo
+        calendario = {
+            exchange: ''.join(str((dia + 1) % 7) for dia in config['market_days'])
+            for exchange, config in main.MARKET_SCHEDULES.items()
+        }
+        cursor.executemany('INSERT INTO plan_universo VALUES (?, ?, ?)', [
+            (orden, symbol, calendario.get(exchange, '12345'))
+            for orden, (symbol, exchange) in enumerate(universo)
+        ])
+
+        cursor.execute(f'''
+            WITH RECURSIVE dias(day) AS (
+                SELECT {main.sql_dia('?')}
+                UNION ALL
+                SELECT day + 1 FROM dias WHERE day < {main.sql_dia('?')}
+            ),
+            matriz AS (
+                SELECT u.orden, u.symbol, d.day,
+                       ROW_NUMBER() OVER (PARTITION BY u.orden ORDER BY d.day) AS n,
+                       EXISTS (
+                           SELECT 1 FROM {main.EOD_TABLE} e
+                           WHERE e.symbol_id = s.symbol_id AND e.day = d.day
+                       ) OR (NOT ? AND EXISTS (
+                           SELECT 1 FROM eod_no_data_days v
+                           WHERE v.symbol = u.symbol AND v.day = d.day
+                       )) AS cubierto
+                FROM plan_universo u
+                JOIN dias d ON instr(u.dias_mercado, strftime('%w', d.day * 86400, 'unixepoch')) > 0
+                LEFT JOIN symbols s ON s.symbol = u.symbol
+            ),
+            faltantes AS (
+                SELECT orden, symbol, day,
+                       n - ROW_NUMBER() OVER (PARTITION BY orden ORDER BY day) AS isla
+                FROM matriz
+                WHERE NOT cubierto
+            )
+            SELECT symbol, {main.sql_fecha('MIN(day)')}, {main.sql_fecha('MAX(day)')}, COUNT(*)
+            FROM faltantes
+            GROUP BY orden, isla
+            ORDER BY orden, MIN(day)
+        ''', (desde, hasta, int(reintentar_sin_datos)))
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+# =====================================================
+# CHECKPOINT
+# =====================================================
+
+def rango_completado(completados, symbol, desde, hasta):
+    """
+    El rango está dentro de uno ya terminado del mismo símbolo (un rango cargado a medias,
+    ej: con un feriado en el medio, se re-planifica como un rango más chico)
+    """
+    return any(inicio <= desde and hasta <= fin for inicio, fin in completados.get(symbol, ()))
+
+def leer_checkpoint(path, ventana):
+    """Rangos ya terminados de una corrida anterior con la misma ventana (si no, ninguno)"""
+    if not os.path.exists(path):
+        return {}
     try:
-        url = f"{BASE_URL}?business_date={fecha_str}"
-        response = requests.post(url, timeout=30)
-        
-        if response.status_code == 200:
-            data = response.json()
-            status = data.get('status', 'UNKNOWN')
-            processed = data.get('symbols_processed', 0)
-            failed = data.get('symbols_failed', 0)
-            
-            if status == 'SUCCESS':
-                print(f"  NUEVO {fecha_str}: {processed} simbolos procesados")
-                return True
-            elif status == 'PARTIAL':
-                print(f"  PARCIAL {fecha_str}: {processed} OK, {failed} fallos")
-                return True
+        with open(path, encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"AVISO: Checkpoint ilegible, se ignora: {e}")
+        return {}
+
+    if checkpoint.get('ventana') != ventana:
+        print(f"AVISO: Checkpoint de otra ventana ({checkpoint.get('ventana')}), se ignora")
+        return {}
+
+    completados = {}
+    for symbol, desde, hasta in checkpoint.get('completados', []):
+        completados.setdefault(symbol, []).append((desde, hasta))
+    return completados
+
+def guardar_checkpoint(path, ventana, completados):
+    """Escritura atómica (archivo temporal + rename): un corte a mitad no lo corrompe"""
+    temporal = f"{path}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump({
+            'ventana': ventana,
+            'completados': [[symbol, *rango] for symbol, rangos in completados.items() for rango in rangos]
+        }, f)
+    os.replace(temporal, path)
+
+# =====================================================
+# CARGA DIRECTA
+# =====================================================
+
+def descargar_rango(main, rango):
+    """Barras del proveedor para un rango faltante (end exclusivo) recortadas al rango"""
+    symbol, desde, hasta, _ = rango
+    fin = (datetime.strptime(hasta, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+    data = main.descargar_historial(symbol, 'populate', start=desde, end=fin)
+    if data.empty:
+        return data
+    fechas = data.index.strftime('%Y-%m-%d')
+    return data[(fechas >= desde) & (fechas <= hasta)]
+
+def registrar_dias_sin_datos(main, symbol, exchange, desde, hasta, data):
+    """
+    Días de mercado del rango que el proveedor no devolvió (solo los anteriores a
+    DIAS_CONFIRMACION) a eod_no_data_days: el plan no los vuelve a pedir. Devuelve cuántos.
+    """
+    limite = (datetime.now() - timedelta(days=DIAS_CONFIRMACION)).strftime('%Y-%m-%d')
+    market_days = main.MARKET_SCHEDULES.get(exchange, main.MARKET_SCHEDULES['NYSE'])['market_days']
+    recibidos = set() if data.empty else set(data.index.strftime('%Y-%m-%d'))
+
+    dias = []
+    fecha = datetime.strptime(desde, '%Y-%m-%d')
+    fin = datetime.strptime(min(hasta, limite), '%Y-%m-%d')
+    while fecha <= fin:
+        if fecha.weekday() in market_days and fecha.strftime('%Y-%m-%d') not in recibidos:
+            dias.append((symbol, main.dia_eod(fecha)))
+        fecha += timedelta(days=1)
+    if not dias:
+        return 0
+
+    conn = main.connect_db('trading_dashboard.db')
+    try:
+        conn.executemany(
+            'INSERT INTO eod_no_data_days (symbol, day) VALUES (?, ?) ON CONFLICT DO NOTHING', dias
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return len(dias)
+
+def poblar_rangos(main, rangos, checkpoint_path, ventana, completados, workers, exchanges):
+    """
+    Descargar en paralelo y guardar cada rango apenas llega (en el orden del plan).
+    Un rango se marca en el checkpoint recién después de su commit.
+    """
+    resumen = {'rangos': 0, 'filas': 0, 'sin_datos': 0, 'dias_sin_datos': 0, 'fallos': 0}
+
+    def descargar(rango):
+        try:
+            return descargar_rango(main, rango), None
+        except Exception as e:
+            return None, e
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for rango, (data, error) in zip(rangos, executor.map(descargar, rangos)):
+            symbol, desde, hasta, dias = rango
+
+            if error is not None:
+                print(f"  ERROR {symbol} {desde} a {hasta}: {error}")
+                resumen['fallos'] += 1
+                continue
+
+            if data.empty:
+                # Feriados o símbolo sin datos en el rango: no reintentar al reanudar
+                print(f"  SIN DATOS {symbol} {desde} a {hasta}")
+                resumen['sin_datos'] += 1
             else:
-                print(f"  FALLO {fecha_str}: {status}")
-                return False
-        else:
-            print(f"  ERROR {fecha_str}: HTTP {response.status_code}")
-            return False
-            
-    except Exception as e:
-        print(f"  ERROR {fecha_str}: {e}")
-        return False
-
-def generar_fechas_ultimos_meses():
-    """Generar lista de fechas de los últimos N meses (solo días hábiles)"""
-    hoy = datetime.now()
-    fecha_inicio = hoy - timedelta(days=MESES_ATRAS * 30)  # Aproximadamente 3 meses
-    
-    fechas = []
-    fecha_actual = fecha_inicio
-    
-    while fecha_actual <= hoy:
-        # Solo días de semana (Lun-Vie)
-        if fecha_actual.weekday() < 5:
-            fechas.append(fecha_actual.strftime('%Y-%m-%d'))
-        fecha_actual += timedelta(days=1)
-    
-    return sorted(fechas)
+                try:
+                    filas = main.guardar_barras_eod(symbol, data)['guardadas']
+                except Exception as e:
+                    print(f"  ERROR {symbol} {desde} a {hasta}: {e}")
+                    resumen['fallos'] += 1
+                    continue
+                print(f"  NUEVO {symbol} {desde} a {hasta}: {filas}/{dias} dias")
+                resumen['filas'] += filas
+
+            resumen['dias_sin_datos'] += registrar_dias_sin_datos(
+                main, symbol, exchanges.get(symbol), desde, hasta, data
+            )
+            resumen['rangos'] += 1
+            completados.setdefault(symbol, []).append((desde, hasta))
+            guardar_checkpoint(checkpoint_path, ventana, completados)
+
+    return resumen
 
 def main():
-    print("Iniciando carga inteligente de ultimos 3 meses...")
-    print(f"Base de datos: {DB_PATH}")
-    
-    # Verificar que la BD existe
-    if not os.path.exists(DB_PATH):
-        print(f"ERROR: No se encuentra la base de datos en {DB_PATH}")
+    parser = argparse.ArgumentParser(
+        description='Poblar los ultimos meses cargando solo los rangos (simbolo, fechas) que faltan',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Ejemplos de uso:
+  python smart_populate.py                      # Ultimos 3 meses, todo el universo activo
+  python smart_populate.py --plan               # Solo mostrar los rangos faltantes
+  python smart_populate.py --meses 12 -w 8      # Un año con 8 descargas en paralelo
+  python smart_populate.py --simbolos AAPL GGAL.BA --desde 2024-01-01
+  python smart_populate.py --exchange CRYPTO --reiniciar
+  python smart_populate.py --reintentar-sin-datos   # Re-pedir feriados/dias vacios confirmados
+        '''
+    )
+    parser.add_argument('--meses', type=int, default=MESES_ATRAS,
+                        help=f'Meses hacia atras desde --hasta (default: {MESES_ATRAS})')
+    parser.add_argument('--desde', help='Fecha inicial YYYY-MM-DD (reemplaza a --meses)')
+    parser.add_argument('--hasta', help='Fecha final YYYY-MM-DD (default: ayer, ultimo dia cerrado)')
+    parser.add_argument('--simbolos', nargs='+', help='Simbolos a cubrir (default: universo activo)')
+    parser.add_argument('--exchange', help='Solo simbolos de estos exchanges (ej: NYSE,BCBA)')
+    parser.add_argument('--plan', action='store_true', help='Mostrar el plan sin descargar nada')
+    parser.add_argument('--workers', '-w', type=int, default=WORKERS,
+                        help=f'Descargas en paralelo (default: {WORKERS})')
+    parser.add_argument('--db', default=DB_PATH, help=f'Base de datos (default: {DB_PATH})')
+    parser.add_argument('--checkpoint', help='Archivo de checkpoint (default: junto a la BD)')
+    parser.add_argument('--reiniciar', action='store_true',
+                        help='Ignorar el checkpoint de una corrida anterior interrumpida')
+    parser.add_argument('--reintentar-sin-datos', action='store_true',
+                        help='Volver a pedir los dias que el proveedor ya confirmo sin datos')
+
+    args = parser.parse_args()
+
+    db_path = os.path.abspath(args.db)
+    if not os.path.exists(db_path):
+        print(f"ERROR: No se encuentra la base de datos en {args.db}")
         return
-    
-    # Obtener fechas existentes
-    fechas_existentes = obtener_fechas_existentes()
-    print(f"Fechas ya en BD: {len(fechas_existentes)}")
-    
-    # Generar fechas objetivo
-    fechas_objetivo = generar_fechas_ultimos_meses()
-    print(f"Fechas objetivo (ultimos 3 meses): {len(fechas_objetivo)}")
-    print(f"Rango: {fechas_objetivo[0]} a {fechas_objetivo[-1]}")
-    
-    # Procesar fechas
-    nuevas = 0
-    actualizadas = 0
-    omitidas = 0
-    
-    for fecha in fechas_objetivo:
-        if fecha in fechas_existentes:
-            # Verificar si la fecha está completa
-            if verificar_fecha_completa(fecha):
-                print(f"OMITIR {fecha}: Ya completa")
-                omitidas += 1
-            else:
-                print(f"ACTUALIZAR {fecha}: Datos incompletos")
-                if poblar_fecha(fecha, forzar=True):
-                    actualizadas += 1
-        else:
-            print(f"NUEVA {fecha}: No existe")
-            if poblar_fecha(fecha):
-                nuevas += 1
-        
-        # Pausa para no sobrecargar
-        time.sleep(0.3)
-    
-    # Resumen final
+    if os.path.basename(db_path) != 'trading_dashboard.db':
+        print("ERROR: El backend usa trading_dashboard.db; pase la ruta a ese archivo")
+        return
+    checkpoint_path = os.path.abspath(
+        args.checkpoint or os.path.join(os.path.dirname(db_path), 'smart_populate.checkpoint.json')
+    )
+
+    hasta = args.hasta or (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+    desde = args.desde or (
+        datetime.strptime(hasta, '%Y-%m-%d') - timedelta(days=args.meses * 30)
+    ).strftime('%Y-%m-%d')
+
+    # El backend trabaja sobre trading_dashboard.db del directorio actual
+    os.chdir(os.path.dirname(db_path))
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+    import main as backend
+
+    print("Iniciando carga inteligente...")
+    print(f"Base de datos: {db_path}")
+    backend.init_db()  # Esquema al día (una BD con la tabla original se migra al compacto)
+
+    universo = cargar_universo(backend, args.simbolos, args.exchange)
+    if not universo:
+        print("ERROR: No hay simbolos para cubrir")
+        return
+
+    inicio = time.perf_counter()
+    rangos = planificar(backend, universo, desde, hasta, args.reintentar_sin_datos)
+    print(f"Ventana: {desde} a {hasta} ({len(universo)} simbolos)")
+    print(f"Plan: {len(rangos)} rangos faltantes, {sum(r[3] for r in rangos)} dias simbolo "
+          f"({time.perf_counter() - inicio:.2f}s)")
+
+    ventana = {'desde': desde, 'hasta': hasta, 'simbolos': [symbol for symbol, _ in universo]}
+    completados = {} if args.reiniciar else leer_checkpoint(checkpoint_path, ventana)
+    pendientes = [r for r in rangos if not rango_completado(completados, *r[:3])]
+    if len(pendientes) < len(rangos):
+        print(f"Reanudando: {len(rangos) - len(pendientes)} rangos ya terminados en {checkpoint_path}")
+
+    if args.plan:
+        for symbol, inicio_rango, fin_rango, dias in pendientes:
+            print(f"  FALTA {symbol} {inicio_rango} a {fin_rango}: {dias} dias")
+        return
+
+    if not pendientes:
+        print("OMITIR: La ventana ya esta completa")
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        return
+
+    inicio = time.perf_counter()
+    resumen = poblar_rangos(backend, pendientes, checkpoint_path, ventana, completados,
+                            max(1, args.workers), dict(universo))
+    duracion = time.perf_counter() - inicio
+
+    # Datos nuevos: mismo cierre que la carga inicial (integridad, cobertura y snapshot de lectura)
+    if resumen['filas']:
+        backend.cerrar_ingest_eod()
+
+    # Corrida completa: el checkpoint ya no hace falta (con fallos queda para reintentar)
+    if resumen['fallos'] == 0 and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
     print(f"\nResumen final:")
-    print(f"  Fechas nuevas agregadas: {nuevas}")
-    print(f"  Fechas actualizadas: {actualizadas}")
-    print(f"  Fechas omitidas (ya completas): {omitidas}")
-    print(f"  Total procesadas: {nuevas + actualizadas}")
-    
-    # Verificar estado final
-    conn = conectar_bd()
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM market_data_eod WHERE symbol = 'ETH-USD'")
-    eth_records = cursor.fetchone()[0]
-    cursor.execute("SELECT COUNT(DISTINCT business_date) FROM market_data_eod")
-    total_dates = cursor.fetchone()[0]
-    conn.close()
-    
-    print(f"\nEstado final de la BD:")
-    print(f"  Registros ETH-USD: {eth_records}")
-    print(f"  Fechas unicas totales: {total_dates}")
-    print(f"  Status: {'SUFICIENTE' if eth_records >= 50 else 'INSUFICIENTE'} para VIX_Fix")
+    print(f"  Rangos cargados: {resumen['rangos'] - resumen['sin_datos']}")
+    print(f"  Rangos sin datos del proveedor: {resumen['sin_datos']}")
+    print(f"  Dias sin datos confirmados: {resumen['dias_sin_datos']}")
+    print(f"  Rangos con error: {resumen['fallos']}")
+    print(f"  Filas guardadas: {resumen['filas']}")
+    print(f"  Duracion: {duracion:.1f} segundos")
+    if resumen['fallos']:
+        print(f"  Checkpoint: {checkpoint_path} (vuelva a ejecutar para reintentar)")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nOperación cancelada (el checkpoint permite reanudar)")
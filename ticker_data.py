@@ -3,15 +3,58 @@
 Aplicación de consola para obtener datos de ticker GGAL en un rango de fechas
 """
 
-import yfinance as yf
-import pandas as pd
 from datetime import datetime, timedelta
 import argparse
 import sys
 
+from market_db import COLUMNAS_OHLCV, buscar_db_path, importar_yfinance, leer_ohlcv_eod
+
+# Hueco máximo (días corridos) entre los extremos del rango y la primera/última fila local,
+# o entre dos filas consecutivas, que se explica por fines de semana y feriados (ej: Carnaval en BCBA)
+TOLERANCIA_DIAS = 5
+
+def cubre_rango(datos, fecha_inicio, fecha_fin):
+    """
+    ¿Los datos locales cubren el rango pedido? La última fila se compara contra fecha_fin
+    (exclusiva) o contra hoy si el rango termina en el futuro, y ningún hueco entre filas
+    consecutivas puede superar la misma tolerancia (fines de semana y feriados entran).
+    """
+    tolerancia = timedelta(days=TOLERANCIA_DIAS)
+    fin = min(datetime.strptime(fecha_fin, '%Y-%m-%d'), datetime.now())
+    primera = datos.index[0].to_pydatetime()
+    ultima = datos.index[-1].to_pydatetime()
+    mayor_hueco = datos.index.to_series().diff().max() if len(datos) > 1 else timedelta(0)
+    return (primera - datetime.strptime(fecha_inicio, '%Y-%m-%d') <= tolerancia
+            and fin - ultima <= tolerancia
+            and mayor_hueco <= tolerancia)
+
+def obtener_datos_desde_bd(ticker, fecha_inicio, fecha_fin):
+    """
+    Obtiene los datos desde la BD local (None si no hay BD o no hay filas).
+    Mismo rango que yfinance: fecha_fin exclusiva.
+    """
+    db_path = buscar_db_path()
+    if db_path is None:
+        return None
+    
+    try:
+        datos = leer_ohlcv_eod(db_path, ticker, fecha_inicio, fecha_fin)
+    except Exception as e:
+        print(f"Error leyendo la BD local: {e}")
+        return None
+    
+    datos = datos[datos['business_date'] < fecha_fin]
+    if datos.empty:
+        return None
+    
+    import pandas as pd
+    datos.index = pd.to_datetime(datos.pop('business_date'))
+    return datos.rename(columns=COLUMNAS_OHLCV)
+
 def obtener_datos_ticker(ticker, fecha_inicio, fecha_fin):
     """
     Obtiene datos históricos de un ticker en un rango de fechas
+    (BD local primero; yfinance si no hay datos locales o no cubren todo el rango)
     
     Args:
         ticker (str): Símbolo del ticker (ej: 'GGAL.BA')
@@ -21,14 +64,25 @@ def obtener_datos_ticker(ticker, fecha_inicio, fecha_fin):
     Returns:
         pandas.DataFrame: Datos históricos del ticker
     """
+    locales = obtener_datos_desde_bd(ticker, fecha_inicio, fecha_fin)
+    if locales is not None:
+        if cubre_rango(locales, fecha_inicio, fecha_fin):
+            print(f"Datos desde BD local: {len(locales)} registros")
+            return locales
+        print(f"⚠️  BD local incompleta para {ticker} ({locales.index[0].date()} a {locales.index[-1].date()}): "
+              f"se consulta el proveedor")
+    
     try:
         # Crear objeto ticker
-        stock = yf.Ticker(ticker)
+        stock = importar_yfinance().Ticker(ticker)
         
         # Obtener datos históricos
         datos = stock.history(start=fecha_inicio, end=fecha_fin)
         
         if datos.empty:
+            if locales is not None:
+                print(f"⚠️  El proveedor no devolvió datos: se usan los {len(locales)} registros locales (rango parcial)")
+                return locales
             print(f"No se encontraron datos para {ticker} en el rango especificado")
             return None
             
@@ -36,6 +90,9 @@ def obtener_datos_ticker(ticker, fecha_inicio, fecha_fin):
         
     except Exception as e:
         print(f"Error al obtener datos: {e}")
+        if locales is not None:
+            print(f"⚠️  Se usan los {len(locales)} registros locales (rango parcial)")
+            return locales
         return None
 
 def mostrar_datos(datos, ticker):
@@ -4,16 +4,21 @@ Trade Analyzer - Analiza el performance de trades basados en VIX_Fix
 Calcula cuántos días toma alcanzar el target de profit (4%)
 """
 
-import yfinance as yf
+import os
 import pandas as pd
 import numpy as np
 from datetime import datetime
 import argparse
 import sys
-from vix_fix_strategy import VixFixStrategy
+from market_db import POSSIBLE_DB_PATHS, buscar_db_path, importar_yfinance, leer_ohlcv_eod
+from output_sinks import SINKS, TablaSink, canal_mensajes, crear_sink, resolver_formato
+from vix_fix_strategy import VixFixStrategy, StageTimings
+
+# Proveedor del fallback: import diferido (market_db.importar_yfinance) salvo que se asigne uno
+yf = None
 
 class TradeAnalyzer:
-    def __init__(self, profit_target=0.04, max_hold_days=30, use_local_db=True):
+    def __init__(self, profit_target=0.04, max_hold_days=30, use_local_db=True, db_path=None):
         """
         Inicializa el analizador de trades
         
@@ -21,54 +26,40 @@ class TradeAnalyzer:
             profit_target (float): Target de profit (default 4% = 0.04)
             max_hold_days (int): Máximo días para mantener un trade
             use_local_db (bool): Usar base de datos local SQLite (default True)
+            db_path (str): BD local o URI sqlite (ej: snapshot inmutable del backend); None = buscarla
         """
         self.profit_target = profit_target
         self.max_hold_days = max_hold_days
         self.use_local_db = use_local_db
-        self.vix_strategy = VixFixStrategy()
+        self.db_path = db_path
+        self.vix_strategy = VixFixStrategy(db_path=db_path)
+        self.timings = StageTimings()  # Tiempos del último analizar_trades
+        self.datos_precargados = None
+    
+    def precargar_datos(self, data):
+        """
+        Usar un OHLCV ya cargado (ej: panel multi-símbolo del motor analítico) en lugar de
+        consultar la BD. Debe cubrir el rango extendido (warm-up y salidas); si no hay filas
+        para un rango se vuelve a la BD local / yfinance.
+        """
+        self.datos_precargados = data
+        self.vix_strategy.datos_precargados = data
     
     def obtener_datos_desde_bd(self, ticker, fecha_inicio, fecha_fin):
         """
         Obtener datos OHLCV desde base de datos local SQLite
         """
         try:
-            import sqlite3
-            import os
-            
-            # Encontrar path correcto de la BD dinámicamente
-            possible_paths = [
-                'backend/trading_dashboard.db',           # Desde root del proyecto
-                'trading_dashboard.db',                   # Desde directorio backend
-                '../trading_dashboard.db',                # Desde subdirectorio
-                os.path.join(os.path.dirname(__file__), 'backend', 'trading_dashboard.db'),  # Relativo al script
-                os.path.join(os.path.dirname(os.path.dirname(__file__)), 'backend', 'trading_dashboard.db')  # Backup
-            ]
-            
-            db_path = None
-            for path in possible_paths:
-                if os.path.exists(path):
-                    db_path = path
-                    break
-            
+            db_path = self.db_path or buscar_db_path()
             if db_path is None:
                 print(f"⚠️  No se encontró trading_dashboard.db en ninguna de estas ubicaciones:")
-                for path in possible_paths:
+                for path in POSSIBLE_DB_PATHS:
                     print(f"   - {os.path.abspath(path)}")
                 return None
             
-            conn = sqlite3.connect(db_path)
-            
-            query = '''
-                SELECT business_date, open_price, high_price, low_price, close_price, volume,
-                       data_quality_score
-                FROM market_data_eod 
-                WHERE symbol = ? AND business_date >= ? AND business_date <= ?
-                ORDER BY business_date ASC
-            '''
-            
             # Leer datos como DataFrame
-            df = pd.read_sql_query(query, conn, params=(ticker, fecha_inicio, fecha_fin))
-            conn.close()
+            df = leer_ohlcv_eod(db_path, ticker, fecha_inicio, fecha_fin,
+                                columnas_extra=('data_quality_score',))
             
             if df.empty:
                 print(f"⚠️  No hay datos locales para {ticker} ({fecha_inicio} a {fecha_fin})")
@@ -102,7 +93,7 @@ class TradeAnalyzer:
         Fallback: obtener datos desde yfinance (método original)
         """
         try:
-            stock = yf.Ticker(ticker)
+            stock = (yf or importar_yfinance()).Ticker(ticker)
             # IMPORTANTE: yfinance end es exclusivo, necesitamos agregar 1 día para incluir fecha_fin
             fecha_fin_inclusiva = (pd.to_datetime(fecha_fin) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
             data = stock.history(start=fecha_inicio, end=fecha_fin_inclusiva)
@@ -120,11 +111,19 @@ class TradeAnalyzer:
     
     def obtener_datos_ticker(self, ticker, fecha_inicio, fecha_fin):
         """
-        Obtener datos con estrategia híbrida: BD local primero, yfinance como fallback
+        Obtener datos con estrategia híbrida: datos precargados o BD local primero, yfinance como fallback
         """
+        if self.datos_precargados is not None:
+            with self.timings.medir('data_load.preloaded'):
+                data = self.datos_precargados.loc[fecha_inicio:fecha_fin]
+            
+            if len(data) > 0:
+                return data
+        
         if self.use_local_db:
             # Intentar BD local primero
-            data = self.obtener_datos_desde_bd(ticker, fecha_inicio, fecha_fin)
+            with self.timings.medir('data_load.local_db'):
+                data = self.obtener_datos_desde_bd(ticker, fecha_inicio, fecha_fin)
             
             if data is not None and len(data) > 0:
                 return data
@@ -132,7 +131,8 @@ class TradeAnalyzer:
             print(f"🔄 Fallback a yfinance para {ticker}")
         
         # Fallback a yfinance
-        return self.obtener_datos_desde_yfinance(ticker, fecha_inicio, fecha_fin)
+        with self.timings.medir('data_load.yfinance'):
+            return self.obtener_datos_desde_yfinance(ticker, fecha_inicio, fecha_fin)
     
     def analizar_trades(self, ticker, fecha_inicio, fecha_fin):
         """
@@ -145,10 +145,13 @@ class TradeAnalyzer:
             
         Returns:
             pandas.DataFrame: DataFrame con resultados de cada trade
+            (los tiempos por etapa quedan en self.timings)
         """
+        self.timings = StageTimings()
         try:
             # Obtener señales de compra
             fechas_compra = self.vix_strategy.obtener_fechas_compra(ticker, fecha_inicio, fecha_fin)
+            self.timings.merge(self.vix_strategy.timings)
             
             if fechas_compra is None or fechas_compra.empty:
                 print("No se encontraron señales de compra")
@@ -177,12 +180,13 @@ class TradeAnalyzer:
             # Analizar cada trade
             resultados_trades = []
             
-            for i, (fecha_compra, row_compra) in enumerate(fechas_compra.iterrows(), 1):
-                resultado = self.analizar_trade_individual(
-                    data_completa, fecha_compra, row_compra['Close'], i
-                )
-                if resultado:
-                    resultados_trades.append(resultado)
+            with self.timings.medir('exit_simulation'):
+                for i, (fecha_compra, row_compra) in enumerate(fechas_compra.iterrows(), 1):
+                    resultado = self.analizar_trade_individual(
+                        data_completa, fecha_compra, row_compra['Close'], i
+                    )
+                    if resultado:
+                        resultados_trades.append(resultado)
             
             if not resultados_trades:
                 print("No se pudieron analizar los trades")
@@ -352,18 +356,30 @@ class TradeAnalyzer:
         print(f"{'#':<3} {'Compra':<12} {'Precio Compra':<12} {'Venta':<12} {'Precio Venta':<12} {'Dias':<5} {'Profit':<8} {'Estado':<20}")
         print(f"{'-'*100}")
         
-        for _, trade in df_resultados.iterrows():
-            fecha_compra_str = trade['fecha_compra'].strftime('%Y-%m-%d')
-            fecha_venta_str = trade['fecha_venta'].strftime('%Y-%m-%d')
-            
-            print(f"{trade['trade_num']:<3} "
-                  f"{fecha_compra_str:<12} "
-                  f"${trade['precio_compra']:<11.2f} "
-                  f"{fecha_venta_str:<12} "
-                  f"${trade['precio_venta']:<11.2f} "
-                  f"{trade['dias_trade']:<5} "
-                  f"{trade['profit_pct']:<7.2%} "
-                  f"{trade['resultado']:<20}")
+        # Filas desde los arrays de columnas (sin iterrows)
+        detalle = pd.DataFrame({
+            'trade_num': df_resultados['trade_num'].to_numpy(),
+            'fecha_compra': pd.DatetimeIndex(df_resultados['fecha_compra']).strftime('%Y-%m-%d'),
+            'precio_compra': df_resultados['precio_compra'].to_numpy(),
+            'fecha_venta': pd.DatetimeIndex(df_resultados['fecha_venta']).strftime('%Y-%m-%d'),
+            'precio_venta': df_resultados['precio_venta'].to_numpy(),
+            'dias_trade': df_resultados['dias_trade'].to_numpy(),
+            'profit_pct': df_resultados['profit_pct'].to_numpy(),
+            'resultado': df_resultados['resultado'].to_numpy()
+        })
+        plantilla = "{:<3} {:<12} ${:<11.2f} {:<12} ${:<11.2f} {:<5} {:<7.2%} {:<20}"
+        with TablaSink(plantilla=plantilla) as sink:
+            sink.escribir(detalle)
+    
+    def exportar_resultados_trades(self, df_resultados, ticker, formato, destino=None):
+        """
+        Escribe los trades (con columna ticker) con un sink de output_sinks hacia destino o stdout.
+        Devuelve la cantidad de filas escritas.
+        """
+        with crear_sink(formato, destino) as sink:
+            if df_resultados is not None and not df_resultados.empty:
+                sink.escribir(df_resultados.assign(ticker=ticker)[['ticker', *df_resultados.columns]])
+        return sink.filas
 
 def main():
     """Función principal"""
@@ -374,14 +390,17 @@ def main():
 Ejemplos de uso:
   python trade_analyzer.py --inicio 2025-01-01 --fin 2025-08-04
   python trade_analyzer.py -i 2025-01-01 -f 2025-08-04 --target 0.03 --max-dias 20
+  python trade_analyzer.py -t BTC-USD -i 2020-01-01 -f 2025-08-04 --formato csv > trades.csv
         """
     )
     
     parser.add_argument('--ticker', '-t', default='GGAL.BA', help='Símbolo del ticker')
     parser.add_argument('--inicio', '-i', required=True, help='Fecha de inicio (YYYY-MM-DD)')
     parser.add_argument('--fin', '-f', required=True, help='Fecha de fin (YYYY-MM-DD)')
-    parser.add_argument('--target', type=float, default=0.04, help='Target de profit (default: 0.04 = 4%)')
+    parser.add_argument('--target', type=float, default=0.04, help='Target de profit (default: 0.04 = 4%%)')
     parser.add_argument('--max-dias', type=int, default=30, help='Máximo días por trade (default: 30)')
+    parser.add_argument('--formato', choices=list(SINKS), help='Formato de salida (default: por extensión de --salida, o tabla)')
+    parser.add_argument('--salida', '-o', help='Archivo de salida (default: stdout)')
     
     args = parser.parse_args()
     
@@ -396,15 +415,27 @@ Ejemplos de uso:
             max_hold_days=args.max_dias
         )
         
-        print(f"Analizando trades de {args.ticker} desde {args.inicio} hasta {args.fin}")
-        print(f"Target: {args.target:.1%} | Máximo días: {args.max_dias}")
+        formato = resolver_formato(args.salida, args.formato)
+        
+        with canal_mensajes(formato, args.salida):
+            print(f"Analizando trades de {args.ticker} desde {args.inicio} hasta {args.fin}")
+            print(f"Target: {args.target:.1%} | Máximo días: {args.max_dias}")
+            
+            # Analizar trades
+            resultados = analyzer.analizar_trades(args.ticker, args.inicio, args.fin)
         
-        # Analizar trades
-        resultados = analyzer.analizar_trades(args.ticker, args.inicio, args.fin)
-        analyzer.mostrar_resultados_trades(resultados, args.ticker)
+        if formato == 'tabla' and args.salida is None:
+            analyzer.mostrar_resultados_trades(resultados, args.ticker)
+        else:
+            filas = analyzer.exportar_resultados_trades(resultados, args.ticker, formato, args.salida)
+            if args.salida:
+                print(f"💾 {filas} trades en {args.salida}")
         
     except ValueError as e:
-        print(f"Error en las fechas: {e}")
+        print(f"Error en los parámetros: {e}")
+        sys.exit(1)
+    except RuntimeError as e:
+        print(f"❌ {e}")
         sys.exit(1)
     except KeyboardInterrupt:
         print("\nOperación cancelada")
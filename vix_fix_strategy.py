@@ -4,15 +4,56 @@ VIX_Fix Strategy - Implementación en Python del indicador Pine Script
 Detecta condiciones de compra (verde) basado en el algoritmo VIX_Fix
 """
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from contextlib import contextmanager
 import argparse
 import sys
+import time
+
+from market_db import buscar_db_path, importar_yfinance, leer_ohlcv_eod
+from output_sinks import SINKS, TablaSink, canal_mensajes, crear_sink, resolver_formato
+
+# yfinance se importa recién en el primer fallback (importar_yfinance): con datos locales no se usa
+yf = None
+
+# Timeframes intraday (segundos por barra) guardados en market_data_intraday; '1d' usa market_data_eod
+TIMEFRAMES_INTRADAY = {'1m': 60, '5m': 300, '15m': 900, '1h': 3600}
+
+class StageTimings:
+    """
+    Tiempos por etapa (segundos acumulados) de un análisis.
+    Etapas: data_load.local_db, data_load.yfinance, indicators, signal_filter,
+    exit_simulation, formatting
+    """
+    def __init__(self):
+        self.stages = {}
+    
+    @contextmanager
+    def medir(self, etapa):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.agregar(etapa, time.perf_counter() - inicio)
+    
+    def agregar(self, etapa, segundos):
+        self.stages[etapa] = self.stages.get(etapa, 0.0) + segundos
+    
+    def merge(self, otro):
+        for etapa, segundos in otro.stages.items():
+            self.agregar(etapa, segundos)
+        return self
+    
+    def as_dict(self):
+        resultado = {etapa: round(segundos, 4) for etapa, segundos in self.stages.items()}
+        resultado['total'] = round(sum(self.stages.values()), 4)
+        return resultado
 
 class VixFixStrategy:
-    def __init__(self, pd_period=22, bbl=20, mult=2.0, lb=50, ph=0.85, pl=1.01, use_local_db=True):
+    def __init__(self, pd_period=22, bbl=20, mult=2.0, lb=50, ph=0.85, pl=1.01, use_local_db=True,
+                 timeframe='1d', db_path=None):
         """
         Inicializa los parámetros del VIX_Fix
         
@@ -24,7 +65,12 @@ class VixFixStrategy:
             ph (float): Highest Percentile
             pl (float): Lowest Percentile
             use_local_db (bool): Usar base de datos local SQLite (default True)
+            timeframe (str): '1d' (EOD) o uno de TIMEFRAMES_INTRADAY (barras guardadas, sin yfinance)
+            db_path (str): BD local o URI sqlite (ej: snapshot inmutable del backend); None = buscarla
         """
+        if timeframe != '1d' and timeframe not in TIMEFRAMES_INTRADAY:
+            raise ValueError(f"Timeframe inválido: {timeframe} (válidos: 1d, {', '.join(TIMEFRAMES_INTRADAY)})")
+        
         self.pd_period = pd_period
         self.bbl = bbl
         self.mult = mult
@@ -32,57 +78,96 @@ class VixFixStrategy:
         self.use_local_db = use_local_db
         self.ph = ph
         self.pl = pl
+        self.timeframe = timeframe
+        self.db_path = db_path
+        self.timings = StageTimings()  # Tiempos del último obtener_fechas_compra
+        self.datos_precargados = None  # OHLCV ya cargado (ej: panel multi-símbolo del motor analítico)
+    
+    def buscar_db_path(self):
+        """
+        Encontrar path correcto de la BD dinámicamente (None si no existe)
+        """
+        return self.db_path or buscar_db_path()
     
     def obtener_datos_desde_bd(self, ticker, fecha_inicio, fecha_fin):
         """
         Obtener datos OHLCV desde base de datos local SQLite
         """
         try:
-            import sqlite3
-            import os
+            db_path = self.buscar_db_path()
+            if db_path is None:
+                return None
+            
+            # Leer datos como DataFrame
+            df = leer_ohlcv_eod(db_path, ticker, fecha_inicio, fecha_fin)
             
-            # Encontrar path correcto de la BD dinámicamente
-            possible_paths = [
-                'backend/trading_dashboard.db',           # Desde root del proyecto
-                'trading_dashboard.db',                   # Desde directorio backend
-                '../trading_dashboard.db',                # Desde subdirectorio
-                os.path.join(os.path.dirname(__file__), 'backend', 'trading_dashboard.db'),  # Relativo al script
-                os.path.join(os.path.dirname(os.path.dirname(__file__)), 'backend', 'trading_dashboard.db')  # Backup
-            ]
+            if df.empty:
+                return None
+            
+            # Convertir a formato pandas igual que yfinance
+            df['business_date'] = pd.to_datetime(df['business_date'])
+            df.set_index('business_date', inplace=True)
+            
+            # Renombrar columnas para compatibilidad
+            df = df.rename(columns={
+                'open_price': 'Open',
+                'high_price': 'High', 
+                'low_price': 'Low',
+                'close_price': 'Close',
+                'volume': 'Volume'
+            })
+            
+            return df[['Open', 'High', 'Low', 'Close', 'Volume']]
             
-            db_path = None
-            for path in possible_paths:
-                if os.path.exists(path):
-                    db_path = path
-                    break
+        except Exception as e:
+            return None
+    
+    def obtener_datos_intraday_desde_bd(self, ticker, fecha_inicio, fecha_fin, warm_up_bars):
+        """
+        Barras intraday del timeframe desde market_data_intraday: las del período más
+        warm_up_bars anteriores (las sesiones no son continuas, el warm-up se cuenta en barras).
+        Fechas YYYY-MM-DD o YYYY-MM-DD HH:MM (UTC); una fecha_fin sin hora incluye todo el día.
+        """
+        try:
+            import sqlite3
             
+            db_path = self.buscar_db_path()
             if db_path is None:
                 return None
             
-            conn = sqlite3.connect(db_path)
+            conn = sqlite3.connect(db_path, uri=True)
             
             query = '''
-                SELECT business_date, open_price, high_price, low_price, close_price, volume
-                FROM market_data_eod 
-                WHERE symbol = ? AND business_date >= ? AND business_date <= ?
-                ORDER BY business_date ASC
+                SELECT bar_time, open_price, high_price, low_price, close_price, volume FROM (
+                    SELECT bar_time, open_price, high_price, low_price, close_price, volume
+                    FROM market_data_intraday
+                    WHERE symbol = ? AND timeframe = ? AND bar_time < ?
+                    ORDER BY bar_time DESC LIMIT ?
+                )
+                UNION ALL
+                SELECT bar_time, open_price, high_price, low_price, close_price, volume
+                FROM market_data_intraday
+                WHERE symbol = ? AND timeframe = ? AND bar_time >= ? AND bar_time < ?
+                ORDER BY bar_time ASC
             '''
             
-            # Leer datos como DataFrame
-            df = pd.read_sql_query(query, conn, params=(ticker, fecha_inicio, fecha_fin))
+            inicio = str(pd.to_datetime(fecha_inicio))
+            fin = str(self.limites_periodo(fecha_inicio, fecha_fin)[1] + pd.Timedelta(seconds=1))
+            df = pd.read_sql_query(query, conn, params=(
+                ticker, self.timeframe, inicio, warm_up_bars,
+                ticker, self.timeframe, inicio, fin
+            ))
             conn.close()
             
             if df.empty:
                 return None
             
-            # Convertir a formato pandas igual que yfinance
-            df['business_date'] = pd.to_datetime(df['business_date'])
-            df.set_index('business_date', inplace=True)
+            df['bar_time'] = pd.to_datetime(df['bar_time'])
+            df.set_index('bar_time', inplace=True)
             
-            # Renombrar columnas para compatibilidad
             df = df.rename(columns={
                 'open_price': 'Open',
-                'high_price': 'High', 
+                'high_price': 'High',
                 'low_price': 'Low',
                 'close_price': 'Close',
                 'volume': 'Volume'
@@ -93,23 +178,43 @@ class VixFixStrategy:
         except Exception as e:
             return None
     
+    def limites_periodo(self, fecha_inicio, fecha_fin):
+        """
+        (inicio, fin) inclusivos del período pedido; en intraday una fecha_fin sin hora
+        cubre hasta la última barra de ese día
+        """
+        inicio = pd.to_datetime(fecha_inicio)
+        fin = pd.to_datetime(fecha_fin)
+        if self.timeframe != '1d' and len(str(fecha_fin)) == 10:
+            fin = fin + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+        return inicio, fin
+    
     def obtener_datos_ticker(self, ticker, fecha_inicio, fecha_fin):
         """
-        Obtener datos con estrategia híbrida: BD local primero, yfinance como fallback
+        Obtener datos con estrategia híbrida: datos precargados o BD local primero, yfinance como fallback
         """
+        if self.datos_precargados is not None:
+            with self.timings.medir('data_load.preloaded'):
+                data = self.datos_precargados.loc[fecha_inicio:fecha_fin]
+            
+            if len(data) > 0:
+                return data
+        
         if self.use_local_db:
             # Intentar BD local primero
-            data = self.obtener_datos_desde_bd(ticker, fecha_inicio, fecha_fin)
+            with self.timings.medir('data_load.local_db'):
+                data = self.obtener_datos_desde_bd(ticker, fecha_inicio, fecha_fin)
             
             if data is not None and len(data) > 0:
                 return data
         
         # Fallback a yfinance
         try:
-            stock = yf.Ticker(ticker)
-            # IMPORTANTE: yfinance end es exclusivo, necesitamos agregar 1 día para incluir fecha_fin
-            fecha_fin_inclusiva = (pd.to_datetime(fecha_fin) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
-            data = stock.history(start=fecha_inicio, end=fecha_fin_inclusiva)
+            with self.timings.medir('data_load.yfinance'):
+                stock = (yf or importar_yfinance()).Ticker(ticker)
+                # IMPORTANTE: yfinance end es exclusivo, necesitamos agregar 1 día para incluir fecha_fin
+                fecha_fin_inclusiva = (pd.to_datetime(fecha_fin) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+                data = stock.history(start=fecha_inicio, end=fecha_fin_inclusiva)
             return data
         except Exception as e:
             return None
@@ -191,44 +296,67 @@ class VixFixStrategy:
             
         Returns:
             pandas.DataFrame: DataFrame con las fechas de compra y datos relevantes
+            (los tiempos por etapa quedan en self.timings)
         """
+        self.timings = StageTimings()
         try:
             # Calcular cuántos días adicionales necesitamos para el warm-up
             # Necesitamos el máximo entre pd_period, bbl, y lb para que los cálculos sean correctos
             max_lookback = max(self.pd_period, self.bbl, self.lb)
             warm_up_days = max_lookback + 50  # Agregamos 50 días extra para asegurar suficientes datos
             
-            # Calcular fecha de inicio extendida
-            fecha_inicio_dt = datetime.strptime(fecha_inicio, '%Y-%m-%d')
-            fecha_inicio_extendida = fecha_inicio_dt - pd.Timedelta(days=warm_up_days)
-            fecha_inicio_str_extendida = fecha_inicio_extendida.strftime('%Y-%m-%d')
+            if self.timeframe == '1d':
+                # Calcular fecha de inicio extendida
+                fecha_inicio_dt = datetime.strptime(fecha_inicio, '%Y-%m-%d')
+                fecha_inicio_extendida = fecha_inicio_dt - pd.Timedelta(days=warm_up_days)
+                fecha_inicio_str_extendida = fecha_inicio_extendida.strftime('%Y-%m-%d')
+                
+                print(f"Obteniendo datos desde {fecha_inicio_str_extendida} (warm-up) hasta {fecha_fin}")
+                print(f"Período de análisis: {fecha_inicio} hasta {fecha_fin}")
+                
+                # Obtener datos del ticker con período extendido usando método híbrido
+                data = self.obtener_datos_ticker(ticker, fecha_inicio_str_extendida, fecha_fin)
+            else:
+                # Intraday: solo barras guardadas por el actualizador de precios (warm-up en barras:
+                # wvf necesita pd_period barras y sus bandas/rangos otras bbl/lb sobre wvf)
+                barras_warm_up = self.pd_period + max(self.bbl, self.lb)
+                print(f"Período de análisis ({self.timeframe}): {fecha_inicio} hasta {fecha_fin}")
+                with self.timings.medir('data_load.local_db'):
+                    data = self.obtener_datos_intraday_desde_bd(ticker, fecha_inicio, fecha_fin, barras_warm_up)
             
-            print(f"Obteniendo datos desde {fecha_inicio_str_extendida} (warm-up) hasta {fecha_fin}")
-            print(f"Período de análisis: {fecha_inicio} hasta {fecha_fin}")
-            
-            # Obtener datos del ticker con período extendido usando método híbrido
-            data = self.obtener_datos_ticker(ticker, fecha_inicio_str_extendida, fecha_fin)
-            
-            if data.empty:
+            if data is None or data.empty:
                 print(f"No se encontraron datos para {ticker}")
                 return None
             
-            print(f"Datos obtenidos: {len(data)} registros desde {data.index[0].strftime('%Y-%m-%d')}")
+            if self.timeframe != '1d':
+                # Con menos barras las ventanas arrancan parciales y pintan verdes falsos
+                if len(data) < barras_warm_up:
+                    print(f"Warm-up insuficiente para {ticker}: {len(data)} barras {self.timeframe} (mínimo {barras_warm_up})")
+                    return None
             
-            # Calcular VIX_Fix con todos los datos
-            df_vix = self.calculate_vix_fix(data)
+            print(f"Datos obtenidos: {len(data)} registros desde {data.index[0].strftime('%Y-%m-%d %H:%M' if self.timeframe != '1d' else '%Y-%m-%d')}")
             
-            # Filtrar solo las fechas del período solicitado
-            fecha_inicio_filter = pd.to_datetime(fecha_inicio).tz_localize(df_vix.index.tz)
-            fecha_fin_filter = pd.to_datetime(fecha_fin).tz_localize(df_vix.index.tz)
-            
-            df_vix_periodo = df_vix[
-                (df_vix.index >= fecha_inicio_filter) & 
-                (df_vix.index <= fecha_fin_filter)
-            ].copy()
+            # Calcular VIX_Fix con todos los datos
+            with self.timings.medir('indicators'):
+                df_vix = self.calculate_vix_fix(data)
             
-            # Filtrar solo las fechas verdes (condición de compra) en el período solicitado
-            fechas_compra = df_vix_periodo[df_vix_periodo['es_verde']].copy()
+            with self.timings.medir('signal_filter'):
+                # Filtrar solo las fechas del período solicitado
+                fecha_inicio_filter, fecha_fin_filter = self.limites_periodo(fecha_inicio, fecha_fin)
+                fecha_inicio_filter = fecha_inicio_filter.tz_localize(df_vix.index.tz)
+                fecha_fin_filter = fecha_fin_filter.tz_localize(df_vix.index.tz)
+                
+                if self.timeframe != '1d':
+                    # Historia guardada que arranca dentro del período: sin señales hasta completar el warm-up
+                    df_vix = df_vix.iloc[barras_warm_up - 1:]
+                
+                df_vix_periodo = df_vix[
+                    (df_vix.index >= fecha_inicio_filter) & 
+                    (df_vix.index <= fecha_fin_filter)
+                ].copy()
+                
+                # Filtrar solo las fechas verdes (condición de compra) en el período solicitado
+                fechas_compra = df_vix_periodo[df_vix_periodo['es_verde']].copy()
             
             return fechas_compra
             
@@ -248,11 +376,13 @@ class VixFixStrategy:
             print(f"No se encontraron condiciones de compra para {ticker}")
             return
         
+        formato = '%Y-%m-%d' if self.timeframe == '1d' else '%Y-%m-%d %H:%M'
+        
         print(f"\n{'='*80}")
         print(f"SEÑALES DE COMPRA (VERDE) PARA {ticker.upper()}")
         print(f"{'='*80}")
         print(f"Total de señales encontradas: {len(fechas_compra)}")
-        print(f"Período: {fechas_compra.index[0].strftime('%Y-%m-%d')} a {fechas_compra.index[-1].strftime('%Y-%m-%d')}")
+        print(f"Período: {fechas_compra.index[0].strftime(formato)} a {fechas_compra.index[-1].strftime(formato)}")
         
         # Mostrar estadísticas
         if len(fechas_compra) > 0:
@@ -268,31 +398,55 @@ class VixFixStrategy:
         print(f"\nLISTA COMPLETA DE FECHAS DE COMPRA:")
         print("-" * 80)
         
+        # Vistas por columnas (sin iterrows): el sink tabla formatea lote a lote
+        fechas = fechas_compra.index
+        numeros = np.arange(1, len(fechas_compra) + 1)
+        wvf = fechas_compra['wvf']
+        upper = fechas_compra['upperBand']
+        range_high = fechas_compra['rangeHigh']
+        
         # Lista numerada de fechas
-        for i, (fecha, row) in enumerate(fechas_compra.iterrows(), 1):
-            print(f"{i:2d}. {fecha.strftime('%Y-%m-%d')} ({fecha.strftime('%A')}) - Precio: ${row['Close']:,.2f}")
+        lista = pd.DataFrame({
+            'n': numeros,
+            'fecha': fechas.strftime(formato),
+            'dia': fechas.strftime('%A'),
+            'close': fechas_compra['Close'].to_numpy()
+        })
+        with TablaSink(plantilla="{:2d}. {} ({}) - Precio: ${:,.2f}") as sink:
+            sink.escribir(lista)
         
         print(f"\nDETALLE TÉCNICO DE CADA SEÑAL:")
         print("-" * 80)
         
-        # Mostrar las fechas con información relevante
-        for i, (fecha, row) in enumerate(fechas_compra.iterrows(), 1):
-            upper_str = f"{row['upperBand']:5.1f}" if not pd.isna(row['upperBand']) else " N/A "
-            range_str = f"{row['rangeHigh']:5.1f}" if not pd.isna(row['rangeHigh']) else " N/A "
-            
-            # Determinar qué condición se cumplió
-            condicion = ""
-            if not pd.isna(row['upperBand']) and row['wvf'] >= row['upperBand']:
-                condicion += "UpperBand "
-            if not pd.isna(row['rangeHigh']) and row['wvf'] >= row['rangeHigh']:
-                condicion += "RangeHigh "
-            
-            print(f"{i:2d}. {fecha.strftime('%Y-%m-%d')} | "
-                  f"Close: ${row['Close']:7.2f} | "
-                  f"VIX_Fix: {row['wvf']:5.1f} | "
-                  f"UpperBand: {upper_str} | "
-                  f"RangeHigh: {range_str} | "
-                  f"Trigger: {condicion.strip()}")
+        # Qué condición se cumplió en cada señal
+        trigger = (
+            pd.Series(np.where(upper.notna() & (wvf >= upper), 'UpperBand', '')) + ' ' +
+            pd.Series(np.where(range_high.notna() & (wvf >= range_high), 'RangeHigh', ''))
+        ).str.strip()
+        
+        detalle = pd.DataFrame({
+            'n': numeros,
+            'fecha': fechas.strftime(formato),
+            'close': fechas_compra['Close'].to_numpy(),
+            'wvf': wvf.to_numpy(),
+            'upper': upper.map('{:5.1f}'.format).where(upper.notna(), ' N/A ').to_numpy(),
+            'range_high': range_high.map('{:5.1f}'.format).where(range_high.notna(), ' N/A ').to_numpy(),
+            'trigger': trigger.to_numpy()
+        })
+        plantilla = ("{:2d}. {} | Close: ${:7.2f} | VIX_Fix: {:5.1f} | "
+                     "UpperBand: {} | RangeHigh: {} | Trigger: {}")
+        with TablaSink(plantilla=plantilla) as sink:
+            sink.escribir(detalle)
+    
+    def exportar_resultados(self, fechas_compra, formato, destino=None):
+        """
+        Escribe las señales con un sink de output_sinks (tabla, csv, jsonl, arrow, parquet)
+        hacia destino o stdout. Devuelve la cantidad de filas escritas.
+        """
+        with crear_sink(formato, destino) as sink:
+            if fechas_compra is not None and not fechas_compra.empty:
+                sink.escribir(fechas_compra.rename_axis('fecha').reset_index())
+        return sink.filas
 
 def main():
     """Función principal"""
@@ -303,12 +457,19 @@ def main():
 Ejemplos de uso:
   python vix_fix_strategy.py --inicio 2024-01-01 --fin 2024-12-31
   python vix_fix_strategy.py -i 2024-06-01 -f 2024-06-30 --ticker GGAL.BA
+  python vix_fix_strategy.py -i 2024-06-10 -f 2024-06-14 --ticker AAPL --timeframe 15m
+  python vix_fix_strategy.py -i 2020-01-01 -f 2025-08-04 --ticker BTC-USD --formato jsonl | jq .wvf
+  python vix_fix_strategy.py -i 2020-01-01 -f 2025-08-04 --ticker BTC-USD --salida senales.csv
+
+Los timeframes intraday usan las barras 1m guardadas por el actualizador de precios del backend.
         """
     )
     
     parser.add_argument('--ticker', '-t', default='GGAL.BA', help='Símbolo del ticker')
     parser.add_argument('--inicio', '-i', required=True, help='Fecha de inicio (YYYY-MM-DD)')
     parser.add_argument('--fin', '-f', required=True, help='Fecha de fin (YYYY-MM-DD)')
+    parser.add_argument('--timeframe', default='1d', choices=['1d', *TIMEFRAMES_INTRADAY],
+                        help='Timeframe de las barras (default: 1d)')
     
     # Parámetros del VIX_Fix
     parser.add_argument('--pd', type=int, default=22, help='LookBack Period Standard Deviation High')
@@ -318,6 +479,10 @@ Ejemplos de uso:
     parser.add_argument('--ph', type=float, default=0.85, help='Highest Percentile')
     parser.add_argument('--pl', type=float, default=1.01, help='Lowest Percentile')
     
+    # Salida
+    parser.add_argument('--formato', choices=list(SINKS), help='Formato de salida (default: por extensión de --salida, o tabla)')
+    parser.add_argument('--salida', '-o', help='Archivo de salida (default: stdout)')
+    
     args = parser.parse_args()
     
     try:
@@ -332,18 +497,31 @@ Ejemplos de uso:
             mult=args.mult,
             lb=args.lb,
             ph=args.ph,
-            pl=args.pl
+            pl=args.pl,
+            timeframe=args.timeframe
         )
         
-        print(f"Analizando {args.ticker} desde {args.inicio} hasta {args.fin}...")
-        print(f"Parámetros VIX_Fix: pd={args.pd}, bbl={args.bbl}, mult={args.mult}, lb={args.lb}, ph={args.ph}, pl={args.pl}")
+        formato = resolver_formato(args.salida, args.formato)
+        
+        with canal_mensajes(formato, args.salida):
+            print(f"Analizando {args.ticker} desde {args.inicio} hasta {args.fin}...")
+            print(f"Parámetros VIX_Fix: pd={args.pd}, bbl={args.bbl}, mult={args.mult}, lb={args.lb}, ph={args.ph}, pl={args.pl}")
+            
+            # Obtener fechas de compra
+            fechas_compra = strategy.obtener_fechas_compra(args.ticker, args.inicio, args.fin)
         
-        # Obtener fechas de compra
-        fechas_compra = strategy.obtener_fechas_compra(args.ticker, args.inicio, args.fin)
-        strategy.mostrar_resultados(fechas_compra, args.ticker)
+        if formato == 'tabla' and args.salida is None:
+            strategy.mostrar_resultados(fechas_compra, args.ticker)
+        else:
+            filas = strategy.exportar_resultados(fechas_compra, formato, args.salida)
+            if args.salida:
+                print(f"💾 {filas} señales en {args.salida}")
         
     except ValueError as e:
-        print(f"Error en las fechas: {e}")
+        print(f"Error en los parámetros: {e}")
+        sys.exit(1)
+    except RuntimeError as e:
+        print(f"❌ {e}")
         sys.exit(1)
     except KeyboardInterrupt:
         print("\nOperación cancelada")